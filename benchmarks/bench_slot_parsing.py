@@ -0,0 +1,65 @@
+# bench_slot_parsing.py — parses/second for slot labels: tolerant parser vs fast path vs LRU vs column
+#
+#   python benchmarks/bench_slot_parsing.py [--days 21] [--repeat 5]
+#
+# Labels come from slots.generate_slots(), i.e. the canonical shape the app stores. The column
+# case parses a bookings-like slot column (every label repeated --per-slot times) in one call.
+from __future__ import annotations
+import argparse
+import os
+import sys
+import timeit
+from typing import Callable, List
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slots import generate_slots  # noqa: E402
+from utils import _parse_canonical, _parse_tolerant, parse_slot_range, parse_slot_series  # noqa: E402
+
+def _labels(days: int) -> List[str]:
+    slo, ncc = generate_slots(horizon_days=days)
+    return [s.label for by_day in (slo, ncc) for day_slots in by_day.values() for s in day_slots]
+
+def _rate(fn: Callable[[str], object], labels: List[str], repeat: int, setup: Callable[[], None] = None) -> float:
+    """Best-of-`repeat` parses per second over the whole label list."""
+    def run():
+        for s in labels:
+            fn(s)
+    best = min(timeit.repeat(run, setup=setup or (lambda: None), number=1, repeat=repeat))
+    return len(labels) / best
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Slot label parsing throughput")
+    ap.add_argument("--days", type=int, default=21, help="slot horizon to generate labels for (app default: 21)")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--per-slot", type=int, default=3, help="bookings per slot label in the column case")
+    args = ap.parse_args()
+
+    labels = _labels(args.days)
+    cases = [
+        ("tolerant parser (before)", _parse_tolerant, None),
+        ("canonical fast path", _parse_canonical, None),
+        ("parse_slot_range, cold LRU", parse_slot_range, parse_slot_range.cache_clear),
+        ("parse_slot_range, warm LRU", parse_slot_range, None),
+    ]
+    print(f"{len(labels)} labels, best of {args.repeat}")
+    base = None
+    for name, fn, setup in cases:
+        rate = _rate(fn, labels, args.repeat, setup)
+        base = base or rate
+        print(f"  {name:<28} {rate:>12,.0f} parses/s  ({rate / base:5.1f}x)")
+
+    column = pd.Series(labels * args.per_slot)
+    print(f"{len(column)}-row slot column, best of {args.repeat}")
+    col_cases = [
+        ("Series.map, cold LRU", lambda: column.map(parse_slot_range), parse_slot_range.cache_clear),
+        ("parse_slot_series", lambda: parse_slot_series(column), None),
+    ]
+    for name, fn, setup in col_cases:
+        best = min(timeit.repeat(fn, setup=setup or (lambda: None), number=1, repeat=args.repeat))
+        print(f"  {name:<28} {best * 1000:>9.1f} ms  ({len(column) / best:>12,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
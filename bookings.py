@@ -1,192 +1,1697 @@
-# bookings.py — Google Sheets I/O with schema enforcement & backward-compat
-import json
-from typing import List, Dict, Any
-
-import pandas as pd
-import gspread
-import streamlit as st
-from oauth2client.service_account import ServiceAccountCredentials
-
-SHEET_NAME = "atlab_bookings"  # Must match your actual Google Sheet name
-
-# ---- Canonical schema (super-set of legacy) ----
-# Order matters; we’ll write headers in this order if we need to create/expand.
-REQUIRED_COLS: List[str] = [
-    "name",
-    "email",
-    "student_id",
-    "dsps",
-    "slot",
-    "lab_location",
-    "exam_number",
-    "grade",
-    "graded_by",
-    "group_id",
-    "status",
-    "created_at",
-    "updated_at",
-]
-
-# Legacy columns we’ll preserve if present (we won’t delete them). If your sheet
-# has these, we keep them and fill from data when possible.
-LEGACY_COLS: List[str] = [
-    "day",
-    "time",
-    "timestamp",
-]
-
-# Minimal defaults for new columns when migrating legacy rows
-DEFAULTS: Dict[str, Any] = {
-    "grade": "",
-    "graded_by": "",
-    "group_id": "",
-    "status": "booked",
-    "created_at": "",
-    "updated_at": "",
-    "exam_number": "",
-}
-
-# ----------------- Internal helpers -----------------
-def _get_sheet():
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    json_key = st.secrets["google_service_account"]
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(json.loads(json_key), scope)
-    client = gspread.authorize(creds)
-    # Use the first worksheet of the spreadsheet named SHEET_NAME
-    return client.open(SHEET_NAME).sheet1
-
-def _clear_cache():
-    # Invalidate streamlit cache after mutations
-    st.cache_data.clear()
-
-def _normalize_header(names: List[str]) -> List[str]:
-    """Lowercase & trim; safe for comparison and DataFrame columns."""
-    return [c.strip().lower() for c in names]
-
-def _ensure_header(sheet) -> List[str]:
-    """
-    Ensure the sheet has a header row and includes REQUIRED_COLS.
-    - If empty sheet: write REQUIRED_COLS as the header.
-    - If legacy header: append any missing REQUIRED_COLS to the end (don’t delete legacy cols).
-    Returns the effective header list as it exists on the sheet (preserving order).
-    """
-    values = sheet.get_all_values()
-    if not values:
-        sheet.insert_row(REQUIRED_COLS, 1)
-        return REQUIRED_COLS[:]
-
-    if len(values) >= 1:
-        raw_header = values[0]
-        header = _normalize_header(raw_header)
-        # Append any missing required cols
-        missing = [c for c in REQUIRED_COLS if c not in header]
-        if missing:
-            # extend header row (Google Sheets needs a full row update)
-            new_header = raw_header + missing
-            sheet.update(f"A1:{chr(64+len(new_header))}1", [new_header])
-            header = _normalize_header(new_header)
-        return header
-
-    # Fallback
-    sheet.insert_row(REQUIRED_COLS, 1)
-    return REQUIRED_COLS[:]
-
-def _coerce_df(df: pd.DataFrame, header: List[str]) -> pd.DataFrame:
-    """Reindex to include all header columns; fill defaults for missing."""
-    df = df.copy()
-    # Ensure all header columns exist
-    for col in header:
-        if col not in df.columns:
-            # default values for new columns
-            df[col] = DEFAULTS.get(col, "")
-    # Make sure columns contain at least the header (preserve sheet order)
-    df = df.reindex(columns=header)
-    # Coerce booleans for dsps from legacy strings if necessary
-    if "dsps" in df.columns:
-        df["dsps"] = df["dsps"].apply(lambda v: True if str(v).strip().lower() in ("true", "1", "yes") else (False if str(v).strip().lower() in ("false", "0", "no") else v))
-    return df
-
-def _pad_row_to_header(row: List[Any], header: List[str]) -> List[Any]:
-    """Pad/truncate a list row to match header length."""
-    if len(row) < len(header):
-        row = row + [""] * (len(header) - len(row))
-    elif len(row) > len(header):
-        row = row[:len(header)]
-    return row
-
-# ----------------- Public API -----------------
-@st.cache_data(ttl=60)
-def load_bookings() -> pd.DataFrame:
-    """
-    Loads the entire sheet into a DataFrame.
-    - Ensures header includes REQUIRED_COLS (appends them if missing).
-    - Preserves legacy columns (day, time, timestamp) if present.
-    - Returns DF with columns in the same order as the sheet header.
-    """
-    sheet = _get_sheet()
-    header = _ensure_header(sheet)  # may append missing cols
-
-    values = sheet.get_all_values()
-    if not values or len(values) < 2:
-        # Sheet with only header or empty
-        return pd.DataFrame(columns=header)
-
-    raw_header = _normalize_header(values[0])
-    rows = values[1:]
-    df = pd.DataFrame(rows, columns=raw_header)
-
-    # If legacy day/time exist but slot missing, keep both, do not overwrite slot
-    # (Your app already writes 'slot'. This just preserves old data.)
-    df = _coerce_df(df, header)
-
-    return df
-
-def append_booking(row: List[Any]) -> None:
-    """
-    Append a row (list) to the sheet.
-    - Pads/truncates to header length.
-    - Assumes the row is already in the intended order (prefer REQUIRED_COLS order).
-    """
-    sheet = _get_sheet()
-    header = _ensure_header(sheet)
-    safe_row = _pad_row_to_header(row, header)
-    sheet.append_row(safe_row)
-    _clear_cache()
-
-def append_booking_dict(row_dict: Dict[str, Any]) -> None:
-    """
-    Append a row from a dict (keys can be a subset/superset of header).
-    Missing keys are defaulted; extra keys are ignored.
-    """
-    sheet = _get_sheet()
-    header = _ensure_header(sheet)
-    row = [row_dict.get(k, DEFAULTS.get(k, "")) for k in header]
-    sheet.append_row(row)
-    _clear_cache()
-
-def overwrite_bookings(df: pd.DataFrame) -> None:
-    """
-    Replace the sheet content with df.
-    - Ensures the header includes REQUIRED_COLS (appending if needed).
-    - Reindexes df to match the sheet header (includes legacy cols if present on sheet).
-    - Uses simple append loop (fine for class sizes; switch to batch if needed).
-    """
-    sheet = _get_sheet()
-    header = _ensure_header(sheet)
-
-    # Reindex df to sheet header
-    df = df.copy()
-    # Normalize incoming columns
-    df.columns = _normalize_header(list(df.columns))
-    df = _coerce_df(df, header)
-
-    # Clear and write header + rows
-    sheet.clear()
-    sheet.insert_row(header, 1)
-    if not df.empty:
-        for row in df.itertuples(index=False):
-            sheet.append_row(list(row))
-    _clear_cache()
+# bookings.py — booking storage (Google Sheets or local SQLite) with schema enforcement & backward-compat
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import date, datetime, timezone
+from typing import List, Dict, Any, Iterable, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import gspread
+import requests
+from gspread.utils import absolute_range_name, rowcol_to_a1
+import streamlit as st
+from oauth2client.service_account import ServiceAccountCredentials
+
+from slots import EPOCH, LOCATION_CODES, slot_capacity, slot_id
+from utils import parse_slot_series
+
+SHEET_NAME = "atlab_bookings"  # Must match your actual Google Sheet name
+
+# Storage engine: "sheets" (default) or "sqlite". Read from the environment first,
+# then st.secrets, so offline runs/tests can switch without a secrets file.
+BACKEND_SETTING = "BOOKINGS_BACKEND"
+SQLITE_PATH_SETTING = "BOOKINGS_SQLITE_PATH"
+DEFAULT_SQLITE_PATH = "atlab_bookings.db"
+
+# Write-behind (event-log mode only): mutations are journaled locally and flushed
+# to the backend by a background thread, so submits don't wait on Google.
+WRITE_BEHIND_SETTING = "BOOKINGS_WRITE_BEHIND"
+JOURNAL_PATH_SETTING = "BOOKINGS_JOURNAL_PATH"
+# Next to this module (like slots.DEFAULT_SCHEDULE_PATH), not the working directory
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "atlab_bookings.journal")
+# How long admin actions that need the stored state current (compaction, import)
+# wait for the journal to flush before giving up.
+DRAIN_TIMEOUT_SECONDS = 30.0
+
+# ---- Canonical schema (super-set of legacy) ----
+# Order matters; we’ll write headers in this order if we need to create/expand.
+REQUIRED_COLS: List[str] = [
+    "name",
+    "email",
+    "student_id",
+    "dsps",
+    "slot",
+    "lab_location",
+    "exam_number",
+    "grade",
+    "graded_by",
+    "group_id",
+    "status",
+    "created_at",
+    "updated_at",
+    "booking_id",
+    "slot_id",
+]
+# Bump whenever REQUIRED_COLS changes; cached headers from an older version are re-read.
+SCHEMA_VERSION = 3
+
+# Legacy columns we’ll preserve if present (we won’t delete them). If your sheet
+# has these, we keep them and fill from data when possible.
+LEGACY_COLS: List[str] = [
+    "day",
+    "time",
+    "timestamp",
+]
+
+# Minimal defaults for new columns when migrating legacy rows
+DEFAULTS: Dict[str, Any] = {
+    "grade": "",
+    "graded_by": "",
+    "group_id": "",
+    "status": "booked",
+    "created_at": "",
+    "updated_at": "",
+    "exam_number": "",
+    "booking_id": "",
+}
+
+STATUS_BOOKED = "booked"
+STATUS_CANCELED = "canceled"
+
+# load_bookings() hands out a typed frame: these derived columns are added on load
+# (parsed once per distinct slot) and never stored; low-cardinality text columns
+# become categoricals, dsps a real bool and slot_id an Int64 (see slots.Slot).
+DERIVED_COLS: List[str] = ["slot_start", "slot_end", "slot_week", "slot_date"]
+CATEGORY_COLS = ("lab_location", "status", "exam_number")
+
+class SlotTakenError(Exception):
+    """claim_slots() lost: one of the requested slots is already full."""
+    def __init__(self, slots: List[str]):
+        super().__init__(f"Slot(s) already booked: {', '.join(slots)}")
+        self.slots = slots
+
+class WritesPendingError(Exception):
+    """A claim couldn't be ordered after queued write-behind writes (journal didn't drain); nothing was written."""
+    def __init__(self):
+        super().__init__(f"Queued booking writes didn't reach storage within {DRAIN_TIMEOUT_SECONDS:.0f}s")
+
+class BookingConflictError(Exception):
+    """update_bookings(expected=...): these bookings changed since the caller read them."""
+    def __init__(self, booking_ids: List[str]):
+        super().__init__(f"Booking(s) changed since loaded: {', '.join(booking_ids)}")
+        self.booking_ids = booking_ids
+
+# ---- Append-only event log ----
+# Student/admin actions append events to EVENTS_SHEET_NAME (or the SQLite events
+# table); the bookings sheet is a compacted snapshot. Current state = snapshot +
+# events after the newest "compacted" marker. Set BOOKINGS_EVENT_LOG=false to
+# write the snapshot in place instead (pre-event-log behaviour).
+EVENT_LOG_SETTING = "BOOKINGS_EVENT_LOG"
+EVENTS_SHEET_NAME = "atlab_booking_events"
+EVENT_COLS: List[str] = ["event_id", "event", "booking_id", "fields", "at"]
+EVENT_BOOKED = "booked"
+EVENT_CANCELED = "canceled"
+EVENT_RESCHEDULED = "rescheduled"
+EVENT_GRADED = "graded"
+EVENT_UPDATED = "updated"
+EVENT_COMPACTED = "compacted"  # marker: events up to fields["through"] are in the snapshot
+# Fold pending events into a fresh snapshot once this many have piled up
+COMPACT_EVERY = 200
+
+# ---- Term archive ----
+# archive_bookings() moves past bookings that are canceled or graded out of the
+# hot sheet into one archive per term: a "<SHEET_NAME>_<term>" worksheet, or the
+# SQLite archive table. Terms follow the college calendar by slot month.
+ARCHIVE_PREFIX = f"{SHEET_NAME}_"
+TERM_MONTHS = (("spring", range(1, 6)), ("summer", range(6, 8)), ("fall", range(8, 13)))
+
+# Namespace for deterministic ids backfilled onto legacy rows (so two sessions
+# migrating the same sheet at once write identical ids).
+_BOOKING_ID_NS = uuid.uuid5(uuid.NAMESPACE_URL, "atlab_bookings/booking_id")
+
+# Sheets API requests should stay well under the ~2 MB payload ceiling; we chunk
+# full-sheet writes by both cell count and an estimate of the JSON body size.
+MAX_WRITE_CELLS = 50_000
+MAX_WRITE_BYTES = 1_500_000
+# Never shrink the sheet below header + one row (Sheets refuses to drop every
+# non-frozen row when the header is frozen).
+MIN_SHEET_ROWS = 2
+
+_BACKEND = None
+_BACKEND_LOCK = threading.Lock()
+_JOURNAL = None
+
+# load_bookings() cache lifetime. Our own writes patch the remembered state
+# (write-through), so within this window the rerun after a write needs no read.
+CACHE_TTL_SECONDS = 60
+
+# Last loaded state: used to diff updates and patched by our own writes so
+# back-to-back edits (and load_bookings) see what we just wrote.
+# "version" goes up on every load or patch; load_bookings() tags its frames with it.
+_STATE: Dict[str, Any] = {"frame": None, "pos": {}, "students": None, "loaded_at": 0.0, "version": 0}
+_STATE_LOCK = threading.RLock()
+_COMPACT_LOCK = threading.Lock()
+
+# Service-account access tokens live 1h; re-authorize a little before that.
+AUTH_MAX_AGE_SECONDS = 55 * 60
+
+# Process-wide gspread connection: one authorized client, one handle per worksheet.
+_CONN_LOCK = threading.RLock()
+_CONN: Dict[str, Any] = {"client": None, "spreadsheet": None, "worksheets": {}, "authed_at": 0.0}
+_CONN_STATS: Dict[str, int] = {"auths": 0, "opens": 0, "reuses": 0, "reconnects": 0}
+
+# Load counters: full downloads vs incremental (delta) reads, and data rows fetched.
+# "memory" counts loads served from the write-through state without any read.
+_LOAD_STATS: Dict[str, int] = {"full": 0, "delta": 0, "rows_fetched": 0, "memory": 0}
+
+# Every write that changes rows already on the bookings sheet (updates, rewrites,
+# id backfills) stores a fresh revision token in A1 of this tab. Incremental loads
+# read it in the same request as the new rows and reload in full when it moved,
+# so detecting edits costs one cell instead of a column per held row.
+REVISION_SHEET_NAME = "atlab_booking_meta"
+# Hand edits in the Sheets UI don't touch the token: reload in full at least this often
+FULL_RELOAD_SECONDS = 600
+
+# Appends aren't idempotent: only retry them when the request surely never applied.
+_NON_IDEMPOTENT = {"append_row", "append_rows", "insert_row"}
+
+# ---- Sheets API quota ----
+# Every gspread call takes a token from a per-minute bucket first. Defaults match
+# Google's per-user quota (60 reads + 60 writes per minute per service account).
+READS_PER_MINUTE_SETTING = "SHEETS_READS_PER_MINUTE"
+WRITES_PER_MINUTE_SETTING = "SHEETS_WRITES_PER_MINUTE"
+DEFAULT_REQUESTS_PER_MINUTE = 60
+_WRITE_METHODS = {
+    "update", "batch_update", "append_row", "append_rows", "insert_row", "insert_rows",
+    "resize", "add_rows", "add_cols", "delete_rows", "delete_columns", "clear",
+    "batch_clear", "update_cell", "update_cells", "format", "batch_format",
+}
+# Lower number goes first when callers queue for the same bucket
+PRIORITY_WRITE = 0
+PRIORITY_READ = 1
+PRIORITY_BACKGROUND = 2  # reads from the write-behind thread
+# 429 (quota) always retries; 5xx only when re-sending can't duplicate rows.
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 32.0
+_SCHEDULER = None
+_REQUEST_CONTEXT = threading.local()  # .background = True on the write-behind thread
+
+# ----------------- Internal helpers -----------------
+def _setting(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Environment variable, else st.secrets entry, else default."""
+    if os.environ.get(name):
+        return os.environ[name]
+    try:
+        return st.secrets.get(name, default)
+    except Exception:
+        return default  # no secrets file (local/offline runs)
+
+def _authorize() -> None:
+    scope = [
+        "https://spreadsheets.google.com/feeds",
+        "https://www.googleapis.com/auth/drive",
+    ]
+    json_key = st.secrets["google_service_account"]
+    creds = ServiceAccountCredentials.from_json_keyfile_dict(json.loads(json_key), scope)
+    _CONN["client"] = gspread.authorize(creds)
+    _CONN["spreadsheet"] = None
+    _CONN["worksheets"] = {}
+    _CONN["authed_at"] = time.monotonic()
+    _CONN_STATS["auths"] += 1
+
+def _worksheet(title: Optional[str] = None):
+    """
+    Cached worksheet handle (None → first worksheet); (re)authorizes lazily.
+    Quota tokens for opening are taken with _CONN_LOCK released, so a wait on an
+    empty bucket (or a 429 pause) never holds up calls on handles already open.
+    """
+    reads = 0         # read tokens taken and not yet spent
+    missing = False   # None: the tab doesn't exist yet; True: write token taken to add it
+    while True:
+        with _CONN_LOCK:
+            if _CONN["client"] is None or time.monotonic() - _CONN["authed_at"] > AUTH_MAX_AGE_SECONDS:
+                _authorize()
+            ws = _CONN["worksheets"].get(title)
+            if ws is not None:
+                _CONN_STATS["reuses"] += 1
+                return ws
+            if _CONN["spreadsheet"] is None and reads:
+                reads -= 1
+                _CONN["spreadsheet"] = _CONN["client"].open(SHEET_NAME)
+                _CONN_STATS["opens"] += 1
+            ss = _CONN["spreadsheet"]
+            if ss is not None:
+                if title is None:
+                    ws = ss.sheet1
+                elif missing:
+                    ws = ss.add_worksheet(title=title, rows=1000, cols=26)  # e.g. first event ever
+                elif reads:
+                    reads -= 1
+                    try:
+                        ws = ss.worksheet(title)
+                    except gspread.exceptions.WorksheetNotFound:
+                        missing = None
+                if ws is not None:
+                    _CONN["worksheets"][title] = ws
+                    return ws
+        # Take the next token outside the lock, then look again (another thread
+        # may have opened the handle meanwhile)
+        if missing is None:
+            _throttle("write")
+            missing = True
+        else:
+            _throttle("read")
+            reads += 1
+
+def _worksheet_titles() -> List[str]:
+    """Titles of every tab in the spreadsheet (one metadata read)."""
+    _throttle("read")  # outside _CONN_LOCK, like _worksheet()
+    while True:
+        _worksheet()  # authorizes and opens the spreadsheet if needed
+        with _CONN_LOCK:
+            ss = _CONN["spreadsheet"]
+        if ss is not None:  # None only if a reconnect raced us
+            return [ws.title for ws in ss.worksheets()]
+
+def _reset_connection() -> None:
+    """Drop the cached client/handles; the next call re-authorizes and re-opens."""
+    with _CONN_LOCK:
+        _CONN["client"] = None
+        _CONN["spreadsheet"] = None
+        _CONN["worksheets"] = {}
+        _CONN_STATS["reconnects"] += 1
+
+def _is_auth_error(e: Exception) -> bool:
+    return isinstance(e, gspread.exceptions.APIError) and getattr(e, "code", None) == 401
+
+class _TokenBucket:
+    """`per_minute` tokens refilled continuously; holds at most one minute's worth."""
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.rate = per_minute / 60.0
+        self.stamp = time.monotonic()
+        self.paused_until = 0.0  # set after a 429: nobody draws until then
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token can be taken (0 = now)."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        short = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(short, self.paused_until - now, 0.0)
+
+class _RequestScheduler:
+    """
+    Single gate for Sheets API calls: separate read/write token buckets, callers
+    served by priority (writes, then reads, then background reads) and FIFO within
+    a priority, and a shared pause when Google answers 429.
+    """
+    def __init__(self, reads_per_minute: int, writes_per_minute: int):
+        self._cond = threading.Condition()
+        self._buckets = {"read": _TokenBucket(reads_per_minute), "write": _TokenBucket(writes_per_minute)}
+        self._waiting: Dict[str, List[Tuple[int, int]]] = {"read": [], "write": []}
+        self._seq = itertools.count()
+        self._stats: Dict[str, Any] = {
+            "requests": 0, "queued": 0, "max_queue": 0, "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0, "throttled": 0, "retries": 0,
+        }
+
+    def acquire(self, kind: str, priority: int) -> float:
+        """Block until this call may go out; returns the seconds spent waiting."""
+        ticket = (priority, next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            heap, bucket = self._waiting[kind], self._buckets[kind]
+            heapq.heappush(heap, ticket)
+            self._stats["max_queue"] = max(self._stats["max_queue"], len(heap))
+            while True:
+                wait = bucket.wait_time(time.monotonic())
+                if heap[0] == ticket and wait == 0:
+                    break
+                self._cond.wait(timeout=wait if heap[0] == ticket else None)
+            heapq.heappop(heap)
+            bucket.tokens -= 1
+            waited = time.monotonic() - start
+            self._stats["requests"] += 1
+            self._stats["queued"] += waited > 0.001
+            self._stats["wait_seconds"] += waited
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+            self._cond.notify_all()  # next in line re-checks
+        return waited
+
+    def backoff(self, kind: str, delay: float, throttled: bool) -> None:
+        """Record a retry; a 429 also pauses the whole bucket for `delay` seconds."""
+        with self._cond:
+            self._stats["retries"] += 1
+            if throttled:
+                self._stats["throttled"] += 1
+                bucket = self._buckets[kind]
+                bucket.paused_until = max(bucket.paused_until, time.monotonic() + delay)
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            out = dict(self._stats)
+            out["queue_depth"] = {k: len(v) for k, v in self._waiting.items()}
+            out["tokens"] = {k: round(b.tokens, 1) for k, b in self._buckets.items()}
+        out["wait_seconds"] = round(out["wait_seconds"], 3)
+        out["max_wait_seconds"] = round(out["max_wait_seconds"], 3)
+        return out
+
+def _scheduler() -> _RequestScheduler:
+    global _SCHEDULER
+    with _CONN_LOCK:
+        if _SCHEDULER is None:
+            _SCHEDULER = _RequestScheduler(
+                int(_setting(READS_PER_MINUTE_SETTING, DEFAULT_REQUESTS_PER_MINUTE)),
+                int(_setting(WRITES_PER_MINUTE_SETTING, DEFAULT_REQUESTS_PER_MINUTE)),
+            )
+        return _SCHEDULER
+
+def _throttle(kind: str) -> None:
+    if kind == "write":
+        priority = PRIORITY_WRITE
+    else:
+        priority = PRIORITY_BACKGROUND if getattr(_REQUEST_CONTEXT, "background", False) else PRIORITY_READ
+    _scheduler().acquire(kind, priority)
+
+def _backoff_delay(attempt: int) -> float:
+    # exponential backoff with full jitter
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+def scheduler_stats() -> Dict[str, Any]:
+    """Sheets request scheduler metrics: queue depth, waits, 429s and retries."""
+    return _scheduler().stats()
+
+class _ReconnectingSheet:
+    """
+    Stand-in for a gspread Worksheet that resolves the cached handle on every call.
+    - Each request first waits for a quota token (see _RequestScheduler).
+    - On a transport or auth failure, reconnects once and retries.
+    - On 429/5xx, backs off exponentially with jitter and retries (MAX_RETRIES).
+    """
+    _api = gspread.Worksheet
+
+    def __init__(self, title: Optional[str] = None):
+        self._title = title
+
+    def _target(self):
+        return _worksheet(self._title)
+
+    def __getattr__(self, name: str):
+        if not callable(getattr(self._api, name, None)):
+            return getattr(self._target(), name)  # row_count, col_count, title, ...
+        kind = "write" if name in _WRITE_METHODS else "read"
+
+        def once(*args, **kwargs):
+            _throttle(kind)
+            try:
+                return getattr(self._target(), name)(*args, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    gspread.exceptions.APIError) as e:
+                transport = not isinstance(e, gspread.exceptions.APIError)
+                if not (_is_auth_error(e) or (transport and name not in _NON_IDEMPOTENT)):
+                    raise
+                _reset_connection()
+                _throttle(kind)
+                return getattr(self._target(), name)(*args, **kwargs)
+
+        def call(*args, **kwargs):
+            for attempt in itertools.count():
+                try:
+                    return once(*args, **kwargs)
+                except gspread.exceptions.APIError as e:
+                    code = getattr(e, "code", None)
+                    retry = code == 429 or (code in _RETRY_STATUS and name not in _NON_IDEMPOTENT)
+                    if not retry or attempt >= MAX_RETRIES:
+                        raise
+                    delay = _backoff_delay(attempt)
+                    _scheduler().backoff(kind, delay, throttled=code == 429)
+                    if code != 429:
+                        time.sleep(delay)  # 429s wait in the bucket pause instead
+        return call
+
+class _ReconnectingSpreadsheet(_ReconnectingSheet):
+    """The same for spreadsheet-level calls (e.g. one values_batch_get across tabs)."""
+    _api = gspread.Spreadsheet
+
+    def _target(self):
+        while True:
+            _worksheet()  # authorizes and opens the spreadsheet if needed
+            with _CONN_LOCK:
+                ss = _CONN["spreadsheet"]
+            if ss is not None:  # None only if a reconnect raced us
+                return ss
+
+def _get_sheet(title: Optional[str] = None):
+    # Use the first worksheet of the spreadsheet named SHEET_NAME unless a title is given
+    return _ReconnectingSheet(title)
+
+def _get_spreadsheet():
+    return _ReconnectingSpreadsheet()
+
+def connection_stats() -> Dict[str, int]:
+    """Counters for gspread auths, spreadsheet opens, handle reuses and reconnects."""
+    with _CONN_LOCK:
+        return dict(_CONN_STATS)
+
+def load_stats() -> Dict[str, int]:
+    """Counters for full vs incremental sheet loads, data rows fetched and in-memory loads."""
+    return dict(_LOAD_STATS)
+
+def _clear_cache():
+    # Invalidate only the bookings cache after mutations (other st.cache_data entries stay)
+    load_bookings.clear()
+
+def _forget_state() -> None:
+    """Drop the remembered state too, when a write can't be patched in (overwrite/import)."""
+    with _STATE_LOCK:
+        _STATE["frame"] = None
+        _STATE["students"] = None
+    _clear_cache()
+
+def _normalize_header(names: List[str]) -> List[str]:
+    """Lowercase & trim; safe for comparison and DataFrame columns."""
+    return [c.strip().lower() for c in names]
+
+def _ensure_header(sheet, values: Optional[List[List[Any]]] = None) -> List[str]:
+    """
+    Ensure the sheet has a header row and includes REQUIRED_COLS.
+    - If empty sheet: write REQUIRED_COLS as the header.
+    - If legacy header: append any missing REQUIRED_COLS to the end (don’t delete legacy cols).
+    - `values`: a full get_all_values() payload the caller already has; it is
+      validated (and patched in place) instead of downloading the sheet again.
+      Without it only row 1 is read, unless columns must be added.
+    Returns the effective header list as it exists on the sheet (preserving order).
+    """
+    if values is None:
+        first_row = sheet.row_values(1)
+        if first_row and all(c in _normalize_header(first_row) for c in REQUIRED_COLS):
+            return _normalize_header(first_row)
+        # Missing columns: need the full grid width so we don't write over unlabeled data
+        values = sheet.get_all_values()
+
+    if not values:
+        sheet.insert_row(REQUIRED_COLS, 1)
+        values.append(REQUIRED_COLS[:])
+        return REQUIRED_COLS[:]
+
+    raw_header = values[0]
+    header = _normalize_header(raw_header)
+    # Append any missing required cols
+    missing = [c for c in REQUIRED_COLS if c not in header]
+    if missing:
+        # extend header row (Google Sheets needs a full row update)
+        new_header = raw_header + missing
+        if sheet.col_count < len(new_header):
+            sheet.resize(cols=len(new_header))  # updates can't write past the grid
+        sheet.update(values=[new_header], range_name=f"A1:{rowcol_to_a1(1, len(new_header))}")
+        values[0] = new_header
+        header = _normalize_header(new_header)
+    return header
+
+def _coerce_df(df: pd.DataFrame, header: List[str]) -> pd.DataFrame:
+    """Reindex to include all header columns; fill defaults for missing."""
+    df = df.copy()
+    # Ensure all header columns exist
+    for col in header:
+        if col not in df.columns:
+            # default values for new columns
+            df[col] = DEFAULTS.get(col, "")
+    # Make sure columns contain at least the header (preserve sheet order)
+    df = df.reindex(columns=header)
+    # Coerce booleans for dsps from legacy strings if necessary
+    if "dsps" in df.columns:
+        df["dsps"] = df["dsps"].apply(_coerce_bool)
+    return df
+
+def _coerce_bool(v: Any) -> Any:
+    s = str(v).strip().lower()
+    return True if s in ("true", "1", "yes") else (False if s in ("false", "0", "no") else v)
+
+def _pad_row_to_header(row: List[Any], header: List[str]) -> List[Any]:
+    """Pad/truncate a list row to match header length."""
+    if len(row) < len(header):
+        row = row + [""] * (len(header) - len(row))
+    elif len(row) > len(header):
+        row = row[:len(header)]
+    return row
+
+def _cell_value(v: Any) -> Any:
+    """JSON-safe cell value: NaN/None → '', numpy scalars → Python scalars."""
+    if v is None:
+        return ""
+    try:
+        if pd.isna(v):
+            return ""
+    except (TypeError, ValueError):
+        pass
+    if hasattr(v, "item"):
+        return v.item()
+    return v
+
+def _df_to_values(df: pd.DataFrame) -> List[List[Any]]:
+    """Rows of df as plain lists ready for the Sheets values API."""
+    return [[_cell_value(v) for v in row] for row in df.itertuples(index=False, name=None)]
+
+def _chunk_rows(rows: List[List[Any]], max_cells: int = MAX_WRITE_CELLS,
+                max_bytes: int = MAX_WRITE_BYTES) -> Iterator[Tuple[int, List[List[Any]]]]:
+    """
+    Split rows into (offset, chunk) pieces that each stay under max_cells and
+    under max_bytes once JSON-encoded (the en dash in every slot label alone
+    goes out as a 6-byte \\u2013 escape, so character counts undershoot).
+    """
+    start = 0
+    chunk: List[List[Any]] = []
+    cells = size = 0
+    for i, row in enumerate(rows):
+        row_cells = len(row)
+        row_size = len(json.dumps(row, default=str)) + 2
+        if chunk and (cells + row_cells > max_cells or size + row_size > max_bytes):
+            yield start, chunk
+            start, chunk, cells, size = i, [], 0, 0
+        chunk.append(row)
+        cells += row_cells
+        size += row_size
+    if chunk:
+        yield start, chunk
+
+def _cell_text(v: Any) -> str:
+    """How a written value reads back from the sheet (for change detection)."""
+    v = _cell_value(v)
+    if isinstance(v, bool):
+        return "TRUE" if v else "FALSE"
+    return str(v)
+
+def _legacy_booking_id(sheet_row: int, row: Dict[str, Any]) -> str:
+    key = f"{sheet_row}|{row.get('email', '')}|{row.get('slot', '')}|{row.get('created_at', '')}"
+    return str(uuid.uuid5(_BOOKING_ID_NS, key))
+
+def _backfill_booking_ids(sheet, values: List[List[Any]], first_row: int = 2) -> bool:
+    """
+    Give legacy rows (blank booking_id) a stable id, in place in `values` and on
+    the sheet, using one batched write. values[0] is the header; values[1] sits on
+    sheet row `first_row`. True if anything was written.
+    """
+    header = _normalize_header(values[0])
+    bid_col = header.index("booking_id")
+    data = []
+    for offset, raw in enumerate(values[1:]):
+        row = _pad_row_to_header(list(raw), header)
+        if row[bid_col] or not any(str(v).strip() for v in row):
+            continue
+        sheet_row = offset + first_row
+        row[bid_col] = _legacy_booking_id(sheet_row, dict(zip(header, row)))
+        values[offset + 1] = row
+        data.append({"range": rowcol_to_a1(sheet_row, bid_col + 1), "values": [[row[bid_col]]]})
+    if data:
+        sheet.batch_update(data)
+    return bool(data)
+
+def new_booking_id() -> str:
+    return str(uuid.uuid4())
+
+# ----------------- Storage backends -----------------
+class BookingBackend:
+    """
+    Storage engine behind the public functions below. Rows are dicts/frames using
+    the canonical columns; booking_id is the stable row key.
+    """
+    name = "base"
+
+    def header(self) -> List[str]:
+        raise NotImplementedError
+
+    def load(self) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def append(self, row_dict: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def update(self, changes: Dict[str, Dict[str, Any]]) -> int:
+        raise NotImplementedError
+
+    def overwrite(self, df: pd.DataFrame) -> int:
+        raise NotImplementedError
+
+    def load_events(self) -> List[List[str]]:
+        """Every event row (EVENT_COLS order), oldest first; position+1 is its seq."""
+        raise NotImplementedError
+
+    def append_events(self, rows: List[List[str]]) -> None:
+        raise NotImplementedError
+
+    def archive(self, term: str, df: pd.DataFrame) -> int:
+        """Add df's rows to the term's archive, skipping booking_ids already there. Returns rows added."""
+        raise NotImplementedError
+
+    def load_archive(self, term: str) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def archive_terms(self) -> List[str]:
+        raise NotImplementedError
+
+class SheetsBackend(BookingBackend):
+    """Google Sheets (first worksheet of SHEET_NAME)."""
+    name = "sheets"
+
+    def __init__(self):
+        # One backend serves every session thread: the caches below are read and
+        # patched only while holding this lock.
+        self._lock = threading.RLock()
+        # Last sheet contents we read (header first, padded to header width), kept
+        # current by our own writes. Used to address rows by booking_id, diff row
+        # updates, and load only rows appended since.
+        self._values: Optional[List[List[str]]] = None
+        self._row_of: Dict[str, int] = {}  # booking_id -> offset into _values
+        self._frame: Optional[pd.DataFrame] = None  # _values as a coerced DataFrame
+        # (SCHEMA_VERSION, header) as last seen on the sheet; saves a read per append
+        self._header_cache: Optional[Tuple[int, List[str]]] = None
+        # Event rows read so far; the events tab is append-only, so later loads
+        # fetch only rows below these.
+        self._events: Optional[List[List[str]]] = None
+        # Archive terms (tab names) as last listed; only our archive() adds tabs
+        self._terms: Optional[List[str]] = None
+        # REVISION_SHEET_NAME token as of _values, and when _values was last read in full
+        self._revision: Optional[str] = None
+        self._loaded_at = 0.0
+
+    def _header(self, sheet, values: Optional[List[List[Any]]] = None, refresh: bool = False) -> List[str]:
+        """Header from `values` if given, else cached unless stale/refresh requested."""
+        if values is not None or refresh or self._header_cache is None or self._header_cache[0] != SCHEMA_VERSION:
+            self._header_cache = (SCHEMA_VERSION, _ensure_header(sheet, values))
+        return self._header_cache[1]
+
+    def _index_rows(self, start: int = 1) -> None:
+        """Index _values[start:] by booking_id (start=1 re-indexes everything)."""
+        header = _normalize_header(self._values[0])
+        if start <= 1:
+            self._row_of = {}
+        if "booking_id" not in header:
+            return
+        bid_col = header.index("booking_id")
+        for offset in range(start, len(self._values)):
+            bid = self._values[offset][bid_col]
+            if bid:
+                self._row_of[bid] = offset
+
+    def _bump_revision(self) -> None:
+        """Tell every reader (other app instances too) that rows they hold changed."""
+        token = uuid.uuid4().hex
+        _get_sheet(REVISION_SHEET_NAME).update(values=[[token]], range_name="A1")
+        self._revision = token  # our own writes already patched _values
+
+    def _load_full(self, sheet) -> None:
+        # Token first: a write landing during the download moves it again, so the
+        # next load reloads instead of trusting rows that may predate that write
+        self._revision = _get_sheet(REVISION_SHEET_NAME).acell("A1").value or ""  # tab made on first use
+        values = sheet.get_all_values()
+        header = self._header(sheet, values)  # may append missing cols
+        if len(values) >= 2 and _backfill_booking_ids(sheet, values):
+            self._bump_revision()
+        self._values = [[str(v) for v in _pad_row_to_header(list(r), header)] for r in values]
+        self._index_rows()
+        self._frame = None
+        self._loaded_at = time.monotonic()
+        _LOAD_STATS["full"] += 1
+        _LOAD_STATS["rows_fetched"] += len(values) - 1
+
+    def _load_delta(self, sheet) -> bool:
+        """
+        Fetch only rows appended since the last read. One values_batch_get returns the
+        revision token, the header and everything below the rows we hold; returns False
+        (caller does a full reload) if the token or header moved, or the full read is
+        older than FULL_RELOAD_SECONDS.
+        """
+        if time.monotonic() - self._loaded_at > FULL_RELOAD_SECONDS:
+            return False
+        header = _normalize_header(self._values[0])
+        n = len(self._values) - 1
+        last_col = rowcol_to_a1(1, len(header)).rstrip("0123456789")
+        title = sheet.title
+        ranges = [absolute_range_name(REVISION_SHEET_NAME, "A1"), absolute_range_name(title, "1:1"),
+                  absolute_range_name(title, f"A{n + 2}:{last_col}")]
+        try:
+            res = [vr.get("values", []) for vr in _get_spreadsheet().values_batch_get(ranges)["valueRanges"]]
+        except gspread.exceptions.APIError as e:
+            if getattr(e, "code", None) != 400:
+                raise
+            return False  # revision tab deleted by hand; the full load recreates it
+
+        revision = res[0][0][0] if res[0] and res[0][0] else ""
+        if revision != self._revision:
+            return False
+        remote_header = _normalize_header(list(res[1][0])) if res[1] else []
+        if [c for c in remote_header if c] != [c for c in header if c]:
+            return False
+
+        new_rows = [[str(v) for v in _pad_row_to_header(list(r), header)] for r in res[2]]
+        while new_rows and not any(new_rows[-1]):
+            new_rows.pop()
+        if new_rows:
+            values = [self._values[0]] + new_rows
+            if _backfill_booking_ids(sheet, values, first_row=n + 2):
+                self._bump_revision()
+            self._values.extend(values[1:])
+            self._index_rows(n + 1)
+            if self._frame is not None:
+                added = _coerce_df(pd.DataFrame(values[1:], columns=header), self._header(sheet))
+                self._frame = pd.concat([self._frame, added], ignore_index=True)
+        _LOAD_STATS["delta"] += 1
+        _LOAD_STATS["rows_fetched"] += len(new_rows)
+        return True
+
+    def _refresh(self, sheet) -> None:
+        if self._values is None or not self._load_delta(sheet):
+            self._load_full(sheet)
+
+    def header(self) -> List[str]:
+        with self._lock:
+            return self._header(_get_sheet())
+
+    def load(self) -> pd.DataFrame:
+        with self._lock:
+            sheet = _get_sheet()
+            self._refresh(sheet)
+            if self._frame is None:
+                header = self._header(sheet)
+                # If legacy day/time exist but slot missing, keep both, do not overwrite slot
+                # (Your app already writes 'slot'. This just preserves old data.)
+                df = pd.DataFrame(self._values[1:], columns=_normalize_header(self._values[0]))
+                self._frame = _coerce_df(df, header)
+            return self._frame.copy()
+
+    def append(self, row_dict: Dict[str, Any]) -> None:
+        with self._lock:
+            sheet = _get_sheet()
+            header = self._header(sheet)
+            try:
+                sheet.append_row([row_dict.get(k, DEFAULTS.get(k, "")) for k in header])
+            except gspread.exceptions.APIError as e:
+                # Only a 400 (bad range/shape) is known to have written nothing; a 5xx
+                # may have landed, and re-sending would duplicate the booking row.
+                if getattr(e, "code", None) != 400:
+                    raise
+                # The sheet may have been reshaped under us: re-read the header, try once more
+                header = self._header(sheet, refresh=True)
+                sheet.append_row([row_dict.get(k, DEFAULTS.get(k, "")) for k in header])
+
+    def update(self, changes: Dict[str, Dict[str, Any]]) -> int:
+        with self._lock:
+            return self._update(changes)
+
+    def _update(self, changes: Dict[str, Dict[str, Any]]) -> int:
+        sheet = _get_sheet()
+        if self._values is None or any(bid not in self._row_of for bid in changes):
+            # Rows appended since the last load (or no load yet): catch up once
+            self._refresh(sheet)
+
+        header = _normalize_header(self._values[0])
+        data = []
+        for bid, fields in changes.items():
+            if bid not in self._row_of:
+                raise KeyError(f"Unknown booking_id: {bid!r}")
+            offset = self._row_of[bid]
+            sheet_row, current = offset + 1, self._values[offset]
+            for col, value in fields.items():
+                col = col.strip().lower()
+                if col not in header:
+                    raise KeyError(f"Unknown column: {col!r}")
+                ci = header.index(col)
+                if current[ci] == _cell_text(value):
+                    continue
+                data.append({"range": rowcol_to_a1(sheet_row, ci + 1), "values": [[_cell_value(value)]]})
+                current[ci] = _cell_text(value)
+
+        if data:
+            sheet.batch_update(data)
+            self._bump_revision()
+            self._frame = None  # rebuilt from the patched _values on next load
+        return len(data)
+
+    def overwrite(self, df: pd.DataFrame) -> int:
+        with self._lock:
+            return self._overwrite(df)
+
+    def _overwrite(self, df: pd.DataFrame) -> int:
+        sheet = _get_sheet()
+        header = self._header(sheet)
+        df = _coerce_df(df, header)
+
+        n_cols = len(header)
+        values = [header] + [_pad_row_to_header(r, header) for r in _df_to_values(df)]
+        # Blank-pad up to the minimum size so a shrink never leaves old data behind
+        target_rows = max(len(values), MIN_SHEET_ROWS)
+        values += [[""] * n_cols for _ in range(target_rows - len(values))]
+
+        # Size the grid to exactly what we write: every chunk fits, and old trailing
+        # rows/cols are dropped. (Unconditional: a cached handle's row_count can be stale.)
+        sheet.resize(rows=target_rows, cols=n_cols)
+        sent = 1
+
+        for offset, chunk in _chunk_rows(values):
+            first_row = offset + 1
+            last_cell = rowcol_to_a1(first_row + len(chunk) - 1, n_cols)
+            sheet.update(values=chunk, range_name=f"A{first_row}:{last_cell}")
+            sent += 1
+
+        self._bump_revision()
+        self._values = None  # row positions changed; next load/update re-reads in full
+        self._frame = None
+        return sent
+
+    def load_events(self) -> List[List[str]]:
+        # Under the lock: two readers would both fetch below the cached rows and
+        # both extend _events, skewing every later incremental read.
+        with self._lock:
+            return self._load_events()
+
+    def _load_events(self) -> List[List[str]]:
+        sheet = _get_sheet(EVENTS_SHEET_NAME)
+        if self._events is None:
+            values = sheet.get_all_values()
+            if not values:
+                sheet.update(values=[EVENT_COLS], range_name=f"A1:{rowcol_to_a1(1, len(EVENT_COLS))}")
+                values = [EVENT_COLS]
+            rows = values[1:]
+            self._events = []
+        else:
+            last_col = rowcol_to_a1(1, len(EVENT_COLS)).rstrip("0123456789")
+            rows = sheet.get(f"A{len(self._events) + 2}:{last_col}")
+        new = [[str(v) for v in _pad_row_to_header(list(r), EVENT_COLS)] for r in rows]
+        while new and not any(new[-1]):
+            new.pop()
+        self._events.extend(new)
+        return list(self._events)
+
+    def append_events(self, rows: List[List[str]]) -> None:
+        with self._lock:
+            if self._events is None:
+                self._load_events()  # creates the tab + header on first use
+            _get_sheet(EVENTS_SHEET_NAME).append_rows(rows)
+
+    def archive(self, term: str, df: pd.DataFrame) -> int:
+        # Under the lock: two sessions would both create the tab or both pass the
+        # already-archived check and append the same rows twice.
+        with self._lock:
+            sheet = _get_sheet(ARCHIVE_PREFIX + term)  # created on first use
+            values = sheet.get_all_values()
+            if not values:
+                header = list(df.columns)
+                sheet.update(values=[header], range_name=f"A1:{rowcol_to_a1(1, len(header))}")
+            else:
+                header = _normalize_header(values[0])
+            done = {r[header.index("booking_id")] for r in values[1:]} if "booking_id" in header else set()
+            df = _coerce_df(df[~df["booking_id"].isin(done)], header)
+            rows = [[_cell_text(v) for v in r] for r in df.itertuples(index=False, name=None)]
+            if rows:
+                sheet.append_rows(rows)
+            if self._terms is not None and term not in self._terms:
+                self._terms.append(term)
+            return len(rows)
+
+    def load_archive(self, term: str) -> pd.DataFrame:
+        if term not in self.archive_terms():
+            return pd.DataFrame(columns=self.header())
+        values = _get_sheet(ARCHIVE_PREFIX + term).get_all_values()
+        if not values:
+            return pd.DataFrame(columns=self.header())
+        header = _normalize_header(values[0])
+        rows = [_pad_row_to_header(list(r), header) for r in values[1:]]
+        return _coerce_df(pd.DataFrame(rows, columns=header), header)
+
+    def archive_terms(self) -> List[str]:
+        with self._lock:
+            if self._terms is None:
+                self._terms = [t[len(ARCHIVE_PREFIX):] for t in _worksheet_titles() if t.startswith(ARCHIVE_PREFIX)]
+            return list(self._terms)
+
+def _make_backend(kind: str) -> BookingBackend:
+    kind = (kind or "sheets").strip().lower()
+    if kind == "sheets":
+        return SheetsBackend()
+    if kind == "sqlite":
+        from bookings_sqlite import SQLiteBackend  # lazy: only needed when selected
+        return SQLiteBackend(_setting(SQLITE_PATH_SETTING, DEFAULT_SQLITE_PATH))
+    raise ValueError(f"Unknown {BACKEND_SETTING}: {kind!r} (expected 'sheets' or 'sqlite')")
+
+def _get_backend() -> BookingBackend:
+    """Process-wide backend chosen by the BOOKINGS_BACKEND setting."""
+    global _BACKEND
+    with _BACKEND_LOCK:
+        if _BACKEND is None:
+            _BACKEND = _make_backend(_setting(BACKEND_SETTING, "sheets"))
+        return _BACKEND
+
+def backend_name() -> str:
+    return _get_backend().name
+
+def _write_behind_enabled() -> bool:
+    return str(_setting(WRITE_BEHIND_SETTING, "false")).strip().lower() in ("1", "true", "yes", "on")
+
+def _get_journal():
+    """Process-wide write-behind journal, or None when writes go straight to the backend."""
+    global _JOURNAL
+    if not (_write_behind_enabled() and _event_log_enabled()):
+        return None
+    with _BACKEND_LOCK:
+        if _JOURNAL is None:
+            from bookings_journal import WriteBehindJournal  # lazy: starts the flush thread
+            _JOURNAL = WriteBehindJournal(_setting(JOURNAL_PATH_SETTING, DEFAULT_JOURNAL_PATH))
+        return _JOURNAL
+
+def write_behind_stats() -> Dict[str, Any]:
+    """Journal counters (queued, pending, flushes, failures, ...); empty when off."""
+    journal = _get_journal()
+    return journal.stats() if journal else {}
+
+# ----------------- Event log -----------------
+def _event_log_enabled() -> bool:
+    return str(_setting(EVENT_LOG_SETTING, "true")).strip().lower() not in ("0", "false", "no", "off")
+
+def _make_event(kind: str, booking_id: str, fields: Dict[str, Any]) -> List[str]:
+    """One event row; field values are stored as text exactly like sheet cells."""
+    clean = {k.strip().lower(): _cell_text(v) for k, v in fields.items()}
+    return [
+        str(uuid.uuid4()),
+        kind,
+        booking_id,
+        json.dumps(clean, ensure_ascii=False, sort_keys=True),
+        datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    ]
+
+def _change_kind(fields: Dict[str, Any]) -> str:
+    if str(fields.get("status", "")).strip().lower() == STATUS_CANCELED:
+        return EVENT_CANCELED
+    if "grade" in fields or "graded_by" in fields:
+        return EVENT_GRADED
+    return EVENT_UPDATED
+
+def _pending_events(rows: List[List[str]]) -> List[List[str]]:
+    """Events not yet in the snapshot: those after the newest marker's through-seq."""
+    through = 0
+    for row in reversed(rows):
+        if row[1] == EVENT_COMPACTED:
+            through = int(json.loads(row[3] or "{}").get("through", 0))
+            break
+    return [r for r in rows[through:] if r[1] != EVENT_COMPACTED]
+
+def fold_events(snapshot: pd.DataFrame, events: List[List[str]]) -> pd.DataFrame:
+    """
+    Current state = snapshot with events applied in log order.
+    - "booked" adds a row (or refreshes it if the snapshot already holds that
+      booking_id, so replaying events after a crashed compaction is harmless).
+    - Every other event overwrites just the fields it carries on its booking.
+    One pass collapses events per booking; the frame is then patched once per booking.
+    """
+    known = set(snapshot["booking_id"]) if "booking_id" in snapshot.columns else set()
+    new_rows: Dict[str, Dict[str, Any]] = {}
+    patches: Dict[str, Dict[str, Any]] = {}
+    for _, kind, bid, fields_json, _ in events:
+        fields = json.loads(fields_json) if fields_json else {}
+        if bid in new_rows:
+            new_rows[bid].update(fields)
+        elif kind == EVENT_BOOKED and bid not in known:
+            new_rows[bid] = {**fields, "booking_id": bid}
+        else:
+            patches.setdefault(bid, {}).update(fields)
+
+    df = snapshot
+    if patches:
+        df = df.copy()
+        pos = {bid: i for i, bid in enumerate(df["booking_id"])}
+        col_pos = {c: i for i, c in enumerate(df.columns)}
+        for bid, fields in patches.items():
+            i = pos.get(bid)
+            if i is None:
+                continue  # booking no longer in the snapshot (e.g. archived)
+            for c, v in fields.items():
+                if c in col_pos:  # extra audit fields (rescheduled_to, ...) aren't columns
+                    df.iat[i, col_pos[c]] = _coerce_bool(v) if c == "dsps" else v
+    if new_rows:
+        header = list(df.columns)
+        added = _coerce_df(pd.DataFrame(list(new_rows.values())), header)
+        df = added if df.empty else pd.concat([df, added], ignore_index=True)
+    return df
+
+def _fold_backend(backend: BookingBackend) -> Tuple[pd.DataFrame, int, int]:
+    """
+    (current state, events in the log, events pending compaction).
+    Write-behind: writes still in the journal are folded in too.
+    """
+    # The journal only holds writes bound for the configured backend
+    journal = _get_journal() if backend is _get_backend() else None
+    queued_snapshot, queued = journal.overlay() if journal else (None, [])
+    if queued_snapshot is not None:
+        # A queued overwrite replaces everything stored; only later writes apply
+        return fold_events(queued_snapshot, queued), 0, 0
+    snapshot = backend.load()
+    if not _event_log_enabled():
+        return snapshot, 0, 0
+    events = backend.load_events()
+    pending = _pending_events(events)
+    if queued:
+        logged = {r[0] for r in events}
+        pending += [r for r in queued if r[0] not in logged]
+    return fold_events(snapshot, pending), len(events), len(pending)
+
+def _remember_state(df: pd.DataFrame, changed: Optional[Iterable[str]] = None) -> None:
+    """
+    Remember df as the current state. `changed`: the booking_ids our own write
+    just touched (state patched, not loaded), so only their index entries move.
+    """
+    with _STATE_LOCK:
+        _STATE["frame"] = df
+        _STATE["version"] += 1
+        _STATE["pos"] = {bid: i for i, bid in enumerate(df["booking_id"])} if "booking_id" in df.columns else {}
+        if changed is None or _STATE["students"] is None:
+            _STATE["students"] = StudentIndex(df)
+        else:
+            _STATE["students"].update(df, _STATE["pos"], changed)
+        if changed is None:
+            _STATE["loaded_at"] = time.monotonic()
+
+def _apply_to_state(events: List[List[str]]) -> None:
+    """
+    Write-through: fold our own just-written changes into the remembered state.
+    Direct-write mode passes the equivalent events without appending them anywhere.
+    """
+    with _STATE_LOCK:
+        if _STATE["frame"] is not None:
+            _remember_state(fold_events(_STATE["frame"], events), changed={e[2] for e in events})
+
+def _write_snapshot(backend: BookingBackend, df: pd.DataFrame, through: Optional[int] = None) -> int:
+    """
+    Overwrite the snapshot with df. In event-log mode, then append a "compacted"
+    marker so events up to `through` (default: all so far) aren't applied again.
+    """
+    log = _event_log_enabled()
+    if log and through is None:
+        through = len(backend.load_events())
+    sent = backend.overwrite(df)
+    if log:
+        backend.append_events([_make_event(EVENT_COMPACTED, "", {"through": through})])
+        sent += 1
+    return sent
+
+def _append_events(events: List[List[str]]) -> None:
+    journal = _get_journal()
+    if journal:
+        journal.enqueue_events(events)
+    else:
+        _get_backend().append_events(events)
+    _apply_to_state(events)
+
+def _journal_drained() -> bool:
+    """True once no journaled write is waiting (always True without write-behind)."""
+    journal = _get_journal()
+    return journal is None or journal.drain(DRAIN_TIMEOUT_SECONDS)
+
+# ---- Per-student index ----
+# The one-appointment-per-week rule asks "what does this student already hold
+# for this exam, by week?" on every booking. The index answers that from the
+# remembered state: built once per load, patched by _apply_to_state().
+class StudentBooking(NamedTuple):
+    booking_id: str
+    group_id: str
+    slot_date: date
+
+class StudentIndex:
+    """
+    Active bookings by (email, exam_number) -> {ISO week: {booking_id: StudentBooking}}.
+    Group members (a DSPS pair) share the student, exam and day, so a week's
+    entry always holds whole groups. Rows whose slot doesn't parse are left out.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._weeks: Dict[Tuple[str, str], Dict[int, Dict[str, StudentBooking]]] = {}
+        self._where: Dict[str, Tuple[Tuple[str, str], int]] = {}
+        self._add(df)
+
+    def _add(self, df: pd.DataFrame) -> None:
+        cols = ["booking_id", "email", "exam_number", "group_id", "slot"]
+        if df.empty or not set(cols + ["status"]) <= set(df.columns):
+            return
+        rows = df.loc[_is_active(df["status"]), cols].fillna("").astype(str)
+        starts = parse_slot_series(rows["slot"])["start"]
+        rows = rows[starts.notna()]
+        starts = starts[starts.notna()]
+        weeks = starts.dt.isocalendar().week
+        for bid, email, exam, gid, week, start in zip(rows["booking_id"], rows["email"], rows["exam_number"],
+                                                      rows["group_id"], weeks, starts):
+            key = (email, exam)
+            self._weeks.setdefault(key, {}).setdefault(int(week), {})[bid] = StudentBooking(bid, gid, start.date())
+            self._where[bid] = (key, int(week))
+
+    def _drop(self, booking_id: str) -> None:
+        where = self._where.pop(booking_id, None)
+        if where is None:
+            return
+        key, week = where
+        weeks = self._weeks[key]
+        weeks[week].pop(booking_id, None)
+        if not weeks[week]:
+            del weeks[week]
+        if not weeks:
+            del self._weeks[key]
+
+    def update(self, df: pd.DataFrame, pos: Dict[str, int], booking_ids: Iterable[str]) -> None:
+        """Re-index just these bookings from df (booked, canceled, moved or regraded)."""
+        rows = []
+        for bid in booking_ids:
+            self._drop(bid)
+            if bid in pos:
+                rows.append(pos[bid])
+        if rows:
+            self._add(df.iloc[rows])
+
+    def weeks(self, email: str, exam_number: str) -> Dict[int, List[StudentBooking]]:
+        return {week: list(by_id.values()) for week, by_id in self._weeks.get((email, exam_number), {}).items()}
+
+def student_weeks(email: str, exam_number: str) -> Dict[int, List[StudentBooking]]:
+    """
+    This student's active bookings for this exam, keyed by ISO week (see
+    StudentIndex), as of the latest state, including our own writes.
+    """
+    with _STATE_LOCK:
+        _current_state()
+        return _STATE["students"].weeks(email, exam_number)
+
+# ----------------- Public API -----------------
+@st.cache_data(ttl=CACHE_TTL_SECONDS)
+def load_bookings() -> pd.DataFrame:
+    """
+    Loads every booking into a DataFrame from the configured backend.
+    - Ensures header includes REQUIRED_COLS (appends them if missing).
+    - Preserves legacy columns (day, time, timestamp) if present.
+    - Event-log mode: folds pending events onto the snapshot, compacting once
+      COMPACT_EVERY events are pending.
+    - After one of our own writes (cache cleared, state patched in place) the
+      remembered state is served as-is while it's younger than CACHE_TTL_SECONDS.
+    - Returns the typed frame (see typed_bookings): stored columns in header
+      order, then DERIVED_COLS; see data_version().
+    """
+    with _STATE_LOCK:
+        if _STATE["frame"] is not None and time.monotonic() - _STATE["loaded_at"] < CACHE_TTL_SECONDS:
+            _LOAD_STATS["memory"] += 1
+            return _typed_state()
+    backend = _get_backend()
+    df, seq, pending = _fold_backend(backend)
+    journal = _get_journal()
+    if (pending >= COMPACT_EVERY and not (journal and journal.pending_count())
+            and _COMPACT_LOCK.acquire(blocking=False)):
+        try:
+            _write_snapshot(backend, df, through=seq)
+        finally:
+            _COMPACT_LOCK.release()
+    with _STATE_LOCK:
+        _remember_state(df)
+        return _typed_state()
+
+def _typed_state() -> pd.DataFrame:
+    """typed_bookings() of the remembered state; attrs["data_version"] names that state."""
+    df = typed_bookings(_STATE["frame"])
+    df.attrs["data_version"] = _STATE["version"]
+    return df
+
+def data_version(df: pd.DataFrame) -> Optional[int]:
+    """
+    The state version a load_bookings() frame was built from (None if it carries
+    none). Equal versions mean equal contents, so derived files can be cached by it.
+    Pandas copies attrs onto slices and copies (masks, iloc, .copy()), so a frame
+    derived from a loaded one reports the same version: read it off the loaded
+    frame and pass it along, never off a derived frame.
+    """
+    return df.attrs.get("data_version")
+
+def _current_state(refresh: bool = False) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """(folded state, booking_id -> row position), loading it if we have none."""
+    with _STATE_LOCK:
+        if refresh or _STATE["frame"] is None:
+            _remember_state(_fold_backend(_get_backend())[0])
+        return _STATE["frame"], _STATE["pos"]
+
+def append_booking(row: List[Any]) -> None:
+    """
+    Append a row (list).
+    - Pads/truncates to header length.
+    - Assumes the row is already in the intended order (prefer REQUIRED_COLS order).
+    """
+    header = _get_backend().header()
+    append_booking_dict(dict(zip(header, _pad_row_to_header(list(row), header))))
+
+def append_booking_dict(row_dict: Dict[str, Any]) -> str:
+    """
+    Append a row from a dict (keys can be a subset/superset of header).
+    Missing keys are defaulted; extra keys are ignored.
+    Returns the row's booking_id (generated if the dict has none).
+    """
+    return append_booking_dicts([row_dict])[0]
+
+def append_booking_dicts(rows: List[Dict[str, Any]]) -> List[str]:
+    """Append several bookings (e.g. a DSPS pair) in one write. Returns their booking_ids."""
+    return reschedule_bookings([], rows)
+
+def _with_ids(new_rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    rows = []
+    for r in new_rows:
+        r = dict(r)
+        r["booking_id"] = r.get("booking_id") or new_booking_id()
+        rows.append(r)
+    # Rows built from a label only: store the slot_id next to it
+    for r, sid in zip(rows, _slot_ids(pd.DataFrame(rows)) if rows else []):
+        if _cell_text(r.get("slot_id", "")) == "" and not pd.isna(sid):
+            r["slot_id"] = int(sid)
+    return rows
+
+def _write_bookings(cancel_ids: List[str], rows: List[Dict[str, Any]], at: str,
+                    moved_to: List[str], direct: bool = False) -> None:
+    """
+    Cancel `cancel_ids` (as moved to `moved_to`) and add `rows` in one write.
+    direct=True bypasses the write-behind journal (the caller must read it back);
+    raises WritesPendingError, writing nothing, if queued writes won't drain first.
+    """
+    cancel = {"status": STATUS_CANCELED, "updated_at": at}
+    if _event_log_enabled():
+        events = [
+            _make_event(EVENT_RESCHEDULED, bid, {**cancel, "rescheduled_to": ",".join(moved_to)})
+            for bid in cancel_ids
+        ] + [_make_event(EVENT_BOOKED, r["booking_id"], r) for r in rows]
+        if direct and _get_journal():
+            # Keep log order: queued writes first, or none of ours at all
+            if not _journal_drained():
+                raise WritesPendingError()
+            _get_backend().append_events(events)
+            _apply_to_state(events)
+        else:
+            _append_events(events)
+    else:
+        backend = _get_backend()
+        if cancel_ids:
+            backend.update({bid: dict(cancel) for bid in cancel_ids})
+        for r in rows:
+            backend.append(r)
+        _apply_to_state([_make_event(EVENT_CANCELED, bid, cancel) for bid in cancel_ids]
+                        + [_make_event(EVENT_BOOKED, r["booking_id"], r) for r in rows])
+    _clear_cache()
+
+def reschedule_bookings(cancel_ids: List[str], new_rows: List[Dict[str, Any]],
+                        at: Optional[str] = None) -> List[str]:
+    """
+    Cancel `cancel_ids` and add `new_rows` as one action. In event-log mode that is a
+    single append ("rescheduled" + "booked" events). Returns the new booking_ids.
+    Doesn't check availability; use claim_slots() for student-facing bookings.
+    """
+    rows = _with_ids(new_rows)
+    ids = [r["booking_id"] for r in rows]
+    if cancel_ids or rows:
+        at = at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        _write_bookings(cancel_ids, rows, at, moved_to=ids)
+    return ids
+
+def _is_active(status: pd.Series) -> pd.Series:
+    # blank/NA status counts as booked (legacy rows)
+    return status.isna() | status.astype(str).str.strip().str.lower().isin(["", STATUS_BOOKED])
+
+def _slot_ids(df: pd.DataFrame, bounds: Optional[pd.DataFrame] = None) -> pd.Series:
+    """
+    slot_id per row (Int64): the stored id, else derived from the slot label and
+    lab_location (legacy rows); <NA> when the label doesn't parse. `bounds` is
+    parse_slot_series(df["slot"]) when the caller already has it.
+    """
+    stored = pd.to_numeric(df["slot_id"], errors="coerce") if "slot_id" in df.columns \
+        else pd.Series(float("nan"), index=df.index)
+    missing = stored.isna()
+    if missing.any() and "slot" in df.columns:
+        b = (bounds if bounds is not None else parse_slot_series(df["slot"]))[missing]
+        minute = pd.Timedelta(minutes=1)
+        codes = df.loc[missing, "lab_location"].astype(object).map(LOCATION_CODES).fillna(0) \
+            if "lab_location" in df.columns else 0
+        stored[missing] = slot_id(codes, (b["start"] - EPOCH) // minute, (b["end"] - b["start"]) // minute)
+    return stored.astype("Int64")
+
+def _slot_keys(df: pd.DataFrame) -> pd.Series:
+    """What two bookings must share to collide: slot_id, or the label when there is none."""
+    ids = _slot_ids(df)
+    return ids.astype(object).where(ids.notna(), df["slot"])
+
+def _key_capacity(key: Any) -> int:
+    """Capacity for a _slot_keys() value: schedule capacity by slot_id; label-only slots hold one."""
+    return slot_capacity(key) if isinstance(key, (int, np.integer)) else 1
+
+def _slot_conflicts(state: pd.DataFrame, ids: List[str], ignore: List[str]) -> List[str]:
+    """
+    Slots of bookings `ids` that didn't make it within their slot's capacity
+    (same slot_id, i.e. same time at the same location). Storage order decides
+    who is in: sheet/table row order, then event-log order for folded bookings,
+    so every reader picks the same winners. Bookings in `ignore` (about to be
+    canceled by this claim) don't count.
+    """
+    active = state[_is_active(state["status"]) & ~state["booking_id"].isin(ignore)]
+    keys = _slot_keys(active)
+    mine = active["booking_id"].isin(ids)
+    # Only the claimed slots matter: rank and look up capacity for those alone,
+    # so the check costs a schedule lookup per claimed slot, not per booked one
+    contested = keys.isin(set(keys[mine]))
+    active, keys, mine = active[contested], keys[contested], mine[contested]
+    rank = active.groupby(keys, sort=False, dropna=False).cumcount()
+    capacity = keys.map({k: _key_capacity(k) for k in keys[mine].unique()})
+    lost = mine & (rank >= capacity)
+    return active.loc[lost, "slot"].tolist()
+
+def claim_slots(cancel_ids: List[str], new_rows: List[Dict[str, Any]],
+                at: Optional[str] = None) -> List[str]:
+    """
+    reschedule_bookings() that checks availability: books new_rows' slots (one
+    slot, or a DSPS pair) only if all of them have room, then cancels `cancel_ids`
+    (the booking being rescheduled, may be empty). All or nothing:
+    raises SlotTakenError and leaves no active booking behind when any slot is full.
+    Raises WritesPendingError (nothing written) if the write-behind journal can't
+    drain first.
+    - Checks the last loaded state first (no write when a slot is visibly full).
+    - Append-then-verify: the bookings are written, the store is read back, and
+      the claim stands only if each of its bookings is among the first `capacity`
+      active ones on its slot (slots.slot_capacity; by slot_id, so the same time
+      at another location doesn't collide). Two racing submits see the same order, so exactly one wins; the
+      loser cancels its own rows.
+    - Safe to serve availability from a stale cache: contention is settled here.
+    Returns the new booking_ids.
+    """
+    cancel_ids = list(cancel_ids)
+    rows = _with_ids(new_rows)
+    ids = [r["booking_id"] for r in rows]
+    at = at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    state, _ = _current_state()
+    active = state[_is_active(state["status"]) & ~state["booking_id"].isin(cancel_ids)]
+    booked = _slot_keys(active).value_counts(dropna=False)
+    taken = [slot for slot, key in zip([r["slot"] for r in rows], _slot_keys(pd.DataFrame(rows)))
+             if booked.get(key, 0) >= _key_capacity(key)]
+    if taken:
+        _clear_cache()  # the caller's availability was stale
+        raise SlotTakenError(taken)
+
+    _write_bookings([], rows, at, moved_to=[], direct=True)
+    state, _ = _current_state(refresh=True)
+    lost = _slot_conflicts(state, ids, cancel_ids)
+    if lost:
+        update_bookings({bid: {"status": STATUS_CANCELED, "updated_at": at} for bid in ids})
+        raise SlotTakenError(lost)
+    if cancel_ids:
+        _write_bookings(cancel_ids, [], at, moved_to=ids)
+    return ids
+
+def _changed_since(state: pd.DataFrame, pos: Dict[str, int],
+                   expected: Dict[str, Dict[str, Any]]) -> List[str]:
+    """booking_ids whose current fields no longer match `expected` (or that are gone)."""
+    changed = []
+    for bid, fields in expected.items():
+        i = pos.get(bid)
+        if i is None or any(_cell_text(state.iloc[i].get(c, "")) != _cell_text(v) for c, v in fields.items()):
+            changed.append(bid)
+    return changed
+
+def _change_events(state: pd.DataFrame, pos: Dict[str, int],
+                   changes: Dict[str, Dict[str, Any]]) -> Tuple[List[List[str]], int]:
+    """(events for the fields that differ from state, number of fields written)."""
+    events = []
+    written = 0
+    for bid, fields in changes.items():
+        i = pos.get(bid)
+        if i is None:
+            raise KeyError(f"Unknown booking_id: {bid!r}")
+        current = state.iloc[i]
+        diff = {}
+        for col, value in fields.items():
+            col = col.strip().lower()
+            if col not in state.columns:
+                raise KeyError(f"Unknown column: {col!r}")
+            if _cell_text(current[col]) != _cell_text(value):
+                diff[col] = value
+        if diff:
+            events.append(_make_event(_change_kind(diff), bid, diff))
+            written += len(diff)
+    return events, written
+
+def update_bookings(changes: Dict[str, Dict[str, Any]],
+                    expected: Optional[Dict[str, Dict[str, Any]]] = None) -> int:
+    """
+    Row-addressed update: {booking_id: {column: new_value, ...}, ...}.
+    - Only fields that differ from the current state are written, in one batch
+      (event-log mode: one append of canceled/graded/updated events).
+    - `expected`: {booking_id: {column: value the caller read}} (e.g. updated_at).
+      If any of those bookings changed since, BookingConflictError lists them and
+      nothing is left written (see _update_verified). Direct-write mode has no log
+      to order writers by, so there it is a check of the re-read state only.
+    - Raises KeyError for an unknown booking_id or column.
+    Returns the number of fields written.
+    """
+    if not changes:
+        return 0
+    if expected and _event_log_enabled():
+        return _update_verified(changes, expected)
+    if expected:
+        state, pos = _current_state(refresh=True)
+        changed = _changed_since(state, pos, expected)
+        if changed:
+            raise BookingConflictError(changed)
+    if not _event_log_enabled():
+        written = _get_backend().update(changes)
+        if written:
+            _apply_to_state([_make_event(_change_kind(f), bid, f) for bid, f in changes.items()])
+            _clear_cache()
+        return written
+
+    state, pos = _current_state()
+    if any(bid not in pos for bid in changes):
+        state, pos = _current_state(refresh=True)  # booked since our last load
+    events, written = _change_events(state, pos, changes)
+    if events:
+        _append_events(events)
+        _clear_cache()
+    return written
+
+def _update_verified(changes: Dict[str, Dict[str, Any]], expected: Dict[str, Dict[str, Any]]) -> int:
+    """
+    update_bookings(expected=...) in event-log mode, append-then-verify like
+    claim_slots(): check the re-read state, append straight to the log, then read
+    the log back. If another event for one of these bookings landed after our read
+    and before our append, that writer got there first: our events are undone
+    (a compensating event restores what they overwrote, except fields written
+    again after ours) and BookingConflictError lists the contested bookings.
+    Raises WritesPendingError (nothing written) if the write-behind journal can't drain first.
+    """
+    backend = _get_backend()
+    if _get_journal() and not _journal_drained():
+        raise WritesPendingError()
+    seen = len(backend.load_events())  # read position; anything after it is news to us
+    state, pos = _current_state(refresh=True)
+    changed = _changed_since(state, pos, expected)
+    if changed:
+        raise BookingConflictError(changed)
+    events, written = _change_events(state, pos, changes)
+    if not events:
+        return 0
+    backend.append_events(events)
+    _apply_to_state(events)
+    _clear_cache()
+
+    rows = backend.load_events()
+    ours = {e[0] for e in events}
+    first = next(i for i, r in enumerate(rows) if r[0] in ours)
+    touched = {e[2] for e in events}
+    raced = sorted({r[2] for r in rows[seen:first] if r[2] in touched})
+    if not raced:
+        return written
+
+    undo = []
+    for _, _, bid, fields_json, _ in events:
+        current = state.iloc[pos[bid]]
+        restore = {c: current[c] for c in json.loads(fields_json)}
+        for _, _, other, other_json, _ in rows[seen:first]:
+            if other == bid:
+                restore.update((c, v) for c, v in json.loads(other_json or "{}").items() if c in restore)
+        for event_id, _, other, other_json, _ in rows[first:]:
+            if other == bid and event_id not in ours:
+                for c in json.loads(other_json or "{}"):
+                    restore.pop(c, None)
+        if restore:
+            undo.append(_make_event(_change_kind(restore), bid, restore))
+    if undo:
+        backend.append_events(undo)
+        _apply_to_state(undo)
+        _clear_cache()
+    raise BookingConflictError(raced)
+
+def diff_bookings(before: pd.DataFrame, after: pd.DataFrame,
+                  columns: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Changes between two frames with the same index, in update_bookings() form.
+    Only `columns` (default: every shared column except booking_id) are compared.
+    """
+    cols = columns or [c for c in after.columns if c in before.columns and c != "booking_id"]
+    changes: Dict[str, Dict[str, Any]] = {}
+    for idx in after.index.intersection(before.index):
+        bid = after.at[idx, "booking_id"]
+        for c in cols:
+            new, old = after.at[idx, c], before.at[idx, c]
+            if _cell_text(new) != _cell_text(old):
+                changes.setdefault(bid, {})[c] = new
+    return changes
+
+def overwrite_bookings(df: pd.DataFrame) -> int:
+    """
+    Replace all stored bookings with df.
+    - Ensures the header includes REQUIRED_COLS (appending if needed).
+    - Reindexes df to match the stored header (includes legacy cols if present);
+      a typed frame from load_bookings() is accepted (derived columns are dropped).
+    - On Sheets: writes header + rows as a few chunked range updates (not one request
+      per row), then resizes the sheet to exactly that grid so no stale rows/cols survive.
+    - Event-log mode: df becomes the snapshot and every event so far is marked folded.
+    - Write-behind: the snapshot is journaled and written by the flush thread.
+    Returns the number of write requests sent (statements for SQLite; 0 when queued).
+    """
+    df = _storage_frame(df)
+    # Normalize incoming columns
+    df.columns = _normalize_header(list(df.columns))
+    journal = _get_journal()
+    if journal:
+        journal.enqueue_snapshot(df)
+        sent = 0
+    else:
+        sent = _write_snapshot(_get_backend(), df)
+    _forget_state()
+    return sent
+
+def compact_bookings() -> int:
+    """
+    Fold pending events into a fresh snapshot now (also runs automatically once
+    COMPACT_EVERY events are pending). Returns the number of events folded.
+    """
+    if not _event_log_enabled() or not _journal_drained():
+        return 0
+    backend = _get_backend()
+    with _COMPACT_LOCK:
+        df, seq, pending = _fold_backend(backend)
+        if pending:
+            _write_snapshot(backend, df, through=seq)
+    _clear_cache()
+    return pending
+
+def load_booking_events(limit: Optional[int] = None) -> pd.DataFrame:
+    """The event log (audit trail), newest first; `limit` keeps only the latest N."""
+    rows = _get_backend().load_events() if _event_log_enabled() else []
+    if limit is not None:
+        rows = rows[-limit:]
+    return pd.DataFrame(rows[::-1], columns=EVENT_COLS)
+
+def sync_bookings_to_sheets() -> int:
+    """
+    Export the configured backend's bookings to Google Sheets (batched overwrite).
+    A no-op when Sheets is already the primary store. Returns requests sent.
+    """
+    backend = _get_backend()
+    if isinstance(backend, SheetsBackend):
+        return 0
+    return _write_snapshot(SheetsBackend(), _fold_backend(backend)[0])
+
+def import_bookings_from_sheets() -> int:
+    """Seed the configured (local) backend from Google Sheets. Returns rows imported."""
+    backend = _get_backend()
+    if isinstance(backend, SheetsBackend) or not _journal_drained():
+        return 0
+    df = _fold_backend(SheetsBackend())[0]
+    _write_snapshot(backend, df)
+    _forget_state()
+    return len(df)
+
+def term_of(when: datetime) -> str:
+    """Term key for a date, e.g. "2025-fall"."""
+    season = next(name for name, months in TERM_MONTHS if when.month in months)
+    return f"{when.year}-{season}"
+
+def _term_key(term: str) -> Tuple[int, int]:
+    year, _, season = term.partition("-")
+    order = [name for name, _ in TERM_MONTHS]
+    return (int(year) if year.isdigit() else 0, order.index(season) if season in order else len(order))
+
+def typed_bookings(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Stored (all-text) bookings → the frame the UI works with:
+    - blanks instead of NaN in text columns; dsps as bool
+    - categoricals for CATEGORY_COLS ("", booked and canceled are always status categories)
+    - slot_start/slot_end (datetime64, NaT if unparseable), slot_week (ISO week)
+      and slot_date (midnight of slot_start)
+    - slot_id as Int64, derived from slot + lab_location where not stored
+    """
+    df = df.copy()
+    text = [c for c in df.columns if c != "dsps"]
+    df[text] = df[text].fillna("").astype(str)
+    if "dsps" in df.columns:
+        df["dsps"] = df["dsps"].map(_cell_text).str.strip().str.lower().isin(["true", "1", "yes"])
+    for c in CATEGORY_COLS:
+        if c in df.columns:
+            extra = {"", STATUS_BOOKED, STATUS_CANCELED} if c == "status" else {""}
+            df[c] = pd.Categorical(df[c], categories=sorted(set(df[c]) | extra))
+    slots = df["slot"] if "slot" in df.columns else pd.Series("", index=df.index)
+    bounds = parse_slot_series(slots)
+    df["slot_start"] = bounds["start"]
+    df["slot_end"] = bounds["end"]
+    df["slot_week"] = df["slot_start"].dt.isocalendar().week
+    df["slot_date"] = df["slot_start"].dt.normalize()
+    df["slot_id"] = _slot_ids(df, bounds)
+    return df
+
+def _storage_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Undo typed_bookings() for writing: drop derived columns, plain values again."""
+    df = df.drop(columns=DERIVED_COLS, errors="ignore")
+    return df.astype({c: object for c in CATEGORY_COLS if c in df.columns})
+
+def archive_bookings(now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Move bookings whose slot is past (before `now`, naive local time) and that are
+    canceled or graded into their term's archive, then rewrite the hot store
+    without them. Returns {term: rows archived}.
+    - Archive appends skip booking_ids already archived, so re-running after an
+      interruption doesn't duplicate rows.
+    - Past bookings still awaiting a grade stay in the hot store.
+    """
+    if not _journal_drained():
+        return {}
+    now = now or datetime.now()
+    backend = _get_backend()
+    moved: Dict[str, int] = {}
+    with _COMPACT_LOCK:
+        df, seq, _ = _fold_backend(backend)
+        starts = parse_slot_series(df["slot"])["start"]
+        past = starts < pd.Timestamp(now)  # NaT (unparseable slot) stays in the hot store
+        done = (df["status"].map(_cell_text).str.strip().str.lower() == STATUS_CANCELED) | \
+               (df["grade"].map(_cell_text).str.strip() != "")
+        mask = past & done
+        if not mask.any():
+            return moved
+        terms = starts[mask].map(term_of)
+        for term, part in df[mask].groupby(terms, sort=True):
+            moved[term] = backend.archive(term, part)
+        _write_snapshot(backend, df[~mask].reset_index(drop=True), through=seq)
+    _forget_state()
+    return moved
+
+def archived_terms() -> List[str]:
+    """Terms that have an archive, oldest first."""
+    return sorted(_get_backend().archive_terms(), key=_term_key)
+
+def load_archived_bookings(term: Optional[str] = None) -> pd.DataFrame:
+    """Archived bookings for one term (default: every term). Never on the hot path."""
+    backend = _get_backend()
+    terms = [term] if term else sorted(backend.archive_terms(), key=_term_key)
+    frames = [backend.load_archive(t).assign(term=t) for t in terms]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=backend.header())
@@ -0,0 +1,190 @@
+# bookings_journal.py — write-behind queue for booking mutations (BOOKINGS_WRITE_BEHIND=true)
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from bookings import (
+    _REQUEST_CONTEXT,
+    _cell_text,
+    _coerce_df,
+    _get_backend,
+    _write_snapshot,
+)
+
+OP_EVENTS = "events"
+OP_SNAPSHOT = "snapshot"
+
+# Wait this long after the first queued write so a burst of submits shares one request
+COALESCE_SECONDS = 0.5
+# Backoff between failed flushes: RETRY_BASE_SECONDS * 2**n, capped
+RETRY_BASE_SECONDS = 2.0
+RETRY_MAX_SECONDS = 60.0
+
+class WriteBehindJournal:
+    """
+    Mutations land in a local JSONL journal (fsync'd) and return immediately; a
+    daemon thread flushes them to the backend in order.
+    - Consecutive "events" entries go out as one append_events() call.
+    - Back-to-back snapshots (overwrite_bookings) collapse to the last one.
+    - Flushed entries are dropped by atomically rewriting the journal, so a
+      restart replays exactly what never reached the backend.
+    - After a failure or restart, events whose event_id is already in the log
+      are skipped (the request may have applied before the error/crash).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._flushed = threading.Condition(self._lock)
+        self._wake = threading.Event()
+        self._entries: List[Dict[str, Any]] = self._read()
+        self._uncertain = bool(self._entries)  # replaying after a restart
+        self._stats: Dict[str, Any] = {
+            "replayed": len(self._entries), "queued": 0, "flushes": 0,
+            "requests": 0, "failures": 0, "last_error": "",
+        }
+        self._thread = threading.Thread(target=self._run, name="bookings-write-behind", daemon=True)
+        self._thread.start()
+        if self._entries:
+            self._wake.set()
+
+    # ---- journal file ----
+    def _read(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return []
+        entries = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue  # torn last line from a crash mid-write; never acknowledged
+        return entries
+
+    def _append_line(self, entry: Dict[str, Any]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rewrite(self) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in self._entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def _enqueue(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._append_line(entry)
+            self._entries.append(entry)
+            self._stats["queued"] += 1
+        self._wake.set()
+
+    # ---- public ----
+    def enqueue_events(self, rows: List[List[str]]) -> None:
+        self._enqueue({"op": OP_EVENTS, "rows": rows})
+
+    def enqueue_snapshot(self, df: pd.DataFrame) -> None:
+        header = list(df.columns)
+        rows = [[_cell_text(v) for v in r] for r in df.itertuples(index=False, name=None)]
+        self._enqueue({"op": OP_SNAPSHOT, "header": header, "rows": rows})
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def overlay(self) -> Tuple[Optional[pd.DataFrame], List[List[str]]]:
+        """
+        What readers must add to the stored state: (newest queued snapshot or None,
+        events queued after it, in order).
+        """
+        with self._lock:
+            entries = list(self._entries)
+        snapshot = None
+        events: List[List[str]] = []
+        for entry in entries:
+            if entry["op"] == OP_SNAPSHOT:
+                snapshot, events = entry, []
+            else:
+                events.extend(entry["rows"])
+        if snapshot is not None:
+            header = snapshot["header"]
+            snapshot = _coerce_df(pd.DataFrame(snapshot["rows"], columns=header), header)
+        return snapshot, events
+
+    def drain(self, timeout: float = 30.0) -> bool:
+        """Block until everything queued so far is flushed. Returns False on timeout."""
+        self._wake.set()
+        with self._flushed:
+            return self._flushed.wait_for(lambda: not self._entries, timeout=timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "pending": len(self._entries)}
+
+    # ---- worker ----
+    def _run(self) -> None:
+        _REQUEST_CONTEXT.background = True  # our Sheets reads yield to interactive ones
+        failures = 0
+        while True:
+            self._wake.wait()
+            time.sleep(COALESCE_SECONDS)
+            self._wake.clear()
+            try:
+                self._flush()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                with self._lock:
+                    self._stats["failures"] += 1
+                    self._stats["last_error"] = f"{type(e).__name__}: {e}"
+                self._uncertain = True
+                time.sleep(min(RETRY_BASE_SECONDS * 2 ** (failures - 1), RETRY_MAX_SECONDS))
+                self._wake.set()
+
+    def _done(self, n: int, requests: int) -> None:
+        """Drop the first n entries (now stored) from memory and the journal file."""
+        with self._flushed:
+            self._entries = self._entries[n:]
+            self._rewrite()
+            self._stats["requests"] += requests
+            self._flushed.notify_all()
+
+    def _flush(self) -> None:
+        with self._lock:
+            batch = list(self._entries)
+        if not batch:
+            return
+        backend = _get_backend()
+        logged = {r[0] for r in backend.load_events()} if self._uncertain else set()
+        i = dropped = 0
+        while i < len(batch):
+            if batch[i]["op"] == OP_SNAPSHOT:
+                while i + 1 < len(batch) and batch[i + 1]["op"] == OP_SNAPSHOT:
+                    i += 1  # superseded by the next overwrite
+                header = batch[i]["header"]
+                df = _coerce_df(pd.DataFrame(batch[i]["rows"], columns=header), header)
+                sent = _write_snapshot(backend, df)
+                i += 1
+            else:
+                rows = []
+                while i < len(batch) and batch[i]["op"] == OP_EVENTS:
+                    rows.extend(r for r in batch[i]["rows"] if r[0] not in logged)
+                    i += 1
+                sent = 0
+                if rows:
+                    backend.append_events(rows)
+                    sent = 1
+            self._done(i - dropped, sent)
+            dropped = i
+        self._uncertain = False
+        with self._lock:
+            self._stats["flushes"] += 1
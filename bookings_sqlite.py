@@ -0,0 +1,170 @@
+# bookings_sqlite.py — local SQLite storage engine for bookings (BOOKINGS_BACKEND=sqlite)
+from __future__ import annotations
+import sqlite3
+import threading
+from typing import Any, Dict, List
+
+import pandas as pd
+
+from bookings import (
+    BookingBackend,
+    DEFAULTS,
+    EVENT_COLS,
+    LEGACY_COLS,
+    REQUIRED_COLS,
+    _cell_text,
+    _coerce_df,
+    new_booking_id,
+)
+
+TABLE = "bookings"
+EVENTS_TABLE = "booking_events"
+ARCHIVE_TABLE = "bookings_archive"  # every term in one table, keyed by term
+
+# Hot lookups: availability (slot, status), one-per-week checks (email, exam_number),
+# DSPS/reschedule groups (group_id), and row addressing (booking_id).
+_INDEXES = {
+    "ix_bookings_slot_status": "(slot, status)",
+    "ix_bookings_email_exam": "(email, exam_number)",
+    "ix_bookings_group": "(group_id)",
+}
+
+def _quote(col: str) -> str:
+    return '"' + col.replace('"', '""') + '"'
+
+class SQLiteBackend(BookingBackend):
+    """
+    Bookings in a single SQLite table. Every value is stored as TEXT exactly as the
+    sheet would hold it, so frames round-trip identically between backends.
+    """
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()  # Streamlit sessions share this connection
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self._lock, self._conn:
+            cols = ", ".join(f"{_quote(c)} TEXT NOT NULL DEFAULT ''" for c in REQUIRED_COLS + LEGACY_COLS
+                             if c != "booking_id")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+                f"row_id INTEGER PRIMARY KEY, booking_id TEXT NOT NULL UNIQUE, {cols})"
+            )
+            # Older databases: add any canonical columns introduced since
+            existing = {r[1] for r in self._conn.execute(f"PRAGMA table_info({TABLE})")}
+            for c in REQUIRED_COLS + LEGACY_COLS:
+                if c not in existing:
+                    self._conn.execute(f"ALTER TABLE {TABLE} ADD COLUMN {_quote(c)} TEXT NOT NULL DEFAULT ''")
+            for name, cols_sql in _INDEXES.items():
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {TABLE} {cols_sql}")
+            # Append-only event log; seq is the position the fold/compaction markers use
+            ev_cols = ", ".join(f"{_quote(c)} TEXT NOT NULL DEFAULT ''" for c in EVENT_COLS)
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {EVENTS_TABLE} (seq INTEGER PRIMARY KEY AUTOINCREMENT, {ev_cols})")
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS ix_events_booking ON {EVENTS_TABLE} (booking_id)")
+            # Archived bookings: same columns plus term; booking_id unique so re-archiving is a no-op
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} ("
+                f"row_id INTEGER PRIMARY KEY, term TEXT NOT NULL, booking_id TEXT NOT NULL UNIQUE, {cols})"
+            )
+            existing = {r[1] for r in self._conn.execute(f"PRAGMA table_info({ARCHIVE_TABLE})")}
+            for c in REQUIRED_COLS + LEGACY_COLS:
+                if c not in existing:
+                    self._conn.execute(f"ALTER TABLE {ARCHIVE_TABLE} ADD COLUMN {_quote(c)} TEXT NOT NULL DEFAULT ''")
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS ix_archive_term ON {ARCHIVE_TABLE} (term)")
+
+    def header(self) -> List[str]:
+        with self._lock:
+            cols = [r[1] for r in self._conn.execute(f"PRAGMA table_info({TABLE})")]
+        cols.remove("row_id")
+        # Canonical order first, then legacy/extra columns
+        return [c for c in REQUIRED_COLS if c in cols] + [c for c in cols if c not in REQUIRED_COLS]
+
+    def load(self) -> pd.DataFrame:
+        header = self.header()
+        select = ", ".join(_quote(c) for c in header)
+        with self._lock:
+            df = pd.read_sql_query(f"SELECT {select} FROM {TABLE} ORDER BY row_id", self._conn)
+        return _coerce_df(df, header)
+
+    def _row_values(self, row_dict: Dict[str, Any], header: List[str]) -> List[str]:
+        return [_cell_text(row_dict.get(k, DEFAULTS.get(k, ""))) for k in header]
+
+    def append(self, row_dict: Dict[str, Any]) -> None:
+        header = self.header()
+        sql = f"INSERT INTO {TABLE} ({', '.join(_quote(c) for c in header)}) VALUES ({', '.join('?' * len(header))})"
+        with self._lock, self._conn:
+            self._conn.execute(sql, self._row_values(row_dict, header))
+
+    def update(self, changes: Dict[str, Dict[str, Any]]) -> int:
+        header = self.header()
+        written = 0
+        with self._lock, self._conn:
+            for bid, fields in changes.items():
+                cols = [c.strip().lower() for c in fields]
+                unknown = [c for c in cols if c not in header]
+                if unknown:
+                    raise KeyError(f"Unknown column: {unknown[0]!r}")
+                cur = self._conn.execute(
+                    f"SELECT {', '.join(_quote(c) for c in cols)} FROM {TABLE} WHERE booking_id = ?", (bid,)
+                ).fetchone()
+                if cur is None:
+                    raise KeyError(f"Unknown booking_id: {bid!r}")
+                diff = {c: _cell_text(v) for c, v, old in zip(cols, fields.values(), cur) if _cell_text(v) != old}
+                if not diff:
+                    continue
+                assignments = ", ".join(f"{_quote(c)} = ?" for c in diff)
+                self._conn.execute(f"UPDATE {TABLE} SET {assignments} WHERE booking_id = ?", [*diff.values(), bid])
+                written += len(diff)
+        return written
+
+    def overwrite(self, df: pd.DataFrame) -> int:
+        header = self.header()
+        df = _coerce_df(df, header)
+        if "booking_id" in df.columns:
+            missing = df["booking_id"].astype(str).str.strip() == ""
+            df.loc[missing, "booking_id"] = [new_booking_id() for _ in range(int(missing.sum()))]
+        rows = [[_cell_text(v) for v in r] for r in df.itertuples(index=False, name=None)]
+        sql = f"INSERT INTO {TABLE} ({', '.join(_quote(c) for c in header)}) VALUES ({', '.join('?' * len(header))})"
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {TABLE}")
+            self._conn.executemany(sql, rows)
+        return 2
+
+    def load_events(self) -> List[List[str]]:
+        select = ", ".join(_quote(c) for c in EVENT_COLS)
+        with self._lock:
+            return [list(r) for r in self._conn.execute(f"SELECT {select} FROM {EVENTS_TABLE} ORDER BY seq")]
+
+    def append_events(self, rows: List[List[str]]) -> None:
+        sql = f"INSERT INTO {EVENTS_TABLE} ({', '.join(_quote(c) for c in EVENT_COLS)}) VALUES ({', '.join('?' * len(EVENT_COLS))})"
+        with self._lock, self._conn:
+            self._conn.executemany(sql, rows)
+
+    def archive(self, term: str, df: pd.DataFrame) -> int:
+        header = self.header()
+        df = _coerce_df(df, header)
+        rows = [[term] + [_cell_text(v) for v in r] for r in df.itertuples(index=False, name=None)]
+        cols = ", ".join(_quote(c) for c in ["term"] + header)
+        sql = f"INSERT OR IGNORE INTO {ARCHIVE_TABLE} ({cols}) VALUES ({', '.join('?' * (len(header) + 1))})"
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(sql, rows)
+            return self._conn.total_changes - before
+
+    def load_archive(self, term: str) -> pd.DataFrame:
+        header = self.header()
+        select = ", ".join(_quote(c) for c in header)
+        with self._lock:
+            df = pd.read_sql_query(
+                f"SELECT {select} FROM {ARCHIVE_TABLE} WHERE term = ? ORDER BY row_id", self._conn, params=(term,)
+            )
+        return _coerce_df(df, header)
+
+    def archive_terms(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute(f"SELECT DISTINCT term FROM {ARCHIVE_TABLE}")]
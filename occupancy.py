@@ -0,0 +1,157 @@
+# occupancy.py — NumPy occupancy index over the materialized slot schedule
+from __future__ import annotations
+import heapq
+import itertools
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from slots import Slot, current_schedule
+
+class ScheduleArrays:
+    """
+    One location's schedule (slots_by_day) flattened into arrays, in day then
+    start order. Read-only and shared by every session; built once per
+    materialized schedule (see occupancy_index()).
+    - ids/starts/ends: slot_id and epoch-minute bounds per slot
+    - capacity: students per slot (schedule file capacity windows)
+    - linked[i]: slot i+1 starts exactly when slot i ends (same day, back to back)
+    - spans: day_key -> (lo, hi) positions
+    """
+
+    def __init__(self, slots_by_day: Dict[str, List[Slot]]):
+        self.slots: List[Slot] = [s for day_slots in slots_by_day.values() for s in day_slots]
+        n = len(self.slots)
+        schedule = current_schedule()
+        self.ids = np.fromiter((s.id for s in self.slots), dtype=np.int64, count=n)
+        self.starts = np.fromiter((s.start for s in self.slots), dtype=np.int64, count=n)
+        self.ends = self.starts + np.fromiter((s.minutes for s in self.slots), dtype=np.int64, count=n)
+        self.capacity = np.fromiter((schedule.capacity_of(s.location, s.start_dt) for s in self.slots),
+                                    dtype=np.int64, count=n)
+        self.linked = np.zeros(n, dtype=bool)
+        self.linked[:-1] = self.starts[1:] == self.ends[:-1]
+        self.pos: Dict[int, int] = {sid: i for i, sid in enumerate(self.ids.tolist())}
+        self.spans: Dict[str, Tuple[int, int]] = {}
+        lo = 0
+        for day_key, day_slots in slots_by_day.items():
+            self.spans[day_key] = (lo, lo + len(day_slots))
+            lo += len(day_slots)
+
+class OccupancyIndex:
+    """
+    Active bookings per scheduled slot of one location (a counter array over
+    ScheduleArrays); a slot is free while booked < capacity. Queries are vectorized:
+    - free_blocks(day, n): n back-to-back slots with room (n=1 single, n=2 DSPS
+      block) via shift-and-AND over the free and linked arrays
+    - `after`: future-only filtering is one comparison against the start array
+    book()/release() count bookings in and out, O(1) per slot.
+    """
+
+    def __init__(self, arrays: ScheduleArrays, booked_ids: Iterable[int] = ()):
+        self.arrays = arrays
+        self.booked = np.zeros(len(arrays.slots), dtype=np.int64)
+        ids, counts = np.unique(np.fromiter(booked_ids, dtype=np.int64), return_counts=True)
+        for sid, count in zip(ids.tolist(), counts.tolist()):
+            i = arrays.pos.get(sid)
+            if i is not None:
+                self.booked[i] = count
+
+    def book(self, slot_ids: Iterable[int]) -> None:
+        for i in self._positions(slot_ids):
+            self.booked[i] += 1
+
+    def release(self, slot_ids: Iterable[int]) -> None:
+        for i in self._positions(slot_ids):
+            self.booked[i] = max(self.booked[i] - 1, 0)
+
+    def _positions(self, slot_ids: Iterable[int]) -> List[int]:
+        return [i for i in (self.arrays.pos.get(int(sid)) for sid in slot_ids) if i is not None]
+
+    def remaining(self, slot_id: int) -> int:
+        i = self.arrays.pos.get(int(slot_id))
+        return 0 if i is None else max(int(self.arrays.capacity[i] - self.booked[i]), 0)
+
+    def capacity(self, slot_id: int) -> int:
+        i = self.arrays.pos.get(int(slot_id))
+        return 0 if i is None else int(self.arrays.capacity[i])
+
+    def free_mask(self, day: Optional[str] = None, n: int = 1, after: Optional[int] = None) -> np.ndarray:
+        """
+        Boolean mask over the day's slots (all days if `day` is None): True where
+        an n-slot back-to-back block with room in every slot starts. `after`
+        (epoch minute) drops blocks starting at or before it.
+        """
+        a = self.arrays
+        lo, hi = a.spans.get(day, (0, 0)) if day is not None else (0, len(a.slots))
+        size = hi - lo
+        if n > size:
+            return np.zeros(size, dtype=bool)
+        free = self.booked[lo:hi] < a.capacity[lo:hi]
+        if after is not None:
+            free &= a.starts[lo:hi] > after  # starts ascend, so later slots of a block are future too
+        ok = free.copy()
+        link = a.linked[lo:hi]
+        for k in range(1, n):
+            ok[:size - k] &= link[k - 1:size - 1] & free[k:]
+            ok[size - k:] = False
+        return ok
+
+    def free_blocks(self, day: Optional[str] = None, n: int = 1,
+                    after: Optional[int] = None) -> List[Tuple[Slot, ...]]:
+        """free_mask() as slot tuples, in start order."""
+        a = self.arrays
+        lo = a.spans.get(day, (0, 0))[0] if day is not None else 0
+        return [tuple(a.slots[lo + i:lo + i + n]) for i in np.flatnonzero(self.free_mask(day, n, after))]
+
+    def capacity_table(self, day: str) -> pd.DataFrame:
+        """Per-slot capacity, booked and remaining for one day (admin view)."""
+        a = self.arrays
+        lo, hi = a.spans.get(day, (0, 0))
+        capacity = a.capacity[lo:hi]
+        booked = self.booked[lo:hi]
+        return pd.DataFrame({
+            "slot": [s.label for s in a.slots[lo:hi]],
+            "capacity": capacity,
+            "booked": booked,
+            "remaining": np.maximum(capacity - booked, 0),
+        })
+
+# Shared arrays per location, rebuilt when the schedule's day lists change
+# (slots.generate_slots hands out the same list objects until a day rolls over
+# or the schedule file changes).
+_ARRAYS: Dict[str, Tuple[Tuple[List[Slot], ...], ScheduleArrays]] = {}
+_ARRAYS_LOCK = threading.Lock()
+
+def occupancy_index(location: str, slots_by_day: Dict[str, List[Slot]],
+                    booked_ids: Iterable[int] = ()) -> OccupancyIndex:
+    """
+    OccupancyIndex for one location's schedule, counting `booked_ids` (the
+    active bookings' slot_ids, one entry per booking).
+    """
+    lists = tuple(slots_by_day.values())
+    with _ARRAYS_LOCK:
+        cached = _ARRAYS.get(location)
+        if cached is None or len(cached[0]) != len(lists) or any(x is not y for x, y in zip(cached[0], lists)):
+            cached = _ARRAYS[location] = (lists, ScheduleArrays(slots_by_day))
+    return OccupancyIndex(cached[1], booked_ids)
+
+def earliest_blocks(indexes: Iterable[OccupancyIndex], limit: int, n: int = 1,
+                    after: Optional[int] = None, skip_weeks: Iterable[int] = ()) -> List[Tuple[Slot, ...]]:
+    """
+    The first `limit` open n-slot blocks across several indexes (e.g. both
+    campuses), in start order. Each index yields its free blocks day by day and
+    heapq.merge interleaves them, so only the days up to the last result get a
+    free_mask() computed. Days in an ISO week listed in `skip_weeks` are skipped.
+    """
+    skip = set(skip_weeks)
+
+    def day_blocks(index: OccupancyIndex) -> Iterator[Tuple[Slot, ...]]:
+        a = index.arrays
+        for day, (lo, hi) in a.spans.items():
+            if lo < hi and a.slots[lo].start_dt.isocalendar()[1] not in skip:
+                yield from index.free_blocks(day, n, after)
+
+    merged = heapq.merge(*(day_blocks(i) for i in indexes), key=lambda block: (block[0].start, block[0].location))
+    return list(itertools.islice(merged, limit))
@@ -1,90 +1,256 @@
-from __future__ import annotations
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
-
-EN_DASH = "–"  # keep this consistent with the parser
-
-def generate_slot_label(day_dt: datetime, start_dt: datetime, end_dt: datetime) -> str:
-    """
-    Standard slot label:
-      'Monday mm/dd/yy h:MM–h:MM AM'
-    AM/PM appears only once at the end (works with our tolerant parser).
-    """
-    label_day = day_dt.strftime("%A %m/%d/%y")
-    start_fmt = start_dt.strftime("%I:%M").lstrip("0")
-    end_fmt = end_dt.strftime("%I:%M %p").lstrip("0")
-    return f"{label_day} {start_fmt}{EN_DASH}{end_fmt}"
-
-def _build_day_slots(day_dt: datetime, hours: Dict[int, Tuple[str, str]], slot_minutes: int) -> List[str]:
-    """
-    Create all slot strings for one day given a weekday->(start,end) mapping in 24h 'HH:MM'.
-    Produces half-open intervals [start, start+slot) until < end.
-    """
-    weekday = day_dt.weekday()
-    if weekday not in hours:
-        return []
-
-    start_str, end_str = hours[weekday]
-    start_time = datetime.strptime(start_str, "%H:%M").time()
-    end_time = datetime.strptime(end_str, "%H:%M").time()
-
-    cur = datetime.combine(day_dt.date(), start_time)
-    end = datetime.combine(day_dt.date(), end_time)
-
-    slots: List[str] = []
-    step = timedelta(minutes=slot_minutes)
-
-    while cur < end:
-        nxt = cur + step
-        if nxt > end:
-            break  # avoid short tail slot
-        slots.append(generate_slot_label(day_dt, cur, nxt))
-        cur = nxt
-
-    return slots
-
-def generate_slots(horizon_days: int = 21, slot_minutes: int = 15):
-    """
-    Returns (slo_slots_by_day, ncc_slots_by_day), each a dict:
-      { 'Weekday mm/dd/yy': ['Weekday mm/dd/yy 9:00–9:15 AM', ...] }
-    """
-    today = datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
-    days = [today + timedelta(days=i) for i in range(horizon_days)]
-
-    # Weekday indices: Mon=0 ... Sun=6
-    slo_hours = {
-        0: ("09:00", "21:00"),
-        1: ("09:00", "21:00"),
-        2: ("08:30", "21:00"),
-        3: ("08:15", "20:30"),
-        4: ("09:15", "15:00"),
-        5: ("09:15", "13:00"),
-        # 6: closed (Sunday)
-    }
-
-    ncc_hours = {
-        0: ("12:00", "16:00"),
-        1: ("08:15", "20:00"),
-        2: ("08:15", "17:00"),
-        3: ("09:15", "17:00"),
-        4: ("08:15", "15:00"),
-        # 5,6: closed
-    }
-
-    slo_slots_by_day: Dict[str, List[str]] = {}
-    ncc_slots_by_day: Dict[str, List[str]] = {}
-
-    for day_dt in days:
-        # SLO
-        slo_slots = _build_day_slots(day_dt, slo_hours, slot_minutes)
-        if slo_slots:
-            day_key = day_dt.strftime("%A %m/%d/%y")
-            slo_slots_by_day[day_key] = sorted(slo_slots)
-
-        # NCC
-        ncc_slots = _build_day_slots(day_dt, ncc_hours, slot_minutes)
-        if ncc_slots:
-            day_key = day_dt.strftime("%A %m/%d/%y")
-            ncc_slots_by_day[day_key] = sorted(ncc_slots)
-
-    return slo_slots_by_day, ncc_slots_by_day
+from __future__ import annotations
+import json
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+EN_DASH = "–"  # keep this consistent with the parser
+
+# Campuses as stored in bookings.lab_location. Position + 1 is the location code
+# packed into slot ids, so only ever append here.
+LOCATIONS: Tuple[str, ...] = ("SLO AT Lab", "NCC AT Lab")
+LOCATION_CODES: Dict[str, int] = {loc: i + 1 for i, loc in enumerate(LOCATIONS)}
+
+# Campus hours, slot length, horizon and closure dates come from a JSON file
+# (schedule.json next to this module unless SLOTS_SCHEDULE_PATH says otherwise).
+SCHEDULE_PATH_SETTING = "SLOTS_SCHEDULE_PATH"
+DEFAULT_SCHEDULE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schedule.json")
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# Slot starts are local wall-clock minutes since EPOCH (no timezone, so ids
+# don't shift across DST changes and match what the label says).
+EPOCH = datetime(1970, 1, 1)
+
+def epoch_minute(dt: datetime) -> int:
+    """Local wall-clock datetime (naive or aware) → minutes since EPOCH."""
+    return (dt.replace(tzinfo=None) - EPOCH) // timedelta(minutes=1)
+
+def slot_id(location_code, start, minutes):
+    """
+    Stable integer id for a slot: (start * 256 + minutes) * 16 + location_code.
+    Plain arithmetic, so it also works elementwise on pandas Series.
+    """
+    return (start * 256 + minutes) * 16 + location_code
+
+class Slot(NamedTuple):
+    """
+    One bookable slot. Availability logic compares `id`s; `label` is only for
+    display (and the human-readable `slot` column next to `slot_id`).
+    Build these with make_slot() so each slot exists once.
+    """
+    location: str
+    start: int      # epoch minute, local wall clock
+    minutes: int    # slot length
+
+    @property
+    def id(self) -> int:
+        return slot_id(LOCATION_CODES.get(self.location, 0), self.start, self.minutes)
+
+    @property
+    def end(self) -> int:
+        return self.start + self.minutes
+
+    @property
+    def start_dt(self) -> datetime:
+        return EPOCH + timedelta(minutes=self.start)
+
+    @property
+    def end_dt(self) -> datetime:
+        return EPOCH + timedelta(minutes=self.end)
+
+    @property
+    def label(self) -> str:
+        return generate_slot_label(self.start_dt, self.start_dt, self.end_dt)
+
+# Interned slots by id: regenerating the schedule hands back the same objects
+_SLOTS: Dict[int, Slot] = {}
+
+def make_slot(location: str, start_dt: datetime, end_dt: datetime) -> Slot:
+    start = epoch_minute(start_dt)
+    slot = Slot(location, start, epoch_minute(end_dt) - start)
+    return _SLOTS.setdefault(slot.id, slot)
+
+def generate_slot_label(day_dt: datetime, start_dt: datetime, end_dt: datetime) -> str:
+    """
+    Standard slot label:
+      'Monday mm/dd/yy h:MM–h:MM AM'
+    AM/PM appears only once at the end (works with our tolerant parser).
+    """
+    label_day = day_dt.strftime("%A %m/%d/%y")
+    start_fmt = start_dt.strftime("%I:%M").lstrip("0")
+    end_fmt = end_dt.strftime("%I:%M %p").lstrip("0")
+    return f"{label_day} {start_fmt}{EN_DASH}{end_fmt}"
+
+class CapacityWindow(NamedTuple):
+    weekdays: FrozenSet[int]   # Mon=0; empty = any weekday
+    dates: FrozenSet[date]     # empty = any date
+    start: time
+    end: time
+    capacity: int
+
+    def covers(self, when: datetime) -> bool:
+        return ((not self.weekdays or when.weekday() in self.weekdays)
+                and (not self.dates or when.date() in self.dates)
+                and self.start <= when.time() < self.end)
+
+class Schedule(NamedTuple):
+    slot_minutes: int
+    horizon_days: int
+    hours: Dict[str, Dict[int, Tuple[time, time]]]   # location -> weekday (Mon=0) -> (open, close)
+    closures: Dict[str, FrozenSet[date]]            # location -> closed dates (campus-wide ones included)
+    default_capacity: int
+    capacity: Dict[str, List[CapacityWindow]]       # location -> windows; the last one covering a slot wins
+
+    def capacity_of(self, location: str, start: datetime) -> int:
+        """Students one slot at `location` starting at `start` can take."""
+        cap = self.default_capacity
+        for window in self.capacity.get(location, []):
+            if window.covers(start):
+                cap = window.capacity
+        return cap
+
+def _parse_hours(location: str, by_day: Dict[str, List[str]]) -> Dict[int, Tuple[time, time]]:
+    hours = {}
+    for day, span in by_day.items():
+        start_str, end_str = span
+        hours[_weekday(location, day)] = (datetime.strptime(start_str, "%H:%M").time(),
+                                              datetime.strptime(end_str, "%H:%M").time())
+    return hours
+
+def _weekday(location: str, day: str) -> int:
+    if day.lower() not in WEEKDAYS:
+        raise ValueError(f"{location}: unknown weekday {day!r}")
+    return WEEKDAYS.index(day.lower())
+
+def _parse_capacity(location: str, windows: List[Dict[str, Any]]) -> List[CapacityWindow]:
+    return [
+        CapacityWindow(
+            weekdays=frozenset(_weekday(location, d) for d in w.get("days", [])),
+            dates=frozenset(date.fromisoformat(d) for d in w.get("dates", [])),
+            start=datetime.strptime(w.get("start", "00:00"), "%H:%M").time(),
+            end=datetime.strptime(w.get("end", "23:59"), "%H:%M").time(),
+            capacity=int(w["capacity"]),
+        )
+        for w in windows
+    ]
+
+def load_schedule(path: Optional[str] = None) -> Schedule:
+    """
+    Read the schedule file:
+      {"slot_minutes": 15, "horizon_days": 21,
+       "campuses": {"SLO AT Lab": {"monday": ["09:00", "21:00"], ...}, ...},   # missing weekday = closed
+       "closures": ["2025-11-27", ...],                                        # every campus
+       "campus_closures": {"NCC AT Lab": ["2025-10-31"]},
+       "default_capacity": 1,                                                  # students per slot
+       "capacity": {"SLO AT Lab": [{"days": ["tuesday"], "start": "09:00", "end": "12:00", "capacity": 2},
+                                   {"dates": ["2025-12-08"], "capacity": 3}]}}
+    A capacity window matches slots starting in [start, end) on its days/dates
+    (omitted = all); the last matching window wins.
+    Raises ValueError for unknown weekdays or malformed times/dates.
+    """
+    path = path or os.environ.get(SCHEDULE_PATH_SETTING) or DEFAULT_SCHEDULE_PATH
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    campuses = raw.get("campuses", {})
+    everywhere = {date.fromisoformat(d) for d in raw.get("closures", [])}
+    own = raw.get("campus_closures", {})
+    return Schedule(
+        slot_minutes=int(raw.get("slot_minutes", 15)),
+        horizon_days=int(raw.get("horizon_days", 21)),
+        hours={loc: _parse_hours(loc, campuses.get(loc, {})) for loc in LOCATIONS},
+        closures={loc: frozenset(everywhere | {date.fromisoformat(d) for d in own.get(loc, [])})
+                  for loc in LOCATIONS},
+        default_capacity=int(raw.get("default_capacity", 1)),
+        capacity={loc: _parse_capacity(loc, raw.get("capacity", {}).get(loc, [])) for loc in LOCATIONS},
+    )
+
+def _build_day_slots(day: date, location: str, hours: Dict[int, Tuple[time, time]],
+                     slot_minutes: int) -> List[Slot]:
+    """
+    Create all slots for one day given a weekday->(open, close) mapping.
+    Produces half-open intervals [start, start+slot) until < end.
+    """
+    weekday = day.weekday()
+    if weekday not in hours:
+        return []
+
+    start_time, end_time = hours[weekday]
+    cur = datetime.combine(day, start_time)
+    end = datetime.combine(day, end_time)
+
+    slots: List[Slot] = []
+    step = timedelta(minutes=slot_minutes)
+
+    while cur < end:
+        nxt = cur + step
+        if nxt > end:
+            break  # avoid short tail slot
+        slots.append(make_slot(location, cur, nxt))
+        cur = nxt
+
+    return slots
+
+# Materialized schedule, shared by every session/rerun in this process:
+# {(date, slot_minutes): (day_key, [slots per LOCATIONS entry])}. Days are built
+# once; after midnight past days are dropped and only the day entering the
+# horizon is built. Everything resets when the schedule file changes.
+_SCHEDULE_CACHE: Dict[str, Any] = {"file": None, "schedule": None, "days": {}}
+_SCHEDULE_LOCK = threading.Lock()
+
+def _current_schedule() -> Schedule:
+    """The configured schedule, re-read when the file changes. Caller holds _SCHEDULE_LOCK."""
+    path = os.environ.get(SCHEDULE_PATH_SETTING) or DEFAULT_SCHEDULE_PATH
+    file_key = (path, os.stat(path).st_mtime_ns)
+    if _SCHEDULE_CACHE["file"] != file_key:
+        _SCHEDULE_CACHE.update(file=file_key, schedule=load_schedule(path), days={})
+    return _SCHEDULE_CACHE["schedule"]
+
+def _materialize(today: date, horizon_days: Optional[int],
+                 slot_minutes: Optional[int]) -> List[Tuple[str, List[List[Slot]]]]:
+    with _SCHEDULE_LOCK:
+        schedule = _current_schedule()
+        days = _SCHEDULE_CACHE["days"]
+        minutes = slot_minutes or schedule.slot_minutes
+        for key in [k for k in days if k[0] < today]:
+            del days[key]  # rolled past midnight
+        out = []
+        for i in range(horizon_days or schedule.horizon_days):
+            day = today + timedelta(days=i)
+            if (day, minutes) not in days:
+                days[(day, minutes)] = (day.strftime("%A %m/%d/%y"), [
+                    [] if day in schedule.closures[loc] else _build_day_slots(day, loc, schedule.hours[loc], minutes)
+                    for loc in LOCATIONS
+                ])
+            out.append(days[(day, minutes)])
+        return out
+
+def generate_slots(horizon_days: Optional[int] = None, slot_minutes: Optional[int] = None):
+    """
+    Returns (slo_slots_by_day, ncc_slots_by_day), each a dict of Slots in start order:
+      { 'Weekday mm/dd/yy': [Slot('SLO AT Lab', ...), ...] }   # slot.label: 'Weekday mm/dd/yy 9:00–9:15 AM'
+    Horizon and slot length default to the schedule file. Cheap to call on every
+    rerun: days are materialized once per calendar day (see _materialize).
+    """
+    by_location: List[Dict[str, List[Slot]]] = [{} for _ in LOCATIONS]
+    for day_key, per_location in _materialize(date.today(), horizon_days, slot_minutes):
+        for slots_by_day, day_slots in zip(by_location, per_location):
+            if day_slots:
+                slots_by_day[day_key] = day_slots
+    slo_slots_by_day, ncc_slots_by_day = by_location
+    return slo_slots_by_day, ncc_slots_by_day
+
+def slot_from_id(sid: int) -> Slot:
+    """Inverse of slot_id(): the Slot an id stands for (location "" if the code is unknown)."""
+    rest, code = divmod(int(sid), 16)
+    start, minutes = divmod(rest, 256)
+    return Slot(LOCATIONS[code - 1] if 1 <= code <= len(LOCATIONS) else "", start, minutes)
+
+def current_schedule() -> Schedule:
+    with _SCHEDULE_LOCK:
+        return _current_schedule()
+
+def slot_capacity(sid: int) -> int:
+    """How many active bookings slot `sid` can take (schedule file capacity windows)."""
+    slot = slot_from_id(sid)
+    return current_schedule().capacity_of(slot.location, slot.start_dt)
@@ -0,0 +1,176 @@
+# conftest.py — the app's modules are flat files in the repo root
+import os
+import sys
+
+import pytest
+from gspread.utils import a1_range_to_grid_range
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bookings  # noqa: E402
+
+class FakeWorksheet:
+    """In-memory stand-in for the gspread Worksheet calls SheetsBackend makes."""
+    def __init__(self, title, values=None, rows=1000, cols=26):
+        self.title = title
+        self.grid = [list(r) for r in (values or [])]
+        self.row_count = max(rows, len(self.grid))
+        self.col_count = cols
+        self.calls = []
+
+    def _values(self):
+        out = [[("" if v is None else str(v)) for v in r[: self.col_count]] for r in self.grid]
+        while out and not any(out[-1]):
+            out.pop()
+        width = max((len(r) for r in out), default=0)
+        return [(r + [""] * width)[:width] for r in out]
+
+    def _set(self, r0, c0, values):
+        for i, row in enumerate(values):
+            while len(self.grid) <= r0 + i:
+                self.grid.append([])
+            line = self.grid[r0 + i]
+            for j, v in enumerate(row):
+                while len(line) <= c0 + j:
+                    line.append("")
+                line[c0 + j] = v
+
+    def read(self, a1):
+        g = a1_range_to_grid_range(a1)
+        r0, r1 = g.get("startRowIndex", 0), g.get("endRowIndex")
+        c0, c1 = g.get("startColumnIndex", 0), g.get("endColumnIndex")
+        out = [row[c0:c1] for row in self._values()[r0:r1]]
+        out = [r[: max((i + 1 for i, v in enumerate(r) if v), default=0)] for r in out]
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def get_all_values(self, **kwargs):
+        self.calls.append("get_all_values")
+        return self._values()
+
+    def get(self, range_name=None, **kwargs):
+        self.calls.append("get")
+        return self.read(range_name)
+
+    def batch_get(self, ranges, **kwargs):
+        self.calls.append("batch_get")
+        return [self.read(r) for r in ranges]
+
+    def row_values(self, row, **kwargs):
+        values = self._values()
+        return values[row - 1] if len(values) >= row else []
+
+    def acell(self, label, **kwargs):
+        self.calls.append("acell")
+        value = (self.read(label) or [[""]])[0]
+        return type("Cell", (), {"value": value[0] if value else None})
+
+    def update(self, values=None, range_name=None, **kwargs):
+        self.calls.append("update")
+        g = a1_range_to_grid_range(range_name)
+        self._set(g.get("startRowIndex", 0), g.get("startColumnIndex", 0), values)
+
+    def batch_update(self, data, **kwargs):
+        self.calls.append("batch_update")
+        for d in data:
+            self.update(d["values"], d["range"])
+
+    def append_row(self, values, **kwargs):
+        self.append_rows([values])
+
+    def append_rows(self, values, **kwargs):
+        self.calls.append("append")
+        self._set(len(self._values()), 0, values)
+
+    def insert_row(self, values, index=1, **kwargs):
+        self.grid.insert(index - 1, list(values))
+
+    def resize(self, rows=None, cols=None):
+        if rows is not None:
+            self.row_count, self.grid = rows, self.grid[:rows]
+        if cols is not None:
+            self.col_count, self.grid = cols, [r[:cols] for r in self.grid]
+
+class FakeSpreadsheet:
+    def __init__(self):
+        self.tabs = {bookings.SHEET_NAME: FakeWorksheet(bookings.SHEET_NAME)}
+        self.batch_gets = 0
+
+    @property
+    def sheet1(self):
+        return self.tabs[bookings.SHEET_NAME]
+
+    def worksheet(self, title):
+        if title not in self.tabs:
+            raise bookings.gspread.exceptions.WorksheetNotFound(title)
+        return self.tabs[title]
+
+    def add_worksheet(self, title, rows=1000, cols=26):
+        self.tabs[title] = FakeWorksheet(title, rows=rows, cols=cols)
+        return self.tabs[title]
+
+    def worksheets(self):
+        return list(self.tabs.values())
+
+    def values_batch_get(self, ranges, params=None):
+        self.batch_gets += 1
+        out = []
+        for r in ranges:
+            title, a1 = r.rsplit("!", 1)
+            tab = self.tabs[title.strip("'").replace("''", "'")]
+            out.append({"range": r, "values": tab.read(a1)})
+        return {"valueRanges": out}
+
+@pytest.fixture
+def spreadsheet(monkeypatch):
+    """A fresh in-memory spreadsheet behind bookings' gspread connection."""
+    ss = FakeSpreadsheet()
+    client = type("Client", (), {"open": lambda self, name: ss})()
+
+    def authorize():
+        bookings._CONN.update(client=client, spreadsheet=None, worksheets={},
+                              authed_at=bookings.time.monotonic())
+
+    monkeypatch.setattr(bookings, "_authorize", authorize)
+    monkeypatch.setitem(bookings._CONN, "client", None)
+    monkeypatch.setitem(bookings._CONN, "worksheets", {})
+    monkeypatch.setattr(bookings, "_SCHEDULER", None)
+    monkeypatch.setenv("SHEETS_READS_PER_MINUTE", "100000")
+    monkeypatch.setenv("SHEETS_WRITES_PER_MINUTE", "100000")
+    yield ss
+    bookings._reset_connection()
+
+@pytest.fixture
+def store(request, tmp_path, monkeypatch):
+    """
+    A fresh SQLite backend as the configured store. Event-log mode unless
+    parametrized indirectly with "false".
+    """
+    monkeypatch.setenv("BOOKINGS_BACKEND", "sqlite")
+    monkeypatch.setenv("BOOKINGS_SQLITE_PATH", str(tmp_path / "bookings.db"))
+    monkeypatch.setenv("BOOKINGS_EVENT_LOG", getattr(request, "param", "true"))
+    monkeypatch.setenv("BOOKINGS_WRITE_BEHIND", "false")
+    monkeypatch.setenv("BOOKINGS_JOURNAL_PATH", str(tmp_path / "bookings.journal"))
+    monkeypatch.setattr(bookings, "_BACKEND", None)
+    monkeypatch.setattr(bookings, "_JOURNAL", None)
+    bookings._forget_state()
+    yield bookings._get_backend()
+    bookings._forget_state()
+
+@pytest.fixture
+def schedule_file(tmp_path, monkeypatch):
+    """Write a schedule file (slots.load_schedule format) and make it the configured one."""
+    import json
+
+    path = tmp_path / "schedule.json"
+    monkeypatch.setenv("SLOTS_SCHEDULE_PATH", str(path))
+
+    def write(**config):
+        config.setdefault("campuses", {"SLO AT Lab": {"monday": ["09:00", "10:00"]},
+                                       "NCC AT Lab": {"monday": ["09:30", "10:30"]}})
+        path.write_text(json.dumps(config), encoding="utf-8")
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))  # a rewrite within one tick still counts
+        return str(path)
+
+    return write
@@ -0,0 +1,38 @@
+# test_admin_filters.py — server-side filtering of the admin booking tables
+from __future__ import annotations
+from datetime import date
+
+import bookings
+import ui_components as ui
+
+def _row(name: str, slot: str, **fields) -> dict:
+    return {"name": name, "email": f"{name.lower()}@my.cuesta.edu", "exam_number": "2",
+            "slot": slot, "lab_location": "SLO AT Lab", "status": bookings.STATUS_BOOKED, **fields}
+
+def _loaded(store):
+    bookings.append_booking_dicts([
+        _row("C", "Wednesday 01/07/26 9:00–9:15 AM"),
+        _row("A", "Monday 01/05/26 9:00–9:15 AM"),
+        _row("X", "Monday 01/05/26 9:15–9:30 AM", status=bookings.STATUS_CANCELED),
+        _row("B", "Tuesday 01/06/26 9:00–9:15 AM", exam_number="3"),
+        _row("Z", "not a slot"),
+    ])
+    return bookings.load_bookings()
+
+def test_filters_in_slot_order(store):
+    df = _loaded(store)
+    version = bookings.data_version(df)
+    names = lambda **kw: ui._filter_bookings(df, version=version, **kw)["name"].tolist()
+    assert names() == ["A", "X", "B", "C", "Z"]
+    assert names(start=date(2026, 1, 5), end=date(2026, 1, 6)) == ["A", "X", "B"]
+    assert names(start=date(2026, 1, 6), end=date(2026, 1, 6), exams=["3"]) == ["B"]
+    assert names(statuses=[bookings.STATUS_CANCELED]) == ["X"]
+    assert names(query="C@MY") == ["C"]
+
+def test_derived_frames_sort_their_own_rows(store):
+    df = _loaded(store)
+    ui._filter_bookings(df, version=bookings.data_version(df))  # cache the full frame's order
+    active = ui._active(df)
+    assert bookings.data_version(active) == bookings.data_version(df)  # attrs ride along
+    found = ui._filter_bookings(active, start=date(2026, 1, 5), end=date(2026, 1, 7))
+    assert found["name"].tolist() == ["A", "B", "C"]
@@ -0,0 +1,69 @@
+# test_archive.py — moving past canceled/graded bookings into per-term archives
+from __future__ import annotations
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+import bookings
+from conftest import FakeWorksheet
+
+NOW = datetime(2026, 3, 1)
+
+def _row(name: str, slot: str, **fields) -> dict:
+    return {"name": name, "email": f"{name.lower()}@my.cuesta.edu", "exam_number": "2",
+            "slot": slot, "lab_location": "SLO AT Lab", "status": bookings.STATUS_BOOKED, **fields}
+
+@pytest.fixture
+def history(store):
+    ids = bookings.append_booking_dicts([
+        _row("Graded", "Monday 10/06/25 9:00–9:15 AM", grade="90"),
+        _row("Canceled", "Monday 01/05/26 9:00–9:15 AM", status=bookings.STATUS_CANCELED),
+        _row("Ungraded", "Monday 01/05/26 9:15–9:30 AM"),
+        _row("Future", "Monday 04/06/26 9:00–9:15 AM", status=bookings.STATUS_CANCELED),
+    ])
+    return dict(zip(["Graded", "Canceled", "Ungraded", "Future"], ids))
+
+def test_archives_past_finished_bookings_by_term(history):
+    assert bookings.archive_bookings(NOW) == {"2025-fall": 1, "2026-spring": 1}
+    assert sorted(bookings.load_bookings()["name"]) == ["Future", "Ungraded"]
+    assert bookings.archived_terms() == ["2025-fall", "2026-spring"]
+    assert bookings.load_archived_bookings("2025-fall")["name"].tolist() == ["Graded"]
+    assert sorted(bookings.load_archived_bookings()["name"]) == ["Canceled", "Graded"]
+
+def test_rerun_is_a_no_op(history):
+    bookings.archive_bookings(NOW)
+    assert bookings.archive_bookings(NOW) == {}
+    assert len(bookings.load_archived_bookings()) == 2
+
+def test_rerun_after_an_interrupted_archive_adds_no_duplicates(history, monkeypatch):
+    # Archive rows written, then the process died before the hot store was rewritten
+    with monkeypatch.context() as m:
+        m.setattr(bookings, "_write_snapshot", lambda *a, **k: 0)
+        bookings.archive_bookings(NOW)
+    assert len(bookings.load_bookings()) == 4
+    assert bookings.archive_bookings(NOW) == {"2025-fall": 0, "2026-spring": 0}
+    assert len(bookings.load_archived_bookings()) == 2
+    assert sorted(bookings.load_bookings()["name"]) == ["Future", "Ungraded"]
+
+def test_concurrent_sheet_archives_write_each_row_once(spreadsheet, monkeypatch):
+    real_read = FakeWorksheet.get_all_values
+
+    def slow_read(self, **kwargs):
+        values = real_read(self, **kwargs)
+        time.sleep(0.05)  # widen the read-then-append window
+        return values
+
+    monkeypatch.setattr(FakeWorksheet, "get_all_values", slow_read)
+    backend = bookings.SheetsBackend()
+    df = bookings._coerce_df(bookings.pd.DataFrame([
+        {**_row("A", "Monday 01/05/26 9:00–9:15 AM", grade="80"), "booking_id": "id-A"},
+    ]), bookings.REQUIRED_COLS)
+    threads = [threading.Thread(target=backend.archive, args=("2026-spring", df)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert backend.load_archive("2026-spring")["booking_id"].tolist() == ["id-A"]
+    assert backend.archive_terms() == ["2026-spring"]
@@ -0,0 +1,41 @@
+# test_chunk_rows.py — request-size batching for full-sheet writes
+from __future__ import annotations
+import json
+
+import bookings
+
+def _sizes(rows, **limits):
+    return [(offset, len(chunk)) for offset, chunk in bookings._chunk_rows(rows, **limits)]
+
+def _row_bytes(row) -> int:
+    return len(json.dumps(row)) + 2
+
+def test_empty_input_yields_nothing():
+    assert list(bookings._chunk_rows([])) == []
+
+def test_fills_exactly_to_the_cell_limit():
+    rows = [[str(i)] * 5 for i in range(5)]
+    chunks = list(bookings._chunk_rows(rows, max_cells=10))
+    assert [(offset, len(chunk)) for offset, chunk in chunks] == [(0, 2), (2, 2), (4, 1)]
+    assert [r for _, chunk in chunks for r in chunk] == rows
+
+def test_one_cell_over_the_limit_splits():
+    assert _sizes([["x"] * 5, ["x"] * 6], max_cells=10) == [(0, 1), (1, 1)]
+
+def test_oversized_row_goes_alone():
+    assert _sizes([["a"], ["b"] * 20, ["c"]], max_cells=10) == [(0, 1), (1, 1), (2, 1)]
+
+def test_byte_limit_is_exact():
+    row = ["x" * 10]
+    limit = 2 * _row_bytes(row)
+    assert [n for _, n in _sizes([row] * 5, max_bytes=limit)] == [2, 2, 1]
+    assert [n for _, n in _sizes([row] * 5, max_bytes=limit - 1)] == [1] * 5
+
+def test_byte_limit_counts_json_escapes():
+    # 27 characters, but the en dash and the ë each encode as a 6-byte escape
+    row = ["Monday 01/05/26 9:00–9:15 AM", "Zoë"]
+    per_row = _row_bytes(row)
+    assert per_row > sum(len(v) + 4 for v in row) + 2
+    chunks = list(bookings._chunk_rows([row] * 4, max_bytes=2 * per_row - 1))
+    assert all(len(json.dumps(chunk)) <= 2 * per_row - 1 for _, chunk in chunks)
+    assert [len(c) for _, c in chunks] == [1] * 4
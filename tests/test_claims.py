@@ -0,0 +1,126 @@
+# test_claims.py — claim_slots: all-or-nothing claims that never double-book a slot
+from __future__ import annotations
+import threading
+
+import pytest
+
+import bookings
+
+SLOT = "Monday 01/05/26 9:00–9:15 AM"
+OTHER_SLOT = "Monday 01/05/26 9:15–9:30 AM"
+
+both_modes = pytest.mark.parametrize("store", ["true", "false"], ids=["event-log", "direct"], indirect=True)
+
+def _row(name: str, slot: str = SLOT) -> dict:
+    return {"name": name, "email": f"{name.lower()}@my.cuesta.edu", "exam_number": "2",
+            "slot": slot, "lab_location": "SLO AT Lab", "status": bookings.STATUS_BOOKED}
+
+def _state():
+    return bookings._current_state(refresh=True)[0]
+
+def _active_names(slot: str = SLOT) -> list:
+    df = _state()
+    return df.loc[bookings._is_active(df["status"]) & (df["slot"] == slot), "name"].tolist()
+
+@both_modes
+def test_claim_books_a_free_slot(store):
+    assert len(bookings.claim_slots([], [_row("A")])) == 1
+    assert _active_names() == ["A"]
+
+@both_modes
+def test_claim_on_a_visibly_full_slot_writes_nothing(store):
+    bookings.claim_slots([], [_row("A")])
+    before = len(_state())
+    with pytest.raises(bookings.SlotTakenError) as e:
+        bookings.claim_slots([], [_row("B")])
+    assert e.value.slots == [SLOT]
+    assert len(_state()) == before
+
+@both_modes
+def test_loser_behind_a_stale_precheck_cancels_its_own_rows(store, monkeypatch):
+    bookings.claim_slots([], [_row("A")])
+    real = bookings._current_state
+    stale = real(refresh=True)[0].iloc[0:0]
+    calls = []
+
+    def first_call_stale(refresh=False):
+        calls.append(refresh)
+        return (stale, {}) if len(calls) == 1 else real(refresh)
+
+    monkeypatch.setattr(bookings, "_current_state", first_call_stale)
+    # DSPS-style pair: one slot free, one taken -> all or nothing
+    with pytest.raises(bookings.SlotTakenError) as e:
+        bookings.claim_slots([], [_row("B", OTHER_SLOT), _row("B")])
+    monkeypatch.setattr(bookings, "_current_state", real)
+    assert e.value.slots == [SLOT]
+    assert _active_names() == ["A"]
+    assert _active_names(OTHER_SLOT) == []
+
+@both_modes
+def test_concurrent_claims_have_exactly_one_winner(store):
+    n = 6
+    barrier = threading.Barrier(n)
+    won, lost, errors = [], [], []
+
+    def claim(name):
+        barrier.wait()
+        try:
+            bookings.claim_slots([], [_row(name)])
+            won.append(name)
+        except bookings.SlotTakenError:
+            lost.append(name)
+        except Exception as e:  # surfaced below; threads swallow exceptions
+            errors.append(e)
+
+    threads = [threading.Thread(target=claim, args=(f"S{i}",)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert len(won) == 1 and len(lost) == n - 1
+    assert _active_names() == won
+
+@both_modes
+def test_reschedule_cancels_the_old_booking_only_after_winning(store):
+    old = bookings.claim_slots([], [_row("A")])
+    bookings.claim_slots([], [_row("B", OTHER_SLOT)])
+    with pytest.raises(bookings.SlotTakenError):
+        bookings.claim_slots(old, [_row("A", OTHER_SLOT)])
+    assert _active_names() == ["A"]  # lost: the old booking stands
+    new = bookings.claim_slots(old, [_row("A", "Monday 01/05/26 9:30–9:45 AM")])
+    df = _state().set_index("booking_id")
+    assert df.loc[old[0], "status"] == bookings.STATUS_CANCELED
+    assert df.loc[new[0], "status"] == bookings.STATUS_BOOKED
+
+def test_claim_refuses_while_queued_writes_are_pending(store, monkeypatch):
+    monkeypatch.setenv("BOOKINGS_WRITE_BEHIND", "true")
+    monkeypatch.setattr(bookings, "_journal_drained", lambda: False)
+    before = len(_state())
+    with pytest.raises(bookings.WritesPendingError):
+        bookings.claim_slots([], [_row("A")])
+    assert len(_state()) == before
+
+# ---- capacity ----
+@pytest.fixture
+def two_examiners(schedule_file):
+    schedule_file(capacity={"SLO AT Lab": [{"days": ["monday"], "start": "09:00", "end": "09:30",
+                                             "capacity": 2}]})
+
+@both_modes
+def test_claims_fill_a_slot_up_to_its_capacity(store, two_examiners):
+    bookings.claim_slots([], [_row("A")])
+    bookings.claim_slots([], [_row("B")])
+    with pytest.raises(bookings.SlotTakenError):
+        bookings.claim_slots([], [_row("C")])
+    assert _active_names() == ["A", "B"]
+
+@both_modes
+def test_claim_check_looks_up_capacity_for_claimed_slots_only(store, two_examiners, monkeypatch):
+    for i, times in enumerate(["10:00–10:15 AM", "10:15–10:30 AM", "10:30–10:45 AM", "10:45–11:00 AM"]):
+        bookings.claim_slots([], [_row(f"S{i}", f"Monday 01/05/26 {times}")])
+    looked_up = []
+    real = bookings._key_capacity
+    monkeypatch.setattr(bookings, "_key_capacity", lambda key: looked_up.append(key) or real(key))
+    bookings.claim_slots([], [_row("A")])
+    assert len(set(looked_up)) == 1
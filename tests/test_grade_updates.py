@@ -0,0 +1,94 @@
+# test_grade_updates.py — conflict-checked update_bookings and the admin grade grid
+from __future__ import annotations
+import os
+from datetime import datetime
+
+import pytest
+import pytz
+
+import bookings
+
+SLOT = "Monday 01/05/26 9:00–9:15 AM"
+OTHER_SLOT = "Monday 01/05/26 9:15–9:30 AM"
+both_modes = pytest.mark.parametrize("store", ["true", "false"], ids=["event-log", "direct"], indirect=True)
+
+def _row(name: str, slot: str = SLOT, **fields) -> dict:
+    return {"name": name, "email": f"{name.lower()}@my.cuesta.edu", "exam_number": "2",
+            "slot": slot, "lab_location": "SLO AT Lab", "status": bookings.STATUS_BOOKED,
+            "updated_at": "t0", **fields}
+
+def _state():
+    return bookings._current_state(refresh=True)[0].set_index("booking_id")
+
+@both_modes
+def test_stale_expected_writes_nothing(store):
+    bid = bookings.append_booking_dicts([_row("A")])[0]
+    bookings.update_bookings({bid: {"grade": "70", "updated_at": "t1"}})
+    with pytest.raises(bookings.BookingConflictError) as e:
+        bookings.update_bookings({bid: {"grade": "90", "updated_at": "t2"}}, expected={bid: {"updated_at": "t0"}})
+    assert e.value.booking_ids == [bid]
+    assert _state().loc[bid, "grade"] == "70"
+
+@both_modes
+def test_current_expected_writes(store):
+    bid = bookings.append_booking_dicts([_row("A")])[0]
+    written = bookings.update_bookings({bid: {"grade": "90", "updated_at": "t1"}},
+                                       expected={bid: {"updated_at": "t0", "grade": ""}})
+    assert written == 2
+    assert _state().loc[bid, "grade"] == "90"
+
+def test_losing_an_append_race_is_undone(store, monkeypatch):
+    a, b = bookings.append_booking_dicts([_row("A"), _row("B", OTHER_SLOT)])
+    real_append = store.append_events
+
+    def other_admin_first(rows):
+        # Another admin's save lands after our read, before our append
+        monkeypatch.setattr(store, "append_events", real_append)
+        real_append([bookings._make_event(bookings.EVENT_GRADED, a,
+                                          {"grade": "75", "graded_by": "ZZ", "updated_at": "t1"})])
+        real_append(rows)
+
+    monkeypatch.setattr(store, "append_events", other_admin_first)
+    with pytest.raises(bookings.BookingConflictError) as e:
+        bookings.update_bookings({a: {"grade": "90", "graded_by": "AA", "updated_at": "t2"},
+                                  b: {"grade": "60", "updated_at": "t2"}},
+                                 expected={a: {"updated_at": "t0"}, b: {"updated_at": "t0"}})
+    assert e.value.booking_ids == [a]
+    df = _state()
+    assert df.loc[a, ["grade", "graded_by", "updated_at"]].tolist() == ["75", "ZZ", "t1"]
+    assert df.loc[b, ["grade", "updated_at"]].tolist() == ["", "t0"]
+
+def test_winning_an_append_race_stands(store, monkeypatch):
+    a = bookings.append_booking_dicts([_row("A")])[0]
+    real_append = store.append_events
+
+    def other_admin_after(rows):
+        monkeypatch.setattr(store, "append_events", real_append)
+        real_append(rows)
+        real_append([bookings._make_event(bookings.EVENT_UPDATED, a, {"status": bookings.STATUS_BOOKED,
+                                                                       "updated_at": "t3"})])
+
+    monkeypatch.setattr(store, "append_events", other_admin_after)
+    assert bookings.update_bookings({a: {"grade": "90", "updated_at": "t2"}}, expected={a: {"updated_at": "t0"}}) == 2
+    assert _state().loc[a, "grade"] == "90"
+
+# ---- grade grid ----
+def test_reloading_the_grid_starts_a_fresh_editor(store):
+    from streamlit.testing.v1 import AppTest
+
+    today = datetime.now(pytz.timezone("US/Pacific")).strftime("%A %m/%d/%y")
+    bid = bookings.append_booking_dicts([_row("A", f"{today} 1:00–1:15 PM")])[0]
+    at = AppTest.from_file(os.path.join(os.path.dirname(os.path.dirname(__file__)), "main.py"),
+                           default_timeout=60)
+    at.secrets["ADMIN_PASSCODE"] = "x"
+    at.run()
+    at.sidebar.radio[0].set_value("Admin View").run()
+    at.text_input[0].input("x").run()
+    first = at.session_state["grade_grid"]
+    assert first["base"]["booking_id"].tolist() == [bid]
+
+    bookings.update_bookings({bid: {"grade": "75", "updated_at": "t1"}})  # another admin
+    next(b for b in at.button if b.label == "Reload grid").click().run()
+    reloaded = at.session_state["grade_grid"]
+    assert reloaded["base"]["grade"].tolist() == ["75"]
+    assert reloaded["load"] != first["load"]  # the editor's old edits don't carry over
@@ -0,0 +1,102 @@
+# test_journal.py — write-behind journal: queued reads, replay after a restart, event_id dedupe
+from __future__ import annotations
+import json
+
+import pytest
+
+import bookings
+import bookings_journal
+
+SLOT = "Monday 01/05/26 9:00–9:15 AM"
+
+def _row(name: str) -> dict:
+    return {"name": name, "email": f"{name.lower()}@my.cuesta.edu", "exam_number": "2",
+            "slot": SLOT, "lab_location": "SLO AT Lab", "status": bookings.STATUS_BOOKED}
+
+def _booked(name: str) -> list:
+    return bookings._make_event(bookings.EVENT_BOOKED, bookings.new_booking_id(), _row(name))
+
+@pytest.fixture(autouse=True)
+def no_coalesce(monkeypatch):
+    monkeypatch.setattr(bookings_journal, "COALESCE_SECONDS", 0.0)
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "test.journal")
+
+def _lines(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def test_write_behind_writes_are_read_back_before_they_flush(store, monkeypatch):
+    monkeypatch.setenv("BOOKINGS_WRITE_BEHIND", "true")
+    journal = bookings._get_journal()
+    flushed = []  # hold the worker back until we've read
+    real_flush = journal._flush
+    monkeypatch.setattr(journal, "_flush", lambda: flushed and real_flush())
+    bid = bookings.append_booking_dicts([_row("A")])[0]
+    assert store.load_events() == []
+    bookings._forget_state()
+    assert bookings.load_bookings()["booking_id"].tolist() == [bid]
+    flushed.append(True)
+    assert journal.drain(5)
+    assert [e[2] for e in store.load_events()] == [bid]
+    assert _lines(journal.path) == []
+
+def test_replay_after_restart_skips_events_already_logged(store, journal_path):
+    first, second = _booked("A"), _booked("B")
+    store.append_events([first])  # the request applied, then the process died
+    with open(journal_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"op": bookings_journal.OP_EVENTS, "rows": [first, second]}) + "\n")
+    journal = bookings_journal.WriteBehindJournal(journal_path)
+    assert journal.stats()["replayed"] == 1
+    assert journal.drain(5)
+    assert [e[0] for e in store.load_events()] == [first[0], second[0]]
+    assert _lines(journal_path) == []
+
+def test_torn_last_line_is_ignored(store, journal_path):
+    event = _booked("A")
+    with open(journal_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"op": bookings_journal.OP_EVENTS, "rows": [event]}) + "\n")
+        f.write('{"op": "events", "rows": [["x"')  # crash mid-write: never acknowledged
+    journal = bookings_journal.WriteBehindJournal(journal_path)
+    assert journal.drain(5)
+    assert [e[0] for e in store.load_events()] == [event[0]]
+
+def test_failed_flush_retries_without_duplicates(store, journal_path, monkeypatch):
+    monkeypatch.setattr(bookings_journal, "RETRY_BASE_SECONDS", 0.0)
+    real_append = store.append_events
+    calls = []
+
+    def applied_then_failed(rows):
+        calls.append(rows)
+        real_append(rows)
+        if len(calls) == 1:
+            raise ConnectionError("response lost")
+
+    monkeypatch.setattr(store, "append_events", applied_then_failed)
+    journal = bookings_journal.WriteBehindJournal(journal_path)
+    events = [_booked("A"), _booked("B")]
+    journal.enqueue_events(events)
+    assert journal.drain(5)
+    assert [e[0] for e in store.load_events()] == [e[0] for e in events]
+    assert journal.stats()["failures"] == 1
+
+def test_back_to_back_snapshots_collapse(store, journal_path, monkeypatch):
+    writes = []
+    real_overwrite = store.overwrite
+    monkeypatch.setattr(store, "overwrite", lambda df: writes.append(len(df)) or real_overwrite(df))
+    journal = bookings_journal.WriteBehindJournal(journal_path)
+    header = bookings.REQUIRED_COLS
+    frames = [bookings._coerce_df(bookings.pd.DataFrame([_row(n) for n in names]), header)
+              for names in (["A"], ["A", "B"])]
+    with journal._lock:  # queue both before the worker can pick either up
+        for df in frames:
+            journal._append_line({"op": bookings_journal.OP_SNAPSHOT, "header": list(df.columns),
+                                  "rows": [[bookings._cell_text(v) for v in r]
+                                           for r in df.itertuples(index=False, name=None)]})
+        journal._entries = journal._read()
+    journal._wake.set()
+    assert journal.drain(5)
+    assert writes == [2]
+    assert store.load()["name"].tolist() == ["A", "B"]
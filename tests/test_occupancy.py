@@ -0,0 +1,136 @@
+# test_occupancy.py — NumPy occupancy index: free slots, DSPS blocks, capacity, earliest search
+from __future__ import annotations
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+import occupancy
+import slots
+
+MONDAY = date(2026, 1, 5)
+
+def _day(location: str, day: date, times) -> list:
+    out = []
+    for hh, mm in times:
+        start = datetime.combine(day, datetime.min.time()).replace(hour=hh, minute=mm)
+        out.append(slots.make_slot(location, start, start + timedelta(minutes=15)))
+    return out
+
+@pytest.fixture
+def slo(schedule_file):
+    schedule_file()
+    # 9:00, 9:15, 9:30, then a gap, 10:00, 10:15; Tuesday 9:00
+    return {
+        "Monday 01/05/26": _day("SLO AT Lab", MONDAY, [(9, 0), (9, 15), (9, 30), (10, 0), (10, 15)]),
+        "Tuesday 01/06/26": _day("SLO AT Lab", MONDAY + timedelta(days=1), [(9, 0)]),
+    }
+
+def _labels(blocks) -> list:
+    return [tuple(s.label.split(" ", 2)[2] for s in block) for block in blocks]
+
+def test_free_singles_and_dsps_blocks(slo):
+    index = occupancy.occupancy_index("SLO AT Lab", slo)
+    day = "Monday 01/05/26"
+    assert index.free_mask(day).tolist() == [True] * 5
+    # Blocks never span the 9:45 gap or run off the end of the day
+    assert _labels(index.free_blocks(day, 2)) == [("9:00–9:15 AM", "9:15–9:30 AM"),
+                                                  ("9:15–9:30 AM", "9:30–9:45 AM"),
+                                                  ("10:00–10:15 AM", "10:15–10:30 AM")]
+    assert _labels(index.free_blocks(day, 3)) == [("9:00–9:15 AM", "9:15–9:30 AM", "9:30–9:45 AM")]
+    assert index.free_blocks(day, 6) == []
+    assert index.free_mask("Sunday 01/04/26").tolist() == []
+
+def test_booked_slots_break_blocks(slo):
+    day = slo["Monday 01/05/26"]
+    index = occupancy.occupancy_index("SLO AT Lab", slo, [day[1].id])
+    assert index.free_mask("Monday 01/05/26").tolist() == [True, False, True, True, True]
+    assert _labels(index.free_blocks("Monday 01/05/26", 2)) == [("10:00–10:15 AM", "10:15–10:30 AM")]
+
+def test_book_and_release_update_in_place(slo):
+    day = slo["Monday 01/05/26"]
+    index = occupancy.occupancy_index("SLO AT Lab", slo)
+    index.book([day[0].id, day[1].id])
+    assert index.free_mask("Monday 01/05/26").tolist() == [False, False, True, True, True]
+    index.release([day[0].id])
+    index.release([day[0].id])  # never below zero
+    assert index.free_mask("Monday 01/05/26").tolist() == [True, False, True, True, True]
+    index.book([12345])  # not on the schedule: ignored
+    assert index.booked.sum() == 1
+
+def test_after_drops_past_blocks(slo):
+    day = slo["Monday 01/05/26"]
+    index = occupancy.occupancy_index("SLO AT Lab", slo)
+    assert _labels(index.free_blocks("Monday 01/05/26", 1, after=day[2].start)) == [("10:00–10:15 AM",),
+                                                                                    ("10:15–10:30 AM",)]
+    assert index.free_mask(None, after=day[-1].start).tolist() == [False] * 5 + [True]
+
+def test_schedule_arrays_are_shared_until_the_day_lists_change(slo):
+    first = occupancy.occupancy_index("SLO AT Lab", slo)
+    assert occupancy.occupancy_index("SLO AT Lab", slo).arrays is first.arrays
+    rolled = {k: v for k, v in slo.items() if k != "Monday 01/05/26"}
+    assert occupancy.occupancy_index("SLO AT Lab", rolled).arrays is not first.arrays
+
+def test_linked_marks_back_to_back_slots(slo):
+    arrays = occupancy.occupancy_index("SLO AT Lab", slo).arrays
+    assert arrays.linked.tolist() == [True, True, False, True, False, False]
+    assert arrays.spans == {"Monday 01/05/26": (0, 5), "Tuesday 01/06/26": (5, 6)}
+    assert np.array_equal(arrays.ends - arrays.starts, np.full(6, 15))
+
+# ---- capacity ----
+@pytest.fixture
+def two_examiners(schedule_file, slo):
+    schedule_file(capacity={"SLO AT Lab": [{"days": ["monday"], "start": "09:00", "end": "09:30",
+                                             "capacity": 2}]})
+    return slo
+
+def test_slots_stay_free_until_capacity_is_reached(two_examiners):
+    day = two_examiners["Monday 01/05/26"]
+    index = occupancy.occupancy_index("SLO AT Lab", two_examiners, [day[0].id, day[2].id])
+    assert (index.capacity(day[0].id), index.remaining(day[0].id)) == (2, 1)
+    assert index.free_mask("Monday 01/05/26").tolist() == [True, True, False, True, True]
+    index.book([day[0].id])
+    assert index.remaining(day[0].id) == 0
+    assert index.free_mask("Monday 01/05/26").tolist() == [False, True, False, True, True]
+    table = index.capacity_table("Monday 01/05/26")
+    assert table[["capacity", "booked", "remaining"]].values.tolist()[:3] == [[2, 2, 0], [2, 0, 2], [1, 1, 0]]
+
+# ---- earliest_blocks ----
+@pytest.fixture
+def campuses(schedule_file):
+    schedule_file()
+    next_monday = MONDAY + timedelta(days=7)
+    slo = {
+        "Monday 01/05/26": _day("SLO AT Lab", MONDAY, [(9, 0), (9, 15), (10, 0)]),
+        "Monday 01/12/26": _day("SLO AT Lab", next_monday, [(9, 0), (9, 15)]),
+    }
+    ncc = {
+        "Monday 01/05/26": _day("NCC AT Lab", MONDAY, [(9, 30), (9, 45)]),
+        "Monday 01/12/26": _day("NCC AT Lab", next_monday, [(8, 0)]),
+    }
+    return occupancy.occupancy_index("SLO AT Lab", slo), occupancy.occupancy_index("NCC AT Lab", ncc)
+
+def _where(blocks) -> list:
+    return [(b[0].location[:3], b[0].start_dt.strftime("%m/%d %H:%M"), len(b)) for b in blocks]
+
+def test_earliest_merges_campuses_in_start_order(campuses):
+    assert _where(occupancy.earliest_blocks(campuses, limit=4)) == [
+        ("SLO", "01/05 09:00", 1), ("SLO", "01/05 09:15", 1), ("NCC", "01/05 09:30", 1), ("NCC", "01/05 09:45", 1),
+    ]
+    assert len(occupancy.earliest_blocks(campuses, limit=100)) == 8
+
+def test_earliest_dsps_blocks(campuses):
+    assert _where(occupancy.earliest_blocks(campuses, limit=5, n=2)) == [
+        ("SLO", "01/05 09:00", 2), ("NCC", "01/05 09:30", 2), ("SLO", "01/12 09:00", 2),
+    ]
+
+def test_earliest_respects_bookings_after_and_skipped_weeks(campuses):
+    slo, ncc = campuses
+    slo.book([slo.arrays.slots[0].id])
+    assert _where(occupancy.earliest_blocks(campuses, limit=1)) == [("SLO", "01/05 09:15", 1)]
+    after = slo.arrays.slots[1].start
+    assert _where(occupancy.earliest_blocks(campuses, limit=1, after=after)) == [("NCC", "01/05 09:30", 1)]
+    week = MONDAY.isocalendar()[1]
+    assert _where(occupancy.earliest_blocks(campuses, limit=2, skip_weeks=[week])) == [
+        ("NCC", "01/12 08:00", 1), ("SLO", "01/12 09:00", 1),
+    ]
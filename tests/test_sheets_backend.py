@@ -0,0 +1,148 @@
+# test_sheets_backend.py — SheetsBackend against an in-memory spreadsheet (see conftest)
+from __future__ import annotations
+
+import gspread
+import pytest
+
+import bookings
+
+def _api_error(code: int) -> gspread.exceptions.APIError:
+    response = type("Response", (), {"text": "", "json": lambda self: {
+        "error": {"code": code, "message": "test", "status": "TEST"}}})()
+    return gspread.exceptions.APIError(response)
+
+def _booking(name: str) -> dict:
+    return {"booking_id": f"id-{name}", "name": name, "email": f"{name.lower()}@my.cuesta.edu",
+            "slot": "Monday 01/05/26 9:00–9:15 AM", "lab_location": "SLO AT Lab", "status": "booked"}
+
+@pytest.fixture
+def backend(spreadsheet):
+    backend = bookings.SheetsBackend()
+    for name in ("A", "B", "C"):
+        backend.append(_booking(name))
+    return backend
+
+# ---- single read per load, cached header ----
+def test_load_reads_the_sheet_once(backend, spreadsheet):
+    tab = spreadsheet.sheet1
+    tab.calls.clear()
+    bookings.SheetsBackend().load()
+    assert tab.calls.count("get_all_values") == 1
+
+def test_append_reuses_the_cached_header(backend, spreadsheet):
+    tab = spreadsheet.sheet1
+    tab.calls.clear()
+    backend.append(_booking("D"))
+    assert tab.calls == ["append"]
+
+def test_append_rejected_with_400_rereads_header_and_retries(backend, spreadsheet, monkeypatch):
+    tab = spreadsheet.sheet1
+    real = tab.append_row
+    attempts = []
+
+    def reject_once(values, **kwargs):
+        attempts.append(values)
+        if len(attempts) == 1:
+            raise _api_error(400)
+        real(values, **kwargs)
+
+    monkeypatch.setattr(tab, "append_row", reject_once)
+    backend.append(_booking("D"))
+    assert len(attempts) == 2
+    assert backend.load()["name"].tolist() == ["A", "B", "C", "D"]
+
+@pytest.mark.parametrize("code", [500, 503])
+def test_append_server_error_is_not_resent(backend, spreadsheet, monkeypatch, code):
+    tab = spreadsheet.sheet1
+    real = tab.append_row
+    attempts = []
+
+    def applied_then_failed(values, **kwargs):
+        attempts.append(values)
+        real(values, **kwargs)
+        raise _api_error(code)
+
+    monkeypatch.setattr(tab, "append_row", applied_then_failed)
+    with pytest.raises(gspread.exceptions.APIError):
+        backend.append(_booking("D"))
+    assert len(attempts) == 1
+    assert backend.load()["name"].tolist() == ["A", "B", "C", "D"]
+
+# ---- incremental loads ----
+def _full_loads() -> int:
+    return bookings._LOAD_STATS["full"]
+
+def test_delta_load_fetches_only_new_rows(backend, spreadsheet):
+    backend.load()
+    other = bookings.SheetsBackend()  # another app instance
+    other.append(_booking("D"))
+    full, fetched = _full_loads(), bookings._LOAD_STATS["rows_fetched"]
+    spreadsheet.sheet1.calls.clear()
+    assert backend.load()["name"].tolist() == ["A", "B", "C", "D"]
+    assert _full_loads() == full
+    assert bookings._LOAD_STATS["rows_fetched"] - fetched == 1
+    assert "get_all_values" not in spreadsheet.sheet1.calls
+
+def test_unchanged_sheet_costs_one_request(backend, spreadsheet):
+    backend.load()
+    requests, full = spreadsheet.batch_gets, _full_loads()
+    backend.load()
+    assert spreadsheet.batch_gets == requests + 1
+    assert _full_loads() == full
+
+def test_another_instances_update_forces_a_full_reload(backend, spreadsheet):
+    backend.load()
+    other = bookings.SheetsBackend()
+    other.update({"id-B": {"grade": "91"}})
+    full = _full_loads()
+    df = backend.load()
+    assert _full_loads() == full + 1
+    assert df.set_index("booking_id").loc["id-B", "grade"] == "91"
+
+def test_own_update_keeps_the_delta_path(backend):
+    backend.load()
+    backend.update({"id-B": {"grade": "91"}})
+    full = _full_loads()
+    assert backend.load().set_index("booking_id").loc["id-B", "grade"] == "91"
+    assert _full_loads() == full
+
+def test_another_instances_overwrite_forces_a_full_reload(backend):
+    backend.load()
+    other = bookings.SheetsBackend()
+    df = other.load()
+    other.overwrite(df[df["name"] != "A"])
+    assert backend.load()["name"].tolist() == ["B", "C"]
+
+def test_hand_edits_show_up_after_the_full_reload_interval(backend, spreadsheet, monkeypatch):
+    backend.load()
+    tab = spreadsheet.sheet1
+    tab.grid[2][bookings.REQUIRED_COLS.index("slot")] = "EDITED"  # no revision bump
+    assert backend.load()["slot"].iloc[1] != "EDITED"
+    monkeypatch.setattr(bookings, "FULL_RELOAD_SECONDS", 0)
+    assert backend.load()["slot"].iloc[1] == "EDITED"
+
+def test_header_change_forces_a_full_reload(backend, spreadsheet):
+    backend.load()
+    tab = spreadsheet.sheet1
+    tab.grid[0].append("notes")
+    full = _full_loads()
+    assert "notes" in backend.load().columns
+    assert _full_loads() == full + 1
+
+def test_deleted_revision_tab_forces_a_full_reload(backend, spreadsheet):
+    backend.load()
+    del spreadsheet.tabs[bookings.REVISION_SHEET_NAME]
+    bookings._reset_connection()
+    full = _full_loads()
+    original = spreadsheet.values_batch_get
+
+    def missing_tab(ranges, params=None):
+        try:
+            return original(ranges, params)
+        except KeyError:
+            raise _api_error(400)
+
+    spreadsheet.values_batch_get = missing_tab
+    assert len(backend.load()) == 3
+    assert _full_loads() == full + 1
+    assert bookings.REVISION_SHEET_NAME in spreadsheet.tabs
@@ -0,0 +1,83 @@
+# test_slot_parsing.py — slot label parsing: canonical fast path, tolerant fallback, memoization
+from __future__ import annotations
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+import utils
+from slots import generate_slot_label
+
+def _label(start: datetime, minutes: int = 15) -> str:
+    return generate_slot_label(start, start, start + timedelta(minutes=minutes))
+
+@pytest.mark.parametrize("label, start, end", [
+    ("Monday 01/05/26 9:00–9:15 AM", datetime(2026, 1, 5, 9, 0), datetime(2026, 1, 5, 9, 15)),
+    ("Monday 01/05/26 12:45–1:00 PM", datetime(2026, 1, 5, 12, 45), datetime(2026, 1, 5, 13, 0)),
+    ("Monday 01/05/26 8:45–9:00 PM", datetime(2026, 1, 5, 20, 45), datetime(2026, 1, 5, 21, 0)),
+    # Crosses noon: one PM for both times, the start is the morning one
+    ("Monday 01/05/26 11:45–12:00 PM", datetime(2026, 1, 5, 11, 45), datetime(2026, 1, 5, 12, 0)),
+])
+def test_canonical_labels(label, start, end):
+    assert utils._parse_canonical(label) == (start, end)
+    assert utils.parse_slot_range(label) == (start, end)
+
+def test_fast_path_agrees_with_the_tolerant_parser():
+    day = datetime(2026, 1, 5, 8, 0)
+    for i in range(13 * 4):  # 8:00 AM through 9:00 PM starts
+        label = _label(day + timedelta(minutes=15 * i))
+        assert utils._parse_canonical(label) == utils._parse_tolerant(label), label
+
+def test_tolerant_noon_crossing_matches_the_fast_path():
+    label = "Monday 01/05/26 11:45–12:00 PM"
+    assert utils._parse_tolerant(label) == utils._parse_canonical(label)
+
+@pytest.mark.parametrize("label", [
+    "Mon 1/5/2026 09:00-09:15 am",
+    "Monday 01/05/26 9:00 to 9:15 AM",
+    "Monday 01/05/26 9:00 AM–9:15 AM",
+    "Monday 01/05/26 9:00—9:15",
+])
+def test_other_shapes_fall_back_to_the_tolerant_parser(label):
+    assert utils._parse_canonical(label) is None
+    assert utils.parse_slot_range(label) == (datetime(2026, 1, 5, 9, 0), datetime(2026, 1, 5, 9, 15))
+
+def test_impossible_dates_are_reported():
+    assert utils._parse_canonical("Monday 02/30/26 9:00–9:15 AM") is None
+    with pytest.raises(ValueError):
+        utils.parse_slot_range("Monday 02/30/26 9:00–9:15 AM")
+    with pytest.raises(ValueError):
+        utils.parse_slot_time("not a slot")
+
+def test_results_are_memoized():
+    utils.parse_slot_range.cache_clear()
+    label = "Monday 01/05/26 9:00–9:15 AM"
+    assert utils.parse_slot_range(label) is utils.parse_slot_range(label)
+    info = utils.parse_slot_range.cache_info()
+    assert (info.hits, info.misses, info.maxsize) == (1, 1, utils.SLOT_CACHE_SIZE)
+
+def test_week_helpers():
+    assert utils.slot_week("Monday 01/05/26 9:00–9:15 AM") == 2
+    assert utils.same_iso_week("Monday 01/05/26 9:00–9:15 AM", "Sunday 01/11/26 9:00–9:15 AM")
+    assert not utils.same_iso_week("Sunday 01/04/26 9:00–9:15 AM", "Monday 01/05/26 9:00–9:15 AM")
+
+# ---- parse_slot_series ----
+def test_series_matches_the_scalar_parser():
+    labels = [_label(datetime(2026, 1, 5, 8, 0) + timedelta(minutes=15 * i)) for i in range(52)]
+    labels += ["Monday 01/05/26 11:45–12:00 PM", "Mon 1/5/2026 09:00-09:15 am"]
+    parsed = utils.parse_slot_series(pd.Series(labels))
+    for label, start, end in zip(labels, parsed["start"], parsed["end"]):
+        assert (start, end) == utils.parse_slot_range(label), label
+
+def test_series_keeps_the_index_and_marks_bad_labels_nat():
+    s = pd.Series(["Monday 01/05/26 9:00–9:15 AM", "garbage", None, "Monday 02/30/26 9:00–9:15 AM",
+                   "Monday 01/05/26 9:00–9:15 AM"], index=[10, 11, 12, 13, 14])
+    parsed = utils.parse_slot_series(s)
+    assert parsed.index.tolist() == [10, 11, 12, 13, 14]
+    assert str(parsed["start"].dtype).startswith("datetime64")
+    assert parsed["start"].isna().tolist() == [False, True, True, True, False]
+    assert parsed.loc[14, "end"] == pd.Timestamp(2026, 1, 5, 9, 15)
+
+def test_series_of_nothing():
+    parsed = utils.parse_slot_series(pd.Series([], dtype=object))
+    assert parsed.empty and list(parsed.columns) == ["start", "end"]
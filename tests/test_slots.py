@@ -0,0 +1,105 @@
+# test_slots.py — Slot records and ids, the schedule file, and per-day materialization
+from __future__ import annotations
+from datetime import date, datetime
+
+import pytest
+
+import slots
+
+MONDAY = date(2026, 1, 5)
+
+def test_slot_ids_round_trip():
+    slot = slots.make_slot("NCC AT Lab", datetime(2026, 1, 5, 9, 0), datetime(2026, 1, 5, 9, 15))
+    assert (slot.location, slot.minutes) == ("NCC AT Lab", 15)
+    assert slot.start == slots.epoch_minute(datetime(2026, 1, 5, 9, 0))
+    assert slots.slot_from_id(slot.id) == slot
+    assert slot.label == "Monday 01/05/26 9:00–9:15 AM"
+    assert (slot.start_dt, slot.end_dt) == (datetime(2026, 1, 5, 9, 0), datetime(2026, 1, 5, 9, 15))
+
+def test_slot_ids_tell_locations_and_lengths_apart():
+    start, end = datetime(2026, 1, 5, 9, 0), datetime(2026, 1, 5, 9, 15)
+    ids = {slots.make_slot(loc, start, end).id for loc in slots.LOCATIONS}
+    ids.add(slots.make_slot("SLO AT Lab", start, datetime(2026, 1, 5, 9, 30)).id)
+    assert len(ids) == 3
+
+def test_slots_are_interned():
+    start, end = datetime(2026, 1, 5, 9, 0), datetime(2026, 1, 5, 9, 15)
+    assert slots.make_slot("SLO AT Lab", start, end) is slots.make_slot("SLO AT Lab", start, end)
+
+def test_slot_id_works_on_series():
+    import pandas as pd
+    starts = pd.Series([100, 200])
+    assert slots.slot_id(1, starts, 15).tolist() == [slots.slot_id(1, 100, 15), slots.slot_id(1, 200, 15)]
+
+def test_unknown_location_code():
+    assert slots.slot_from_id(slots.slot_id(0, 100, 15)).location == ""
+
+# ---- schedule file and materialization ----
+def test_load_schedule(schedule_file):
+    path = schedule_file(slot_minutes=20, closures=["2026-01-05"],
+                         campus_closures={"NCC AT Lab": ["2026-01-12"]})
+    schedule = slots.load_schedule(path)
+    assert (schedule.slot_minutes, schedule.horizon_days, schedule.default_capacity) == (20, 21, 1)
+    assert schedule.hours["SLO AT Lab"] == {0: (datetime(1, 1, 1, 9).time(), datetime(1, 1, 1, 10).time())}
+    assert schedule.closures["SLO AT Lab"] == {MONDAY}
+    assert schedule.closures["NCC AT Lab"] == {MONDAY, date(2026, 1, 12)}
+
+def test_unknown_weekday_is_rejected(schedule_file):
+    path = schedule_file(campuses={"SLO AT Lab": {"funday": ["09:00", "10:00"]}})
+    with pytest.raises(ValueError, match="funday"):
+        slots.load_schedule(path)
+
+def _days(today, horizon=7, minutes=None):
+    return dict(slots._materialize(today, horizon, minutes))
+
+def test_materialize_builds_open_days_only(schedule_file):
+    schedule_file(closures=["2026-01-12"])
+    days = _days(MONDAY, horizon=14)
+    assert len(days) == 14
+    slo, ncc = days["Monday 01/05/26"]
+    assert [s.label for s in slo] == ["Monday 01/05/26 9:00–9:15 AM", "Monday 01/05/26 9:15–9:30 AM",
+                                      "Monday 01/05/26 9:30–9:45 AM", "Monday 01/05/26 9:45–10:00 AM"]
+    assert ncc[0].label == "Monday 01/05/26 9:30–9:45 AM" and ncc[0].location == "NCC AT Lab"
+    assert days["Tuesday 01/06/26"] == [[], []]
+    assert days["Monday 01/12/26"] == [[], []]  # closed
+
+def test_materialize_skips_a_short_tail_slot(schedule_file):
+    schedule_file(campuses={"SLO AT Lab": {"monday": ["09:00", "09:40"]}})
+    slo, _ = _days(MONDAY)["Monday 01/05/26"]
+    assert [s.minutes for s in slo] == [15, 15]
+    assert [s.minutes for s in _days(MONDAY, minutes=20)["Monday 01/05/26"][0]] == [20, 20]
+
+def test_materialized_days_are_cached_and_roll_forward(schedule_file):
+    schedule_file()
+    first = _days(MONDAY)
+    again = _days(MONDAY)
+    assert all(again[k][0] is first[k][0] for k in first)
+    next_day = _days(date(2026, 1, 6))
+    assert "Monday 01/05/26" not in next_day
+    assert next_day["Tuesday 01/06/26"][0] is first["Tuesday 01/06/26"][0]
+    assert "Monday 01/12/26" in next_day
+    assert not any(k[0] < date(2026, 1, 6) for k in slots._SCHEDULE_CACHE["days"])
+
+def test_schedule_file_changes_rebuild_the_days(schedule_file):
+    schedule_file()
+    before = _days(MONDAY)["Monday 01/05/26"][0]
+    schedule_file(closures=["2026-01-05"])
+    assert _days(MONDAY)["Monday 01/05/26"] == [[], []]
+    assert len(before) == 4
+
+# ---- capacity windows ----
+def test_capacity_windows_last_match_wins(schedule_file):
+    schedule_file(default_capacity=1, capacity={"SLO AT Lab": [
+        {"days": ["monday"], "start": "09:00", "end": "09:30", "capacity": 2},
+        {"dates": ["2026-01-05"], "start": "09:15", "capacity": 3},
+    ]})
+    schedule = slots.current_schedule()
+    at = lambda hh, mm, d=MONDAY: datetime.combine(d, datetime.min.time()).replace(hour=hh, minute=mm)
+    assert schedule.capacity_of("SLO AT Lab", at(9, 0)) == 2
+    assert schedule.capacity_of("SLO AT Lab", at(9, 15)) == 3
+    assert schedule.capacity_of("SLO AT Lab", at(9, 45)) == 3
+    assert schedule.capacity_of("SLO AT Lab", at(9, 15, date(2026, 1, 12))) == 2
+    assert schedule.capacity_of("SLO AT Lab", at(9, 30, date(2026, 1, 12))) == 1  # end is exclusive
+    assert schedule.capacity_of("NCC AT Lab", at(9, 0)) == 1
+    slot = slots.make_slot("SLO AT Lab", at(9, 0), at(9, 15))
+    assert slots.slot_capacity(slot.id) == 2
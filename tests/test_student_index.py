@@ -0,0 +1,53 @@
+# test_student_index.py — per-student ISO-week index behind the one-per-week rule
+from __future__ import annotations
+from datetime import date
+
+import pandas as pd
+
+import bookings
+
+def _row(name: str, slot: str, exam: str = "2", **fields) -> dict:
+    return {"name": name, "email": f"{name.lower()}@my.cuesta.edu", "exam_number": exam,
+            "slot": slot, "lab_location": "SLO AT Lab", "status": bookings.STATUS_BOOKED, **fields}
+
+def _frame(rows) -> pd.DataFrame:
+    df = bookings._coerce_df(pd.DataFrame(rows), bookings.REQUIRED_COLS)
+    df["booking_id"] = [f"id{i}" for i in range(len(df))]
+    return df
+
+def _ids(weeks) -> dict:
+    return {week: sorted(b.booking_id for b in entries) for week, entries in weeks.items()}
+
+def test_index_groups_active_bookings_by_student_exam_and_week():
+    df = _frame([
+        _row("A", "Monday 01/05/26 9:00–9:15 AM", group_id="g1"),
+        _row("A", "Monday 01/05/26 9:15–9:30 AM", group_id="g1"),   # DSPS pair, same week
+        _row("A", "Monday 01/12/26 9:00–9:15 AM"),
+        _row("A", "Tuesday 01/06/26 9:00–9:15 AM", exam="3"),
+        _row("A", "Wednesday 01/07/26 9:00–9:15 AM", status=bookings.STATUS_CANCELED),
+        _row("A", "not a slot"),
+        _row("B", "Monday 01/05/26 9:00–9:15 AM"),
+    ])
+    index = bookings.StudentIndex(df)
+    weeks = index.weeks("a@my.cuesta.edu", "2")
+    assert _ids(weeks) == {2: ["id0", "id1"], 3: ["id2"]}
+    assert {b.group_id for b in weeks[2]} == {"g1"}
+    assert weeks[2][0].slot_date == date(2026, 1, 5)
+    assert _ids(index.weeks("a@my.cuesta.edu", "3")) == {2: ["id3"]}
+    assert index.weeks("nobody@my.cuesta.edu", "2") == {}
+
+def test_update_moves_only_the_touched_bookings():
+    df = _frame([_row("A", "Monday 01/05/26 9:00–9:15 AM"), _row("A", "Monday 01/12/26 9:00–9:15 AM")])
+    index = bookings.StudentIndex(df)
+    df.loc[0, "slot"] = "Monday 01/19/26 9:00–9:15 AM"       # rescheduled
+    df.loc[1, "status"] = bookings.STATUS_CANCELED             # canceled
+    index.update(df, {"id0": 0, "id1": 1}, ["id0", "id1"])
+    assert _ids(index.weeks("a@my.cuesta.edu", "2")) == {4: ["id0"]}
+    index.update(df, {"id0": 0, "id1": 1}, ["id0", "id1", "gone"])
+    assert _ids(index.weeks("a@my.cuesta.edu", "2")) == {4: ["id0"]}
+
+def test_student_weeks_follows_our_own_writes(store):
+    bid = bookings.claim_slots([], [_row("A", "Monday 01/05/26 9:00–9:15 AM")])[0]
+    assert _ids(bookings.student_weeks("a@my.cuesta.edu", "2")) == {2: [bid]}
+    moved = bookings.claim_slots([bid], [_row("A", "Monday 01/12/26 9:00–9:15 AM")])[0]
+    assert _ids(bookings.student_weeks("a@my.cuesta.edu", "2")) == {3: [moved]}
@@ -1,542 +1,803 @@
-# ui_components.py — unified components for Student Sign-Up, Admin, Tutor
-from __future__ import annotations
-from datetime import datetime
-from typing import List, Dict, Any
-from uuid import uuid4
-
-import pandas as pd
-import pytz
-import streamlit as st
-
-from bookings import (
-    load_bookings,
-    overwrite_bookings,
-    append_booking_dict,   # use dict-based appends to avoid column-order issues
-)
-from utils import parse_slot_time
-from email_utils import send_confirmation_email
-
-# ----------------------------- Constants -----------------------------
-EXAM_NUMBERS = [str(i) for i in range(2, 11)]
-
-STATUS_BOOKED = "booked"
-STATUS_CANCELED = "canceled"
-DSPS_ANONYMIZE_SECOND_SLOT = True  # display-only if you ever show rosters
-
-# Canonical columns used throughout the app (superset of legacy)
-REQUIRED_COLS = [
-    "name",
-    "email",
-    "student_id",
-    "dsps",
-    "slot",
-    "lab_location",
-    "exam_number",
-    "grade",
-    "graded_by",
-    "group_id",
-    "status",
-    "created_at",
-    "updated_at",
-]
-
-PACIFIC = pytz.timezone("US/Pacific")
-
-# --------------------------- Data Utilities --------------------------
-def _ensure_columns(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    for c in REQUIRED_COLS:
-        if c not in df.columns:
-            if c in ("grade", "graded_by", "group_id"):
-                df[c] = ""
-            elif c == "status":
-                df[c] = STATUS_BOOKED
-            elif c in ("created_at", "updated_at"):
-                df[c] = ""
-            else:
-                df[c] = ""
-    # Normalize dsps to bool if possible
-    if "dsps" in df.columns:
-        df["dsps"] = df["dsps"].apply(
-            lambda v: True
-            if str(v).strip().lower() in ("true", "1", "yes")
-            else False if str(v).strip().lower() in ("false", "0", "no")
-            else v
-        )
-    return df
-
-def _active(df: pd.DataFrame) -> pd.DataFrame:
-    df = _ensure_columns(df)
-    # treat blank/na status as active (back-compat)
-    mask = (df["status"].isin([STATUS_BOOKED, ""])) | (df["status"].isna())
-    return df[mask].copy()
-
-def _now_iso() -> str:
-    return datetime.now(PACIFIC).isoformat(timespec="seconds")
-
-def _assign_group_ids_for_legacy_dsps(df: pd.DataFrame) -> pd.DataFrame:
-    """
-    Backfill missing group_id on older DSPS rows (those may have had '(DSPS block)' etc.).
-    We group by (email, exam_number, lab_location, calendar-date) and assign a fresh group_id if >=2 rows.
-    """
-    df = _ensure_columns(df)
-    dsps_rows = df[(df["dsps"] == True) & ((df["group_id"] == "") | (df["group_id"].isna()))]
-    if dsps_rows.empty:
-        return df
-
-    def _date_of(slot_str: str):
-        try:
-            return parse_slot_time(slot_str).date()
-        except Exception:
-            return None
-
-    dsps_rows = dsps_rows.copy()
-    dsps_rows["__date"] = dsps_rows["slot"].apply(_date_of)
-
-    keys = ["email", "exam_number", "lab_location", "__date"]
-    for _, g in dsps_rows.groupby(keys):
-        if len(g) >= 2:
-            gid = str(uuid4())
-            df.loc[g.index, "group_id"] = gid
-            # Normalize status
-            df.loc[g.index, "status"] = df.loc[g.index, "status"].replace("", STATUS_BOOKED)
-            df.loc[g.index, "updated_at"] = _now_iso()
-
-    if "__date" in df.columns:
-        df = df.drop(columns=["__date"], errors="ignore")
-    return df
-
-# --------------------------- Tutor Panel -----------------------------
-def render_tutor_panel(course_hint="BIO 205: Human Anatomy", knowledge_enabled=False):
-    """
-    Thin wrapper so you can call this from anywhere without import cycles.
-    """
-    from tutor import render_chat  # lazy import to avoid circular deps
-    st.title("🧠 BIO 205 Tutor")
-    st.caption("Conversational study help for BIO 205.")
-    render_chat(course_hint=course_hint, knowledge_enabled=knowledge_enabled)
-
-# ------------------------ Student Sign-Up UI -------------------------
-def show_student_signup(bookings_df: pd.DataFrame, slo_slots_by_day: Dict[str, List[str]],
-                        ncc_slots_by_day: Dict[str, List[str]], now: datetime):
-    bookings_df = _ensure_columns(bookings_df)
-    active_df = _active(bookings_df)
-
-    st.markdown(f"Current Pacific Time: **{now.strftime('%A, %B %d, %Y %I:%M %p')}**")
-
-    st.markdown("""
-    **Please read before booking:**
-    - You may sign up for either location (SLO or NCC).
-    - Once booked, you will receive email confirmation.
-    - You may only sign up for **one appointment per week** for the same exam.
-    - DSPS students may book a **double time block** if needed by clicking "I am a DSPS student".
-    - You can reschedule future appointments, but you **cannot reschedule on the day** of your scheduled appointment.
-    """)
-
-    # --- Form Fields ---
-    name = st.text_input("Enter your full name:")
-    email = st.text_input("Enter your official Cuesta email:")
-    student_id = st.text_input("Enter your Student ID:")
-    exam_number = st.selectbox("Which oral exam are you signing up for?", EXAM_NUMBERS)
-    dsps = st.checkbox("I am a DSPS student")
-    lab_location = st.selectbox("Choose your AT Lab location:", ["SLO AT Lab", "NCC AT Lab"])
-
-    if email and not (email.lower().endswith("@my.cuesta.edu") or email.lower().endswith("@cuesta.edu")):
-        st.error("Please use your official Cuesta email ending in @my.cuesta.edu or @cuesta.edu")
-        return
-    if name and email and student_id and not student_id.startswith("900"):
-        st.error("Student ID must start with 900.")
-        return
-
-    slots_by_day = slo_slots_by_day if lab_location == "SLO AT Lab" else ncc_slots_by_day
-    if not slots_by_day:
-        st.info("No availability has been configured yet.")
-        return
-
-    selected_day = st.selectbox("Choose a day:", list(slots_by_day.keys()))
-
-    # Build availability from ACTIVE bookings only
-    active_slots = set(active_df["slot"].values)
-
-    if dsps:
-        available_slots = []
-        day_slots = slots_by_day[selected_day]
-        for i in range(len(day_slots) - 1):
-            s1, s2 = day_slots[i], day_slots[i + 1]
-            # both slots must be free and in the future
-            if (s1 not in active_slots and s2 not in active_slots
-                and PACIFIC.localize(parse_slot_time(s1)) > now
-                and PACIFIC.localize(parse_slot_time(s2)) > now):
-                available_slots.append(f"{s1} and {s2}")
-    else:
-        available_slots = [
-            s for s in slots_by_day[selected_day]
-            if s not in active_slots and PACIFIC.localize(parse_slot_time(s)) > now
-        ]
-
-    if not available_slots:
-        st.info("No available slots for this day.")
-        return
-
-    selected_slot = st.selectbox("Choose a time:", available_slots)
-
-    if st.button("Submit Booking") and (
-        (not dsps and selected_slot) or (dsps and " and " in selected_slot)
-    ):
-        # Validate form completeness
-        if not all([name, email, student_id, selected_slot]):
-            st.error("Please fill out all required fields.")
-            return
-
-        # Enforce one-per-week-per-exam & reschedule safely (not same day)
-        first_slot_str = selected_slot.split(" and ")[0] if dsps else selected_slot
-        target_week = parse_slot_time(first_slot_str).isocalendar().week
-        target_date = parse_slot_time(first_slot_str).date()
-        today = datetime.now(PACIFIC).date()
-
-        student_bookings = active_df[
-            (active_df["email"] == email) & (active_df["exam_number"] == exam_number)
-        ]
-        weeks = student_bookings["slot"].apply(lambda s: parse_slot_time(s).isocalendar().week)
-
-        # Start from canonical DF for mutations
-        updated_df = bookings_df.copy()
-
-        if target_week in weeks.values:
-            same_week_rows = student_bookings[student_bookings["slot"].apply(
-                lambda s: parse_slot_time(s).isocalendar().week == target_week
-            )]
-
-            # no rescheduling on the same calendar day
-            if any(parse_slot_time(s).date() == today for s in same_week_rows["slot"].tolist()):
-                st.warning("You cannot reschedule an appointment on the day of your appointment.")
-                return
-
-            # Cancel by group if available, otherwise cancel matching single(s)
-            if same_week_rows["group_id"].replace("", pd.NA).notna().any():
-                for gid in same_week_rows["group_id"].unique():
-                    if not gid:
-                        continue
-                    mask = updated_df["group_id"] == gid
-                    updated_df.loc[mask, "status"] = STATUS_CANCELED
-                    updated_df.loc[mask, "updated_at"] = _now_iso()
-            else:
-                mask = (
-                    (updated_df["email"] == email) &
-                    (updated_df["exam_number"] == exam_number) &
-                    (updated_df["slot"].apply(lambda s: parse_slot_time(s).isocalendar().week == target_week)) &
-                    ((updated_df["status"].isin(["", STATUS_BOOKED])) | updated_df["status"].isna())
-                )
-                updated_df.loc[mask, "status"] = STATUS_CANCELED
-                updated_df.loc[mask, "updated_at"] = _now_iso()
-
-            overwrite_bookings(updated_df)
-            bookings_df = updated_df  # keep in sync
-
-        # --- Create new booking rows ---
-        created_at = _now_iso()
-
-        if dsps:
-            s1, s2 = selected_slot.split(" and ")
-            gid = str(uuid4())
-
-            # Write FULL name on both rows; anonymize only in any student-facing roster later
-            for s in (s1, s2):
-                append_booking_dict({
-                    "name": name,
-                    "email": email,
-                    "student_id": student_id,
-                    "dsps": True,
-                    "slot": s,
-                    "lab_location": lab_location,
-                    "exam_number": exam_number,
-                    "grade": "",
-                    "graded_by": "",
-                    "group_id": gid,
-                    "status": STATUS_BOOKED,
-                    "created_at": created_at,
-                    "updated_at": created_at,
-                })
-
-            st.success(f"Your DSPS appointment has been recorded for:\n- {s1}\n- {s2}")
-            send_confirmation_email(email, name, f"{s1} and {s2}", lab_location)
-
-        else:
-            append_booking_dict({
-                "name": name,
-                "email": email,
-                "student_id": student_id,
-                "dsps": False,
-                "slot": selected_slot,
-                "lab_location": lab_location,
-                "exam_number": exam_number,
-                "grade": "",
-                "graded_by": "",
-                "group_id": str(uuid4()),
-                "status": STATUS_BOOKED,
-                "created_at": created_at,
-                "updated_at": created_at,
-            })
-            st.success("Your appointment has been recorded!")
-            send_confirmation_email(email, name, selected_slot, lab_location)
-
-        st.rerun()
-
-# -------------------- Availability Settings (stub) --------------------
-def show_availability_settings(*args, **kwargs):
-    st.info("Availability settings coming soon.")
-
-# --------------------------- Admin View UI ----------------------------
-def show_admin_view(bookings_df: pd.DataFrame, slo_slots_by_day: Dict[str, List[str]],
-                    ncc_slots_by_day: Dict[str, List[str]], admin_passcode: str):
-    passcode_input = st.text_input("Enter admin passcode:", type="password")
-    if passcode_input != admin_passcode:
-        if passcode_input:
-            st.error("Incorrect passcode.")
-        return
-    st.success("Access granted.")
-
-    # Normalize schema + upgrade legacy DSPS pairs with group_id
-    bookings_df = _ensure_columns(bookings_df)
-    upgraded_df = _assign_group_ids_for_legacy_dsps(bookings_df)
-    if not upgraded_df.equals(bookings_df):
-        overwrite_bookings(upgraded_df)
-        bookings_df = upgraded_df
-
-    active_df = _active(bookings_df)
-
-    # --- Campus views ---
-    slo_bookings = active_df[active_df["lab_location"] == "SLO AT Lab"]
-    ncc_bookings = active_df[active_df["lab_location"] == "NCC AT Lab"]
-
-    st.subheader("SLO AT Lab Bookings")
-    st.dataframe(slo_bookings)
-    st.download_button("Download All SLO Bookings", slo_bookings.to_csv(index=False), file_name="slo_bookings.csv")
-
-    st.subheader("NCC AT Lab Bookings")
-    st.dataframe(ncc_bookings)
-    st.download_button("Download All NCC Bookings", ncc_bookings.to_csv(index=False), file_name="ncc_bookings.csv")
-
-    # --- Today's Appointments ---
-    st.subheader("Download Today's Appointments")
-    today_str = pd.Timestamp.now(tz=PACIFIC).strftime("%m/%d/%y")
-
-    def _today_sorted(df: pd.DataFrame) -> pd.DataFrame:
-        df2 = df[df["slot"].str.contains(today_str, na=False)].copy()
-        if not df2.empty:
-            df2["slot_dt"] = df2["slot"].apply(parse_slot_time)
-            df2 = df2.sort_values("slot_dt").drop(columns="slot_dt")
-        return df2
-
-    todays_slo = _today_sorted(slo_bookings)
-    todays_ncc = _today_sorted(ncc_bookings)
-
-    if not todays_slo.empty:
-        st.markdown("### SLO AT Lab – Today")
-        st.dataframe(todays_slo)
-        st.download_button("Download Today's SLO Appointments", todays_slo.to_csv(index=False), file_name="todays_slo_appointments.csv")
-    else:
-        st.info("No SLO appointments scheduled for today.")
-
-    if not todays_ncc.empty:
-        st.markdown("### NCC AT Lab – Today")
-        st.dataframe(todays_ncc)
-        st.download_button("Download Today's NCC Appointments", todays_ncc.to_csv(index=False), file_name="todays_ncc_appointments.csv")
-    else:
-        st.info("No NCC appointments scheduled for today.")
-
-    # --- Reschedule (group-aware for DSPS) ---
-    st.subheader("Reschedule a Student Appointment")
-    if active_df.empty:
-        st.info("No active bookings to reschedule.")
-        return
-
-    # Build label list; DSPS groups appear once (by earliest slot)
-    display_rows: List[Dict[str, Any]] = []
-    seen_groups = set()
-
-    for idx, row in active_df.iterrows():
-        gid = str(row.get("group_id", "") or "")
-        if gid:
-            if gid in seen_groups:
-                continue
-            g = active_df[active_df["group_id"] == gid]
-            earliest = g.sort_values("slot").iloc[0]
-            label = f"[DSPS] {earliest['name']} ({earliest['email']}) - {earliest['lab_location']} - {', '.join(sorted(g['slot'].tolist()))}"
-            display_rows.append({
-                "label": label,
-                "dsps": True,
-                "group_id": gid,
-                "lab_location": earliest["lab_location"],
-            })
-            seen_groups.add(gid)
-        else:
-            label = f"{row['name']} ({row['email']}) - {row['lab_location']} - {row['slot']}"
-            display_rows.append({
-                "label": label,
-                "dsps": False,
-                "row_index": idx,
-                "lab_location": row["lab_location"],
-            })
-
-    options = [r["label"] for r in display_rows]
-    selected = st.selectbox("Select a booking to reschedule", options)
-    meta = display_rows[options.index(selected)]
-
-    slots_by_day = slo_slots_by_day if meta["lab_location"] == "SLO AT Lab" else ncc_slots_by_day
-    active_slots = set(active_df["slot"].values)
-
-    if meta["dsps"]:
-        # Choose a new day with at least one consecutive pair
-        day_candidates = [d for d in slots_by_day if len(slots_by_day[d]) >= 2]
-        if not day_candidates:
-            st.info("No days with consecutive availability.")
-            return
-        new_day = st.selectbox("Choose a new day:", day_candidates)
-
-        # candidate first slots of consecutive pairs
-        firsts = []
-        for i in range(len(slots_by_day[new_day]) - 1):
-            s1, s2 = slots_by_day[new_day][i], slots_by_day[new_day][i + 1]
-            if (s1 not in active_slots) and (s2 not in active_slots):
-                firsts.append(s1)
-
-        if not firsts:
-            st.info("No consecutive block available for that day.")
-            return
-
-        new_first = st.selectbox("Choose the first slot of the DSPS block:", firsts)
-
-        if st.button("Reschedule"):
-            i = slots_by_day[new_day].index(new_first)
-            new_pair = [slots_by_day[new_day][i], slots_by_day[new_day][i + 1]]
-
-            # Cancel entire group, then re-add with same group_id
-            updated_df = bookings_df.copy()
-            mask = updated_df["group_id"] == meta["group_id"]
-            updated_df.loc[mask, "status"] = STATUS_CANCELED
-            updated_df.loc[mask, "updated_at"] = _now_iso()
-
-            g_orig = bookings_df[bookings_df["group_id"] == meta["group_id"]]
-            student_name = g_orig.iloc[0]["name"]
-            student_email = g_orig.iloc[0]["email"]
-            student_id = g_orig.iloc[0]["student_id"]
-            exam_number = g_orig.iloc[0]["exam_number"]
-            lab_location = meta["lab_location"]
-
-            overwrite_bookings(updated_df)  # persist cancellation
-
-            created_at = _now_iso()
-            for s in new_pair:
-                append_booking_dict({
-                    "name": student_name,
-                    "email": student_email,
-                    "student_id": student_id,
-                    "dsps": True,
-                    "slot": s,
-                    "lab_location": lab_location,
-                    "exam_number": exam_number,
-                    "grade": "",
-                    "graded_by": "",
-                    "group_id": meta["group_id"],
-                    "status": STATUS_BOOKED,
-                    "created_at": created_at,
-                    "updated_at": created_at,
-                })
-
-            st.success(f"Successfully rescheduled DSPS student to:\n- {new_pair[0]}\n- {new_pair[1]}")
-            st.rerun()
-
-    else:
-        # Standard reschedule
-        day_options = list(slots_by_day.keys())
-        new_day = st.selectbox("Choose a new day:", day_options)
-
-        current_slot = active_df.loc[meta["row_index"], "slot"]
-        available = [s for s in slots_by_day[new_day] if (s not in active_slots) or (s == current_slot)]
-        if not available:
-            st.info("No available slots for that day.")
-            return
-
-        new_slot = st.selectbox("Choose a new time:", available)
-
-        if st.button("Reschedule"):
-            updated_df = bookings_df.copy()
-            # cancel old row
-            old_idx = meta["row_index"]
-            old_row = updated_df.loc[old_idx]
-            updated_df.at[old_idx, "status"] = STATUS_CANCELED
-            updated_df.at[old_idx, "updated_at"] = _now_iso()
-            overwrite_bookings(updated_df)  # persist cancellation
-
-            # add a fresh row
-            created_at = _now_iso()
-            append_booking_dict({
-                "name": old_row["name"],
-                "email": old_row["email"],
-                "student_id": old_row["student_id"],
-                "dsps": False,
-                "slot": new_slot,
-                "lab_location": old_row["lab_location"],
-                "exam_number": old_row["exam_number"],
-                "grade": old_row.get("grade", ""),
-                "graded_by": old_row.get("graded_by", ""),
-                "group_id": "",
-                "status": STATUS_BOOKED,
-                "created_at": created_at,
-                "updated_at": created_at,
-            })
-
-            st.success(f"Successfully rescheduled to {new_slot}!")
-            st.rerun()
-
-    # ---------------------------- Grading -----------------------------
-    st.subheader("Enter Grades")
-    if active_df.empty:
-        st.info("No active bookings to grade.")
-        return
-
-    grade_options = [
-        f"{row['name']} ({row['email']}) - {row['slot']}"
-        for _, row in active_df.iterrows()
-    ]
-    selected_grade_entry = st.selectbox("Select a student to grade", grade_options)
-    selected_row = active_df[
-        (active_df["name"] + " (" + active_df["email"] + ") - " + active_df["slot"]) == selected_grade_entry
-    ].iloc[0]
-
-    st.markdown(
-        f"**Current Grade:** {selected_row.get('grade', '')} &nbsp;&nbsp;|&nbsp;&nbsp; "
-        f"**Graded By:** {selected_row.get('graded_by', '')}"
-    )
-
-    if "instructor_initials" not in st.session_state:
-        st.session_state.instructor_initials = ""
-
-    new_grade = st.text_input("Enter numeric grade:", value=selected_row.get("grade", ""))
-    new_graded_by = st.text_input("Graded by (initials):", value=st.session_state.instructor_initials)
-
-    if st.button("Save Grade"):
-        updated_df = load_bookings()  # fresh read to avoid race
-        updated_df = _ensure_columns(updated_df)
-
-        # choose the first matching active row for that student+slot
-        mask = (
-            (updated_df["email"] == selected_row["email"]) &
-            (updated_df["slot"] == selected_row["slot"]) &
-            (updated_df["status"].isin([STATUS_BOOKED, ""]) | updated_df["status"].isna())
-        )
-        idxs = updated_df.index[mask].tolist()
-        if not idxs:
-            st.error("Could not locate the booking (it may have been changed).")
-            st.stop()
-
-        idx = idxs[0]
-        updated_df.at[idx, "grade"] = new_grade
-        updated_df.at[idx, "graded_by"] = new_graded_by
-        updated_df.at[idx, "updated_at"] = _now_iso()
-
-        overwrite_bookings(updated_df)
-        st.session_state.instructor_initials = new_graded_by
-        st.success("Grade successfully saved.")
-        st.rerun()
+# ui_components.py — unified components for Student Sign-Up, Admin, Tutor
+from __future__ import annotations
+import io
+from datetime import date, datetime, timedelta
+from typing import Callable, List, Dict, Optional, Tuple
+from uuid import uuid4
+
+import numpy as np
+import pandas as pd
+import pytz
+import streamlit as st
+
+from bookings import (
+    claim_slots,           # atomic book-if-free (+ cancels); dict-based, avoids column-order issues
+    SlotTakenError,
+    WritesPendingError,
+    update_bookings,       # row-addressed writes keyed by booking_id
+    student_weeks,         # (email, exam) -> ISO week -> active bookings
+    BookingConflictError,
+    diff_bookings,
+    compact_bookings,
+    load_booking_events,
+    backend_name,
+    sync_bookings_to_sheets,
+    import_bookings_from_sheets,
+    connection_stats,
+    load_stats,
+    write_behind_stats,
+    scheduler_stats,
+    archive_bookings,
+    archived_terms,
+    load_archived_bookings,
+    DERIVED_COLS,
+    typed_bookings,
+    data_version,
+)
+from occupancy import earliest_blocks, occupancy_index
+from slots import LOCATIONS, Slot, epoch_minute
+from utils import parse_slot_series
+from email_utils import send_confirmation_email
+
+# ----------------------------- Constants -----------------------------
+EXAM_NUMBERS = [str(i) for i in range(2, 11)]
+
+STATUS_BOOKED = "booked"
+STATUS_CANCELED = "canceled"
+DSPS_ANONYMIZE_SECOND_SLOT = True  # display-only if you ever show rosters
+EARLIEST_RESULTS = 8  # options offered by "next open times"
+# Bulk grading grid: only grade/graded_by are editable; updated_at (hidden) is
+# what conflict detection compares against the stored row on save.
+GRADE_GRID_COLS = ["booking_id", "name", "email", "exam_number", "slot", "grade", "graded_by", "updated_at"]
+GRADE_GRID_EDITABLE = ["grade", "graded_by"]
+ADMIN_PAGE_SIZE = 25     # rows per page in the admin booking tables
+ADMIN_DEFAULT_DAYS = 7   # admin tables open on today through the next week
+EXPORT_CACHE_ENTRIES = 32  # generated download files kept per server process
+EXPORT_MIME = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Canonical columns used throughout the app (superset of legacy)
+REQUIRED_COLS = [
+    "name",
+    "email",
+    "student_id",
+    "dsps",
+    "slot",
+    "lab_location",
+    "exam_number",
+    "grade",
+    "graded_by",
+    "group_id",
+    "status",
+    "created_at",
+    "updated_at",
+    "booking_id",
+    "slot_id",
+]
+
+PACIFIC = pytz.timezone("US/Pacific")
+
+# --------------------------- Data Utilities --------------------------
+def _ensure_columns(df: pd.DataFrame) -> pd.DataFrame:
+    if all(c in df.columns for c in REQUIRED_COLS + DERIVED_COLS):
+        return df  # load_bookings() already hands out the normalized, typed frame
+    df = df.copy()
+    for c in REQUIRED_COLS:
+        if c not in df.columns:
+            if c in ("grade", "graded_by", "group_id"):
+                df[c] = ""
+            elif c == "status":
+                df[c] = STATUS_BOOKED
+            elif c in ("created_at", "updated_at"):
+                df[c] = ""
+            else:
+                df[c] = ""
+    # dsps → bool, categoricals, slot_start/slot_week/... columns
+    return typed_bookings(df)
+
+def _active(df: pd.DataFrame) -> pd.DataFrame:
+    df = _ensure_columns(df)
+    # treat blank/na status as active (back-compat)
+    mask = (df["status"].isin([STATUS_BOOKED, ""])) | (df["status"].isna())
+    return df[mask].copy()
+
+def _for_display(df: pd.DataFrame) -> pd.DataFrame:
+    """Hide the derived slot_* helper columns from tables and CSV downloads."""
+    return df.drop(columns=DERIVED_COLS, errors="ignore")
+
+def _slot_index(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """(row positions in slot_start order, slot_date in that order; NaT last)."""
+    order = np.argsort(df["slot_start"].to_numpy(), kind="stable")
+    return order, df["slot_date"].to_numpy()[order]
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _cached_slot_index(version: int, _df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """_slot_index() once per data version instead of once per rerun (_df isn't hashed)."""
+    return _slot_index(_df)
+
+def _filter_bookings(df: pd.DataFrame, start: date = None, end: date = None, exams: List[str] = (),
+                     statuses: List[str] = (), query: str = "", version: Optional[int] = None) -> pd.DataFrame:
+    """
+    Admin table filter over the typed frame; the result is in slot order.
+    - start/end (inclusive): two binary searches on the slot index (_slot_index),
+      cached per `version`. Pass data_version() only when df is the loaded frame
+      itself (slices inherit its attrs, not its row order); None sorts df now.
+    - exams/statuses: isin on the categorical columns (blank status counts as booked);
+      empty means no filter
+    - query: case-insensitive substring of name or email
+    """
+    order, dates = _slot_index(df) if version is None else _cached_slot_index(version, df)
+    if start is not None:
+        lo = dates.searchsorted(np.datetime64(start, "ns"), side="left")
+        hi = dates.searchsorted(np.datetime64(end, "ns"), side="right")
+        order = order[lo:hi]
+    df = df.iloc[order]
+    if exams:
+        df = df[df["exam_number"].isin(exams)]
+    if statuses:
+        wanted = list(statuses) + ([""] if STATUS_BOOKED in statuses else [])
+        df = df[df["status"].isin(wanted)]
+    query = query.strip().lower()
+    if query:
+        hit = (df["name"].str.lower().str.contains(query, regex=False)
+               | df["email"].str.lower().str.contains(query, regex=False))
+        df = df[hit]
+    return df
+
+def _paged_table(df: pd.DataFrame, key: str) -> None:
+    """st.dataframe of one ADMIN_PAGE_SIZE page of df, with a page picker when needed."""
+    if df.empty:
+        st.info("No bookings match these filters.")
+        return
+    pages = -(-len(df) // ADMIN_PAGE_SIZE)
+    # Page count in the key: a narrower filter starts over at page 1
+    page = st.number_input("Page", 1, pages, 1, key=f"{key}_{pages}") if pages > 1 else 1
+    lo = (page - 1) * ADMIN_PAGE_SIZE
+    shown = df.iloc[lo:lo + ADMIN_PAGE_SIZE]
+    st.dataframe(_for_display(shown))
+    st.caption(f"Rows {lo + 1}–{lo + len(shown)} of {len(df)}")
+
+def _roster(day_view: pd.DataFrame) -> pd.DataFrame:
+    """
+    Printable roster from one location's day view (sorted by slot_start): time,
+    student and exam, with Grade/Initials left blank to fill in by hand when
+    ungraded. With DSPS_ANONYMIZE_SECOND_SLOT, a DSPS block's later slots
+    read "DSPS (cont.)" instead of repeating the student.
+    """
+    def clock(t: pd.Series) -> pd.Series:
+        return t.dt.strftime("%I:%M %p").str.lstrip("0")
+
+    roster = pd.DataFrame({
+        "Time": clock(day_view["slot_start"]) + " – " + clock(day_view["slot_end"]),
+        "Name": day_view["name"],
+        "Student ID": day_view["student_id"],
+        "Exam": day_view["exam_number"].astype(str),
+        "DSPS": day_view["dsps"].map({True: "Yes", False: ""}),
+        "Grade": day_view["grade"],
+        "Initials": day_view["graded_by"],
+    })
+    if DSPS_ANONYMIZE_SECOND_SLOT:
+        cont = day_view["dsps"] & (day_view["group_id"] != "") & day_view["group_id"].duplicated()
+        roster.loc[cont, ["Name", "Student ID"]] = ["DSPS (cont.)", ""]
+    return roster.reset_index(drop=True)
+
+def _export_bytes(file_name: str, df: pd.DataFrame) -> bytes:
+    if file_name.endswith(".xlsx"):
+        buf = io.BytesIO()
+        df.to_excel(buf, index=False, engine="openpyxl")
+        return buf.getvalue()
+    return df.to_csv(index=False).encode("utf-8")
+
+@st.cache_data(max_entries=EXPORT_CACHE_ENTRIES, show_spinner=False)
+def _cached_export(version: int, file_name: str, _build: Callable[[], pd.DataFrame]) -> bytes:
+    """
+    _export_bytes() per (data version, file name). File names are unique per
+    export within one version, so _build (not hashed) needn't be part of the key.
+    """
+    return _export_bytes(file_name, _build())
+
+def _download_button(label: str, file_name: str, version: int, build: Callable[[], pd.DataFrame]) -> None:
+    """
+    Download button whose file is generated only when clicked (Streamlit 1.52+
+    runs a callable `data` on click; see requirements.txt), cached by data version
+    so repeat downloads of the same snapshot are free. Without a version the file
+    is built fresh each click.
+    """
+    def data() -> bytes:
+        if version is None:
+            return _export_bytes(file_name, build())
+        return _cached_export(version, file_name, build)
+
+    st.download_button(label, data, file_name=file_name, mime=EXPORT_MIME[file_name.rsplit(".", 1)[-1]])
+
+def _now_iso() -> str:
+    return datetime.now(PACIFIC).isoformat(timespec="seconds")
+
+def _booked_slot_ids(active_df: pd.DataFrame) -> List[int]:
+    """One slot_id per active booking (slots can take several students, see schedule.json)."""
+    return active_df["slot_id"].dropna().astype(int).tolist()
+
+def _slots_text(picked: Tuple[Slot, ...]) -> str:
+    return " and ".join(s.label for s in picked)
+
+def _assign_group_ids_for_legacy_dsps(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Backfill missing group_id on older DSPS rows (those may have had '(DSPS block)' etc.).
+    We group by (email, exam_number, lab_location, calendar-date) and assign a fresh group_id if >=2 rows.
+    """
+    df = _ensure_columns(df)
+    dsps_rows = df[(df["dsps"] == True) & ((df["group_id"] == "") | (df["group_id"].isna()))]
+    if dsps_rows.empty:
+        return df
+
+    dsps_rows = dsps_rows.copy()
+    if "slot_date" in dsps_rows.columns:
+        dsps_rows["__date"] = dsps_rows["slot_date"]
+    else:
+        dsps_rows["__date"] = parse_slot_series(dsps_rows["slot"])["start"].dt.normalize()
+
+    df = df.copy()
+    keys = ["email", "exam_number", "lab_location", "__date"]
+    for _, g in dsps_rows.groupby(keys, observed=True):
+        if len(g) >= 2:
+            gid = str(uuid4())
+            df.loc[g.index, "group_id"] = gid
+            # Normalize status
+            df.loc[g.index, "status"] = df.loc[g.index, "status"].replace("", STATUS_BOOKED)
+            df.loc[g.index, "updated_at"] = _now_iso()
+
+    if "__date" in df.columns:
+        df = df.drop(columns=["__date"], errors="ignore")
+    return df
+
+def _group_index(active_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per reschedulable unit, built with one groupby: a DSPS block (rows
+    sharing a group_id) or a single booking. Ordered by earliest slot.
+    Columns: label, dsps, group_id, booking_id/row_index (of the earliest row),
+    lab_location, members, slots.
+    - Singles booked through the form carry a group_id of their own, so a group
+      counts as a DSPS block only when it is flagged dsps or has several rows
+      (and has a group_id: the block is canceled by it).
+    """
+    df = active_df.sort_values("slot_start", kind="stable").rename_axis("row_index").reset_index()
+    key = df["group_id"].where(df["group_id"] != "", "#" + df["booking_id"])
+    groups = df.groupby(key, sort=False).agg(
+        row_index=("row_index", "first"),
+        booking_id=("booking_id", "first"),
+        group_id=("group_id", "first"),
+        name=("name", "first"),
+        email=("email", "first"),
+        lab_location=("lab_location", "first"),
+        dsps=("dsps", "any"),
+        members=("booking_id", "size"),
+        slots=("slot", "first"),
+    )
+    multi = groups["members"] > 1
+    if multi.any():
+        in_multi = key.isin(groups.index[multi])
+        groups.loc[multi, "slots"] = df[in_multi].groupby(key[in_multi], sort=False)["slot"].agg(", ".join)
+    groups["dsps"] = (groups["dsps"] | multi) & (groups["group_id"] != "")
+    label = (groups["name"] + " (" + groups["email"] + ") - "
+             + groups["lab_location"].astype(str) + " - " + groups["slots"])
+    groups["label"] = label.where(~groups["dsps"], "[DSPS] " + label)
+    return groups.reset_index(drop=True)
+
+# --------------------------- Tutor Panel -----------------------------
+def render_tutor_panel(course_hint="BIO 205: Human Anatomy", knowledge_enabled=False):
+    """
+    Thin wrapper so you can call this from anywhere without import cycles.
+    """
+    from tutor import render_chat  # lazy import to avoid circular deps
+    st.title("🧠 BIO 205 Tutor")
+    st.caption("Conversational study help for BIO 205.")
+    render_chat(course_hint=course_hint, knowledge_enabled=knowledge_enabled)
+
+# ------------------------ Student Sign-Up UI -------------------------
+def show_student_signup(bookings_df: pd.DataFrame, slo_slots_by_day: Dict[str, List[Slot]],
+                        ncc_slots_by_day: Dict[str, List[Slot]], now: datetime):
+    bookings_df = _ensure_columns(bookings_df)
+    active_df = _active(bookings_df)
+
+    st.markdown(f"Current Pacific Time: **{now.strftime('%A, %B %d, %Y %I:%M %p')}**")
+
+    st.markdown("""
+    **Please read before booking:**
+    - You may sign up for either location (SLO or NCC).
+    - Once booked, you will receive email confirmation.
+    - You may only sign up for **one appointment per week** for the same exam.
+    - DSPS students may book a **double time block** if needed by clicking "I am a DSPS student".
+    - You can reschedule future appointments, but you **cannot reschedule on the day** of your scheduled appointment.
+    """)
+
+    # --- Form Fields ---
+    name = st.text_input("Enter your full name:")
+    email = st.text_input("Enter your official Cuesta email:")
+    student_id = st.text_input("Enter your Student ID:")
+    exam_number = st.selectbox("Which oral exam are you signing up for?", EXAM_NUMBERS)
+    dsps = st.checkbox("I am a DSPS student")
+    find_next = st.checkbox("Show me the next open times at either campus")
+    lab_location = None if find_next else st.selectbox("Choose your AT Lab location:", ["SLO AT Lab", "NCC AT Lab"])
+
+    if email and not (email.lower().endswith("@my.cuesta.edu") or email.lower().endswith("@cuesta.edu")):
+        st.error("Please use your official Cuesta email ending in @my.cuesta.edu or @cuesta.edu")
+        return
+    if name and email and student_id and not student_id.startswith("900"):
+        st.error("Student ID must start with 900.")
+        return
+
+    # Build availability from ACTIVE bookings only (slot ids are per location).
+    # Options are tuples of Slots: one, or a DSPS double block; all in the future.
+    booked_ids = _booked_slot_ids(active_df)
+    block = 2 if dsps else 1
+    if find_next:
+        # Earliest blocks over both campuses, skipping weeks this student can't
+        # book into (their appointment for this exam that week is today).
+        today = datetime.now(PACIFIC).date()
+        locked_weeks = [week for week, held in student_weeks(email, exam_number).items()
+                        if any(b.slot_date == today for b in held)]
+        indexes = [occupancy_index(loc, by_day, booked_ids)
+                   for loc, by_day in zip(LOCATIONS, (slo_slots_by_day, ncc_slots_by_day))]
+        available_slots = earliest_blocks(indexes, EARLIEST_RESULTS, n=block,
+                                          after=epoch_minute(now), skip_weeks=locked_weeks)
+        if not available_slots:
+            st.info("No open times in the booking window.")
+            return
+        selected = st.radio("Next open times:", available_slots,
+                            format_func=lambda b: f"{b[0].location}: {_slots_text(b)}")
+        lab_location = selected[0].location
+    else:
+        slots_by_day = slo_slots_by_day if lab_location == "SLO AT Lab" else ncc_slots_by_day
+        if not slots_by_day:
+            st.info("No availability has been configured yet.")
+            return
+
+        selected_day = st.selectbox("Choose a day:", list(slots_by_day.keys()))
+        occupancy = occupancy_index(lab_location, slots_by_day, booked_ids)
+        available_slots = occupancy.free_blocks(selected_day, n=block, after=epoch_minute(now))
+
+        if not available_slots:
+            st.info("No available slots for this day.")
+            return
+
+        selected = st.selectbox("Choose a time:", available_slots, format_func=_slots_text)
+    selected_slot = _slots_text(selected) if selected else ""
+
+    if st.button("Submit Booking") and selected and len(selected) == block:
+        # Validate form completeness
+        if not all([name, email, student_id, selected_slot]):
+            st.error("Please fill out all required fields.")
+            return
+
+        # Enforce one-per-week-per-exam & reschedule safely (not same day)
+        target_week = selected[0].start_dt.isocalendar().week
+        today = datetime.now(PACIFIC).date()
+
+        # Same-week bookings come whole-group from the index: cancel them all
+        same_week = student_weeks(email, exam_number).get(target_week, [])
+        if any(b.slot_date == today for b in same_week):
+            # no rescheduling on the same calendar day
+            st.warning("You cannot reschedule an appointment on the day of your appointment.")
+            return
+        cancel_ids: List[str] = [b.booking_id for b in same_week]
+
+        # --- Create new booking rows (cancels any same-week booking once the slot is ours) ---
+        created_at = _now_iso()
+        base = {
+            "name": name,
+            "email": email,
+            "student_id": student_id,
+            "lab_location": lab_location,
+            "exam_number": exam_number,
+            "grade": "",
+            "graded_by": "",
+            "status": STATUS_BOOKED,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+        if dsps:
+            gid = str(uuid4())
+            # Write FULL name on both rows; anonymize only in any student-facing roster later
+            new_rows = [{**base, "dsps": True, "slot": s.label, "slot_id": s.id, "group_id": gid} for s in selected]
+        else:
+            s = selected[0]
+            new_rows = [{**base, "dsps": False, "slot": s.label, "slot_id": s.id, "group_id": str(uuid4())}]
+
+        # Availability above may be up to a minute old; the claim settles races
+        try:
+            claim_slots(cancel_ids, new_rows, at=created_at)
+        except SlotTakenError:
+            st.error("Sorry, that time was just booked by someone else. Please choose another slot.")
+            return
+        except WritesPendingError:
+            st.error("Bookings are busy saving earlier changes. Please try again in a moment.")
+            return
+
+        if dsps:
+            st.success(f"Your DSPS appointment has been recorded for:\n- {selected[0].label}\n- {selected[1].label}")
+            send_confirmation_email(email, name, selected_slot, lab_location)
+        else:
+            st.success("Your appointment has been recorded!")
+            send_confirmation_email(email, name, selected_slot, lab_location)
+
+        st.rerun()
+
+# -------------------- Availability Settings (stub) --------------------
+def show_availability_settings(*args, **kwargs):
+    st.info("Availability settings coming soon.")
+
+# --------------------------- Admin View UI ----------------------------
+def show_admin_view(bookings_df: pd.DataFrame, slo_slots_by_day: Dict[str, List[Slot]],
+                    ncc_slots_by_day: Dict[str, List[Slot]], admin_passcode: str):
+    passcode_input = st.text_input("Enter admin passcode:", type="password")
+    if passcode_input != admin_passcode:
+        if passcode_input:
+            st.error("Incorrect passcode.")
+        return
+    st.success("Access granted.")
+
+    # Normalize schema + upgrade legacy DSPS pairs with group_id
+    bookings_df = _ensure_columns(bookings_df)
+    upgraded_df = _assign_group_ids_for_legacy_dsps(bookings_df)
+    if not upgraded_df.equals(bookings_df):
+        update_bookings(diff_bookings(bookings_df, upgraded_df, ["group_id", "status", "updated_at"]))
+        bookings_df = upgraded_df
+        bookings_df.attrs.pop("data_version", None)  # no longer the loaded contents
+
+    active_df = _active(bookings_df)
+
+    # --- Campus views ---
+    slo_bookings = active_df[active_df["lab_location"] == "SLO AT Lab"]
+    ncc_bookings = active_df[active_df["lab_location"] == "NCC AT Lab"]
+
+    # Filtered on the server; only the visible page goes to the browser
+    st.subheader("Find Bookings")
+    from_day = datetime.now(PACIFIC).date()
+    c1, c2 = st.columns(2)
+    days = c1.date_input("Slot dates", value=(from_day, from_day + timedelta(days=ADMIN_DEFAULT_DAYS)))
+    query = c2.text_input("Search name or email")
+    c1, c2 = st.columns(2)
+    exams = c1.multiselect("Exam number", EXAM_NUMBERS)
+    statuses = c2.multiselect("Status", [STATUS_BOOKED, STATUS_CANCELED], default=[STATUS_BOOKED])
+    start, end = (days[0], days[-1]) if days else (None, None)
+    version = data_version(bookings_df)
+    found = _filter_bookings(bookings_df, start, end, exams, statuses, query, version=version)
+
+    st.subheader("SLO AT Lab Bookings")
+    _paged_table(found[found["lab_location"] == "SLO AT Lab"], key="slo_table")
+    _download_button("Download All SLO Bookings", "slo_bookings.csv", version, lambda: _for_display(slo_bookings))
+
+    st.subheader("NCC AT Lab Bookings")
+    _paged_table(found[found["lab_location"] == "NCC AT Lab"], key="ncc_table")
+    _download_button("Download All NCC Bookings", "ncc_bookings.csv", version, lambda: _for_display(ncc_bookings))
+
+    with st.expander("Slot capacity"):
+        st.caption("Students per slot come from the schedule file; remaining = capacity − active bookings.")
+        cap_location = st.selectbox("Campus", list(LOCATIONS))
+        cap_slots = slo_slots_by_day if cap_location == "SLO AT Lab" else ncc_slots_by_day
+        if cap_slots:
+            cap_day = st.selectbox("Day", list(cap_slots))
+            occupancy = occupancy_index(cap_location, cap_slots, _booked_slot_ids(active_df))
+            st.dataframe(occupancy.capacity_table(cap_day), hide_index=True)
+        else:
+            st.info("No slots scheduled for this campus.")
+
+    # --- Today's Appointments (any day) and printable rosters ---
+    st.subheader("Download Today's Appointments")
+    today = datetime.now(PACIFIC).date()
+    roster_day = st.date_input("Appointments for", value=today)
+    day_label = "today" if roster_day == today else roster_day.strftime("%A %m/%d/%y")
+
+    for short, location_df in (("SLO", slo_bookings), ("NCC", ncc_bookings)):
+        day_view = location_df[location_df["slot_date"] == pd.Timestamp(roster_day)].sort_values("slot_start")
+        if day_view.empty:
+            st.info(f"No {short} appointments scheduled for {day_label}.")
+            continue
+        st.markdown(f"### {short} AT Lab – {day_label.capitalize()}")
+        st.dataframe(_for_display(day_view))
+        stem = f"{short.lower()}_{roster_day.isoformat()}"
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            _download_button(f"Download {short} Appointments", f"{stem}_appointments.csv", version,
+                             lambda v=day_view: _for_display(v))
+        with c2:
+            _download_button(f"{short} Roster (CSV)", f"{stem}_roster.csv", version, lambda v=day_view: _roster(v))
+        with c3:
+            _download_button(f"{short} Roster (Excel)", f"{stem}_roster.xlsx", version,
+                             lambda v=day_view: _roster(v))
+
+    # --- Google Sheets sync (only when bookings live in a local store) ---
+    if backend_name() != "sheets":
+        st.subheader("Google Sheets Sync")
+        st.caption(f"Bookings are stored in the local **{backend_name()}** backend; the sheet is an export copy.")
+        c1, c2 = st.columns(2)
+        if c1.button("Export bookings to Google Sheets"):
+            sync_bookings_to_sheets()
+            st.success("Google Sheet updated.")
+        if c2.button("Import bookings from Google Sheets"):
+            n = import_bookings_from_sheets()
+            st.success(f"Imported {n} bookings.")
+            st.rerun()
+
+    with st.expander("Booking history (event log)"):
+        events = load_booking_events(limit=200)
+        if events.empty:
+            st.caption("No events recorded yet.")
+        else:
+            st.dataframe(events, hide_index=True)
+        if st.button("Compact event log now"):
+            n = compact_bookings()
+            st.success(f"Folded {n} pending events into the bookings sheet.")
+
+    with st.expander("Archive (past terms)"):
+        st.caption("Moves past bookings that are canceled or graded out of the live sheet into per-term archives.")
+        if st.button("Archive past bookings now"):
+            moved = archive_bookings(datetime.now(PACIFIC).replace(tzinfo=None))
+            if moved:
+                st.success("Archived " + ", ".join(f"{n} from {term}" for term, n in moved.items()) + ".")
+            else:
+                st.info("Nothing to archive.")
+        terms = archived_terms()
+        if terms:
+            term = st.selectbox("Archived term", terms[::-1])
+            if st.button("Load archived term"):
+                archived = load_archived_bookings(term)
+                st.dataframe(archived, hide_index=True)
+                st.download_button(f"Download {term} archive", archived.to_csv(index=False),
+                                   file_name=f"bookings_{term}.csv")
+
+    with st.expander("Storage diagnostics"):
+        st.caption("Google Sheets connection reuse, load counts, request scheduler and write-behind queue "
+                   "since this server process started.")
+        st.json({
+            "connection": connection_stats(),
+            "loads": load_stats(),
+            "scheduler": scheduler_stats(),
+            "write_behind": write_behind_stats(),
+        })
+
+    # --- Reschedule (group-aware for DSPS) ---
+    st.subheader("Reschedule a Student Appointment")
+    if active_df.empty:
+        st.info("No active bookings to reschedule.")
+        return
+
+    # One option per booking; DSPS blocks appear once (by earliest slot)
+    groups = _group_index(active_df)
+    pick = st.selectbox("Select a booking to reschedule", range(len(groups)),
+                        format_func=groups["label"].__getitem__)
+    meta = groups.iloc[pick]
+
+    slots_by_day = slo_slots_by_day if meta["lab_location"] == "SLO AT Lab" else ncc_slots_by_day
+    occupancy = occupancy_index(meta["lab_location"], slots_by_day, _booked_slot_ids(active_df))
+
+    if meta["dsps"]:
+        # Choose a new day with at least one consecutive pair
+        day_candidates = [d for d in slots_by_day if len(slots_by_day[d]) >= 2]
+        if not day_candidates:
+            st.info("No days with consecutive availability.")
+            return
+        new_day = st.selectbox("Choose a new day:", day_candidates)
+
+        # candidate consecutive pairs, picked by their first slot
+        pairs = occupancy.free_blocks(new_day, n=2)
+
+        if not pairs:
+            st.info("No consecutive block available for that day.")
+            return
+
+        new_pair = st.selectbox("Choose the first slot of the DSPS block:", pairs,
+                                format_func=lambda pair: f"{pair[0].label} ({min(occupancy.remaining(s.id) for s in pair)} open)")
+
+        if st.button("Reschedule"):
+
+            # Cancel entire group, then re-add with same group_id
+            g_orig = bookings_df[bookings_df["group_id"] == meta["group_id"]]
+            student_name = g_orig.iloc[0]["name"]
+            student_email = g_orig.iloc[0]["email"]
+            student_id = g_orig.iloc[0]["student_id"]
+            exam_number = g_orig.iloc[0]["exam_number"]
+            lab_location = meta["lab_location"]
+
+            cancel_ids = active_df.loc[active_df["group_id"] == meta["group_id"], "booking_id"].tolist()
+            created_at = _now_iso()
+            try:
+                claim_slots(cancel_ids, [
+                    {
+                        "name": student_name,
+                        "email": student_email,
+                        "student_id": student_id,
+                        "dsps": True,
+                        "slot": s.label,
+                        "slot_id": s.id,
+                        "lab_location": lab_location,
+                        "exam_number": exam_number,
+                        "grade": "",
+                        "graded_by": "",
+                        "group_id": meta["group_id"],
+                        "status": STATUS_BOOKED,
+                        "created_at": created_at,
+                        "updated_at": created_at,
+                    }
+                    for s in new_pair
+                ], at=created_at)
+            except SlotTakenError as e:
+                st.error(f"Just booked by someone else: {', '.join(e.slots)}. Pick another block.")
+                return
+            except WritesPendingError:
+                st.error("Bookings are busy saving earlier changes. Try again in a moment.")
+                return
+
+            st.success(f"Successfully rescheduled DSPS student to:\n- {new_pair[0].label}\n- {new_pair[1].label}")
+            st.rerun()
+
+    else:
+        # Standard reschedule
+        day_options = list(slots_by_day.keys())
+        new_day = st.selectbox("Choose a new day:", day_options)
+
+        current_id = active_df.loc[meta["row_index"], "slot_id"]
+        if pd.notna(current_id):
+            occupancy.release([current_id])  # keeping the current time is allowed
+        available = [s for (s,) in occupancy.free_blocks(new_day)]
+        if not available:
+            st.info("No available slots for that day.")
+            return
+
+        new_slot = st.selectbox("Choose a new time:", available,
+                                format_func=lambda s: f"{s.label} ({occupancy.remaining(s.id)} of {occupancy.capacity(s.id)} open)")
+
+        if st.button("Reschedule"):
+            # claim the new slot, then cancel the old row
+            old_row = bookings_df.loc[meta["row_index"]]
+            created_at = _now_iso()
+            try:
+                claim_slots([meta["booking_id"]], [{
+                    "name": old_row["name"],
+                    "email": old_row["email"],
+                    "student_id": old_row["student_id"],
+                    "dsps": False,
+                    "slot": new_slot.label,
+                    "slot_id": new_slot.id,
+                    "lab_location": old_row["lab_location"],
+                    "exam_number": old_row["exam_number"],
+                    "grade": old_row.get("grade", ""),
+                    "graded_by": old_row.get("graded_by", ""),
+                    "group_id": "",
+                    "status": STATUS_BOOKED,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }], at=created_at)
+            except SlotTakenError:
+                st.error(f"{new_slot.label} was just booked by someone else. Pick another time.")
+                return
+            except WritesPendingError:
+                st.error("Bookings are busy saving earlier changes. Try again in a moment.")
+                return
+
+            st.success(f"Successfully rescheduled to {new_slot.label}!")
+            st.rerun()
+
+    # ---------------------------- Grading -----------------------------
+    st.subheader("Enter Grades")
+    if active_df.empty:
+        st.info("No active bookings to grade.")
+        return
+
+    _show_grade_grid(active_df)
+
+    st.markdown("#### Grade one student")
+    grade_options = [
+        f"{row['name']} ({row['email']}) - {row['slot']}"
+        for _, row in active_df.iterrows()
+    ]
+    selected_grade_entry = st.selectbox("Select a student to grade", grade_options)
+    selected_row = active_df[
+        (active_df["name"] + " (" + active_df["email"] + ") - " + active_df["slot"]) == selected_grade_entry
+    ].iloc[0]
+
+    st.markdown(
+        f"**Current Grade:** {selected_row.get('grade', '')} &nbsp;&nbsp;|&nbsp;&nbsp; "
+        f"**Graded By:** {selected_row.get('graded_by', '')}"
+    )
+
+    if "instructor_initials" not in st.session_state:
+        st.session_state.instructor_initials = ""
+
+    new_grade = st.text_input("Enter numeric grade:", value=selected_row.get("grade", ""))
+    new_graded_by = st.text_input("Graded by (initials):", value=st.session_state.instructor_initials)
+
+    if st.button("Save Grade"):
+        # Cell-level write keyed by booking_id: only grade/graded_by/updated_at change
+        try:
+            update_bookings({
+                selected_row["booking_id"]: {
+                    "grade": new_grade,
+                    "graded_by": new_graded_by,
+                    "updated_at": _now_iso(),
+                }
+            })
+        except KeyError:
+            st.error("Could not locate the booking (it may have been changed).")
+            st.stop()
+
+        st.session_state.instructor_initials = new_graded_by
+        st.success("Grade successfully saved.")
+        st.rerun()
+
+def _show_grade_grid(active_df: pd.DataFrame) -> None:
+    """
+    Editable grade grid for one location's appointments on one day. Save sends
+    every edited cell in one row-addressed update_bookings() call; rows changed
+    by someone else since the grid was loaded are left out and reported.
+    The grid's starting values live in session_state, so edits survive reruns.
+    Each load gets its own editor key: a keyed data_editor keeps its edits when
+    the values under it change, so reusing the key after "Reload grid" (or a
+    save) would lay stale edits over the fresh values and save them unchecked.
+    """
+    st.markdown("#### Grade a day's appointments")
+    c1, c2 = st.columns(2)
+    location = c1.selectbox("Grading location", list(LOCATIONS))
+    day = c2.date_input("Grading day", value=datetime.now(PACIFIC).date())
+
+    grid_key = f"{location}|{day.isoformat()}"
+    grid = st.session_state.get("grade_grid")
+    if grid is None or grid["key"] != grid_key:
+        rows = active_df[(active_df["lab_location"] == location) & (active_df["slot_date"] == pd.Timestamp(day))]
+        base = rows.sort_values("slot_start")[GRADE_GRID_COLS].astype(str).reset_index(drop=True)
+        grid = st.session_state["grade_grid"] = {"key": grid_key, "base": base, "load": uuid4().hex}
+    base = grid["base"]
+    if base.empty:
+        st.info("No appointments for that location and day.")
+        return
+
+    edited = st.data_editor(
+        base,
+        hide_index=True,
+        disabled=[c for c in GRADE_GRID_COLS if c not in GRADE_GRID_EDITABLE],
+        column_config={"booking_id": None, "updated_at": None},
+        key=f"grade_grid_{grid_key}_{grid['load']}",
+    )
+    c1, c2 = st.columns(2)
+    if c2.button("Reload grid"):
+        st.session_state.pop("grade_grid", None)
+        st.rerun()
+    if not c1.button("Save grades"):
+        return
+
+    changes = diff_bookings(base, edited, GRADE_GRID_EDITABLE)
+    if not changes:
+        st.info("No grades changed.")
+        return
+    stamp = _now_iso()
+    loaded = base.set_index("booking_id")
+    expected = {bid: loaded.loc[bid, ["updated_at"] + GRADE_GRID_EDITABLE].to_dict() for bid in changes}
+    changes = {bid: {**fields, "updated_at": stamp} for bid, fields in changes.items()}
+    try:
+        update_bookings(changes, expected=expected)
+        conflicts: List[str] = []
+    except BookingConflictError as e:
+        # Save everything else; the changed rows need a fresh look first
+        conflicts = e.booking_ids
+        rest = {bid: f for bid, f in changes.items() if bid not in conflicts}
+        try:
+            update_bookings(rest, expected={bid: expected[bid] for bid in rest})
+        except BookingConflictError:
+            st.error("Bookings are changing right now; nothing was saved. Try again.")
+            return
+    except WritesPendingError:
+        st.error("Bookings are busy saving earlier changes; nothing was saved. Try again in a moment.")
+        return
+
+    saved = len(changes) - len(conflicts)
+    if conflicts:
+        names = loaded.loc[conflicts, "name"].tolist()
+        st.warning(f"Saved {saved} grade(s). Not saved, changed by someone else since you loaded the grid: "
+                   f"{', '.join(names)}. Reload the grid to see their current values.")
+        return
+    st.session_state.pop("grade_grid", None)
+    st.success(f"Saved {saved} grade(s).")
+    st.rerun()